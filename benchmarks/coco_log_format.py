@@ -0,0 +1,94 @@
+"""Formatting throughput of .dat/.tdat lines, in lines per second.
+
+Compares the previous per-record formatting (str.format with one f-string per
+coordinate) against COCOLogRecord.__str__ and the bulk COCOLogRecord.format_lines,
+and checks that all of them render the same lines.
+
+Usage:
+    python benchmarks/coco_log_format.py [--lines 2000] [--dims 2 10 40 160 640]
+"""
+
+import argparse
+import timeit
+from typing import List
+
+import numpy as np
+
+from ttex.log.coco import COCOEvalBatch, COCOStart, COCOState
+from ttex.log.coco.record import COCOLogRecord
+
+
+def legacy_format(record: COCOLogRecord) -> str:
+    """Formatting of COCOLogRecord before format_lines was introduced"""
+    x_str = " ".join(f"{val:+.4e}" for val in record.x)
+    return COCOLogRecord.template.format(
+        f_evals=record.f_evals,
+        g_evals=record.g_evals,
+        best_diff_opt=record.best_diff_opt,
+        mf=record.mf,
+        best_mf=record.best_mf,
+        x_str=x_str,
+    )
+
+
+def make_records(dim: int, lines: int) -> List[COCOLogRecord]:
+    rng = np.random.default_rng(0)
+    state = COCOState()
+    state.update(
+        COCOStart(algo="bench", problem=1, suite="bench", exp_id="bench", dim=dim)
+    )
+    state.update(
+        COCOEvalBatch(
+            x=rng.normal(scale=5, size=(lines, dim)),
+            mf=rng.lognormal(sigma=3, size=lines),
+        )
+    )
+    return [COCOLogRecord(state, idx) for idx in range(lines)]
+
+
+def lines_per_sec(func, lines: int, number: int = 3) -> float:
+    return lines / (min(timeit.repeat(func, number=1, repeat=number)))
+
+
+def main(dims: List[int], lines: int):
+    print(
+        f"{'dim':>5}{'legacy l/s':>14}{'__str__ l/s':>14}{'bulk l/s':>14}{'speedup':>9}"
+    )
+    for dim in dims:
+        records = make_records(dim, lines)
+        f_evals = [record.f_evals for record in records]
+        g_evals = [record.g_evals for record in records]
+        best_diff_opt = np.array([record.best_diff_opt for record in records])
+        mf = np.array([record.mf for record in records])
+        best_mf = np.array([record.best_mf for record in records])
+        x = np.array([record.x for record in records])
+
+        def legacy():
+            return [legacy_format(record) for record in records]
+
+        def single():
+            return [str(record) for record in records]
+
+        def bulk():
+            return COCOLogRecord.format_lines(
+                f_evals, g_evals, best_diff_opt, mf, best_mf, x
+            )
+
+        assert legacy() == single() == bulk(), "Formatted lines differ"
+        legacy_lps = lines_per_sec(legacy, lines)
+        single_lps = lines_per_sec(single, lines)
+        bulk_lps = lines_per_sec(bulk, lines)
+        print(
+            f"{dim:>5}{legacy_lps:>14.0f}{single_lps:>14.0f}{bulk_lps:>14.0f}"
+            f"{bulk_lps / legacy_lps:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument(
+        "--dims", type=int, nargs="+", default=[2, 5, 10, 20, 40, 80, 160, 320, 640]
+    )
+    args = parser.parse_args()
+    main(args.dims, args.lines)
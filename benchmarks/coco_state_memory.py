@@ -0,0 +1,92 @@
+"""Memory and attribute-access benchmark for the slotted COCO state and records.
+
+Compares COCOState and the COCO records against dict-backed objects holding
+the same values, i.e. the layout before __slots__ were introduced.
+
+Usage:
+    python benchmarks/coco_state_memory.py [--instances 10000]
+"""
+
+import argparse
+import copy
+import timeit
+import tracemalloc
+from typing import Callable, List
+
+from ttex.log.coco import COCOEval, COCOStart, COCOState
+from ttex.log.coco.record import (
+    COCOdatRecord,
+    COCOInfoRecord,
+    COCOtdatRecord,
+)
+
+
+class DictBacked:
+    """Plain object with a __dict__, filled with the values of a slotted object"""
+
+    def __init__(self, obj):
+        for cls in type(obj).__mro__:
+            for name in getattr(cls, "__slots__", ()):
+                if hasattr(obj, name):
+                    setattr(self, name, getattr(obj, name))
+
+
+def started_state() -> COCOState:
+    state = COCOState()
+    state.update(
+        COCOStart(
+            algo="bench", problem=1, suite="bench", exp_id="bench", dim=10, fopt=0.0
+        )
+    )
+    state.update(COCOEval(x=[0.5] * 10, mf=1.0))
+    state.set_dat_filepath("bench/data_1/f1_d10_i0.dat", "bench/f1_i0.info")
+    return state
+
+
+def allocated_bytes(factory: Callable[[], object], instances: int) -> float:
+    """Average number of bytes allocated per object"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    objects: List[object] = [factory() for _ in range(instances)]
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del objects
+    return (after - before) / instances
+
+
+def access_ns(obj: object, number: int = 500000) -> float:
+    """Time to read and write f_evals once, in nanoseconds"""
+    timer = timeit.Timer("obj.f_evals = obj.f_evals + 1", globals={"obj": obj})
+    return min(timer.repeat(number=number, repeat=5)) / number * 1e9
+
+
+def main(instances: int):
+    state = started_state()
+    objects = {
+        "COCOState": state,
+        "COCOdatRecord": COCOdatRecord(state),
+        "COCOtdatRecord": COCOtdatRecord(state),
+        "COCOInfoRecord": COCOInfoRecord(state),
+    }
+    print(
+        f"{'class':<16}{'slots B/obj':>12}{'dict B/obj':>12}{'saved':>8}"
+        f"{'slots ns':>10}{'dict ns':>10}"
+    )
+    for name, obj in objects.items():
+        # Copies share the attribute values, so only the object layout is measured
+        slotted_bytes = allocated_bytes(lambda: copy.copy(obj), instances)
+        dict_bytes = allocated_bytes(lambda: DictBacked(obj), instances)
+        slotted_ns = access_ns(copy.copy(obj))
+        dict_ns = access_ns(DictBacked(obj))
+        print(
+            f"{name:<16}{slotted_bytes:>12.0f}{dict_bytes:>12.0f}"
+            f"{1 - slotted_bytes / dict_bytes:>8.0%}"
+            f"{slotted_ns:>10.1f}{dict_ns:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--instances", type=int, default=10000)
+    args = parser.parse_args()
+    main(args.instances)
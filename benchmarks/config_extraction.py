@@ -0,0 +1,142 @@
+"""Throughput of ConfigFactory.from_dict for deeply nested configs, in configs/second.
+
+Builds a config nested `--depth` levels deep, each level with `--width` plain
+values and one sub-config, and extracts it `--repeats` times. Compares the
+current extraction, which caches one plan per config class, against the
+previous one, which inspected the signature of every (sub-)config, checked
+the required values with numpy and formatted every value for the debug log,
+even with debug logging disabled. Both have to produce the same configs.
+
+Usage:
+    python benchmarks/config_extraction.py [--depth 1 10 50] [--width 10]
+        [--repeats 200]
+"""
+
+import argparse
+import logging
+import time
+from contextlib import contextmanager
+from inspect import Parameter, signature
+from typing import Dict, Optional, Type
+
+import numpy as np
+
+from ttex.config import Config, ConfigFactory
+from ttex.log import LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+class LevelConfig(Config):
+    def __init__(
+        self,
+        name: str,
+        values: Dict,
+        sub: Optional[Config] = None,
+        lr: float = 1e-3,
+        optimizer: str = "adam",
+        path: str = "/data/run/file.csv",
+    ):
+        self.name = name
+        self.values = values
+        self.sub = sub
+        self.lr = lr
+        self.optimizer = optimizer
+        self.path = path
+        super().__init__()
+
+
+def legacy_extract(
+    config_class: Type[Config],
+    config: Dict,
+    context: Optional[Dict] = None,
+) -> Config:
+    """ConfigFactory.extract before the extraction plans were cached"""
+    signa = signature(config_class.__init__)
+    values = {
+        p.name: config.get(p.name, p.default)
+        for _, p in signa.parameters.items()
+        if p.name != "self"
+    }
+    non_empty = [np.sum([v != Parameter.empty]) for _, v in values.items()]
+    assert all(non_empty), f"Missing values for {config_class} in config {values}"
+    if isinstance(config, dict):
+        assert all([k in values for k, _ in config.items()])
+    for k, v in values.items():
+        values[k] = ConfigFactory._extract_value(v, context=context)
+    return_config = config_class(**values)  # type: ignore[call-arg]
+    if isinstance(config, Dict):
+        return_config._to_dict = config  # type: ignore[attr-defined]
+    return return_config
+
+
+@contextmanager
+def legacy_extraction():
+    current_extract = ConfigFactory.extract
+    current_extract_value = ConfigFactory._extract_value
+
+    def legacy_extract_value(value, context=None):
+        logger.debug(f"Extracting value {value}")
+        return current_extract_value(value, context=context)
+
+    ConfigFactory.extract = staticmethod(legacy_extract)  # type: ignore
+    ConfigFactory._extract_value = staticmethod(legacy_extract_value)  # type: ignore
+    try:
+        yield
+    finally:
+        ConfigFactory.extract = staticmethod(current_extract)  # type: ignore
+        ConfigFactory._extract_value = staticmethod(current_extract_value)  # type: ignore
+
+
+def nested_config(depth: int, width: int) -> Dict:
+    config: Optional[Dict] = None
+    for level in reversed(range(depth)):
+        values = {f"v{i}": i * 0.5 for i in range(width)}
+        level_config = {"name": f"level{level}", "values": values, "lr": 0.01}
+        if config is not None:
+            level_config["sub"] = config
+        config = {"LevelConfig": level_config}
+    assert config is not None
+    return config
+
+
+def flatten(config: Optional[Config]) -> list:
+    levels = []
+    while config is not None:
+        levels.append({k: v for k, v in vars(config).items() if k != "sub"})
+        config = config.sub  # type: ignore[attr-defined]
+    return levels
+
+
+def throughput(dict_config: Dict, repeats: int) -> float:
+    context = {"LevelConfig": LevelConfig}
+    start = time.perf_counter()
+    for _ in range(repeats):
+        ConfigFactory.from_dict(dict_config, context=context)
+    return repeats / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[0])
+    parser.add_argument("--depth", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--width", type=int, default=10)
+    parser.add_argument("--repeats", type=int, default=200)
+    args = parser.parse_args()
+
+    context = {"LevelConfig": LevelConfig}
+    print(f"{'depth':>6} {'before':>14} {'after':>14} {'speedup':>8}")
+    for depth in args.depth:
+        dict_config = nested_config(depth, args.width)
+        current = flatten(ConfigFactory.from_dict(dict_config, context=context))
+        with legacy_extraction():
+            legacy = flatten(ConfigFactory.from_dict(dict_config, context=context))
+            before = throughput(dict_config, args.repeats)
+        assert current == legacy, "Extractions differ"
+        after = throughput(dict_config, args.repeats)
+        print(
+            f"{depth:>6} {before:>10.0f} c/s {after:>10.0f} c/s {after / before:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""Overhead of WandbHandler per log record, in microseconds.
+
+Logs `--records` small dicts per step through a logger with a WandbHandler,
+once unbatched and once with batch_size, against a local stand-in for a wandb
+run. The stand-in spends `--call-cost` microseconds per call to log, roughly the
+client overhead of an offline wandb run, and checks that both modes log the same
+metrics per step.
+
+Then compares the throughput for dicts with `--keys` metrics against the previous
+handler, which parsed the formatted message with ast.literal_eval.
+
+Usage:
+    python benchmarks/wandb_handler_overhead.py [--steps 500] [--records 10]
+        [--call-cost 400] [--batch-sizes 10 100 1000] [--keys 10 100 1000]
+"""
+
+import argparse
+import ast
+import logging
+import time
+from typing import Dict, List, Optional
+
+from ttex.log.handler import WandbHandler
+
+
+class StandInRun:
+    """Merges the logged dicts per step like wandb, at a fixed cost per call"""
+
+    id = "bench"
+    url = "bench"
+
+    def __init__(self, call_cost: float):
+        self.call_cost = call_cost
+        self.calls = 0
+        self.history: List[Dict] = []
+        self._pending: Dict = {}
+
+    def define_metric(self, *args, **kwargs):
+        pass
+
+    def log(self, data, step=None, commit=None):
+        end = time.perf_counter() + self.call_cost
+        self.calls += 1
+        self._pending.update(data)
+        if commit or (commit is None and step is None):
+            self.history.append(self._pending)
+            self._pending = {}
+        while time.perf_counter() < end:
+            pass
+
+
+class LegacyWandbHandler(WandbHandler):
+    """Parsing of WandbHandler before record_metrics was introduced"""
+
+    @staticmethod
+    def record_metrics(record: logging.LogRecord) -> Optional[Dict]:
+        return ast.literal_eval(record.getMessage())
+
+
+def run_benchmark(steps: int, records: int, call_cost: float, batch_size: int):
+    run = StandInRun(call_cost)
+    handler = WandbHandler(snapshot=False, batch_size=batch_size, batch_interval=60)
+    handler.run = run  # type: ignore[assignment]
+    logger = logging.getLogger(f"wandb_bench_{batch_size}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    start = time.perf_counter()
+    for step in range(steps):
+        for i in range(records - 1):
+            logger.info({f"metric_{i}": step * i}, extra={"commit": False})
+        logger.info({"step": step})
+    handler.flush()
+    elapsed = time.perf_counter() - start
+    logger.removeHandler(handler)
+    return elapsed / (steps * records) * 1e6, run
+
+
+def records_per_sec(handler_cls, keys: int, records: int = 500) -> float:
+    run = StandInRun(0)
+    handler = handler_cls(snapshot=False)
+    handler.run = run
+    logger = logging.getLogger(f"wandb_bench_{handler_cls.__name__}_{keys}")
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    logger.addHandler(handler)
+    metrics = {f"layer_{i}/grad_norm": i * 0.1 for i in range(keys)}
+    start = time.perf_counter()
+    for _ in range(records):
+        logger.info(metrics)
+    elapsed = time.perf_counter() - start
+    logger.removeHandler(handler)
+    assert run.history[-1] == metrics, "Logged metrics differ"
+    return records / elapsed
+
+
+def main(
+    steps: int,
+    records: int,
+    call_cost: float,
+    batch_sizes: List[int],
+    keys: List[int],
+):
+    print(f"{'batch_size':>10}{'us/record':>12}{'log calls':>11}{'speedup':>9}")
+    base_us, base_run = run_benchmark(steps, records, call_cost * 1e-6, 0)
+    print(f"{0:>10}{base_us:>12.1f}{base_run.calls:>11}{1:>8.1f}x")
+    for batch_size in batch_sizes:
+        us, run = run_benchmark(steps, records, call_cost * 1e-6, batch_size)
+        assert run.history == base_run.history, "Logged metrics differ"
+        print(f"{batch_size:>10}{us:>12.1f}{run.calls:>11}{base_us / us:>8.1f}x")
+
+    print(f"\n{'keys':>10}{'legacy rec/s':>14}{'rec/s':>12}{'speedup':>9}")
+    for n_keys in keys:
+        legacy = records_per_sec(LegacyWandbHandler, n_keys)
+        structured = records_per_sec(WandbHandler, n_keys)
+        print(
+            f"{n_keys:>10}{legacy:>14.0f}{structured:>12.0f}"
+            f"{structured / legacy:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--steps", type=int, default=500)
+    parser.add_argument("--records", type=int, default=10)
+    parser.add_argument("--call-cost", type=float, default=400)
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--keys", type=int, nargs="+", default=[10, 100, 1000])
+    args = parser.parse_args()
+    main(args.steps, args.records, args.call_cost, args.batch_sizes, args.keys)
@@ -1,5 +1,4 @@
-from distutils.core import setup
-from setuptools import find_packages
+from setuptools import find_packages, setup
 
 __version__ = "0.2.1.54"
 
@@ -8,6 +7,7 @@ setup(
     version=__version__,
     packages=find_packages(),
     install_requires=["wandb", "numpy", "cocopp"],
+    entry_points={"console_scripts": ["ttex=ttex.__main__:main"]},
     license="GPL3",
     long_description="Tool for experiments",
     long_description_content_type="text/x-rst",
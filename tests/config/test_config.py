@@ -1,10 +1,12 @@
 from ttex.config import Config, ConfigFactory
+from ttex.config import config as config_module
 from . import DummyConfig, dict_config, DummyEnum, DummyContext
 import pytest
 from logging import Handler
 import os
 import json
 import copy
+import importlib
 import numpy as np
 
 
@@ -92,6 +94,32 @@ def test_extract():
         test_config.to_dict()  # Due to hack
 
 
+def test_extraction_plan(monkeypatch):
+    ConfigFactory.clear_cache()
+    inspected = []
+    signature = config_module.signature
+
+    def counting_signature(obj):
+        inspected.append(obj)
+        return signature(obj)
+
+    monkeypatch.setattr(config_module, "signature", counting_signature)
+    for _ in range(3):
+        test_config = ConfigFactory.extract(
+            DummyConfig,
+            {"a": np.array([]), "b": {"DummyConfig": {"a": 1, "b": 2}}},
+            context=globals(),
+        )
+        assert test_config.a.size == 0 and test_config.b.a == 1
+    # The signature is only inspected once per class
+    assert inspected == [DummyConfig.__init__]
+    plan = ConfigFactory._extraction_plan(DummyConfig)
+    assert plan.required == ("a", "b")
+    assert [name for name, _ in plan.defaults] == ["a", "b", "c", "d", "e"]
+    with pytest.raises(AssertionError, match="Missing values"):
+        ConfigFactory.extract(DummyConfig, {"a": 1})
+
+
 def test_exctract_class():
     ex_class = ConfigFactory._extract_attr("ttex.log.handler.WandbHandler")
     assert issubclass(ex_class, Handler)
@@ -128,6 +156,42 @@ def test_exctract_class():
     assert enum_local == DummyEnum.A
 
 
+def test_attr_resolution_cache(monkeypatch):
+    ConfigFactory.clear_cache()
+    imported = []
+    import_module = importlib.import_module
+
+    def counting_import(name):
+        imported.append(name)
+        return import_module(name)
+
+    monkeypatch.setattr(importlib, "import_module", counting_import)
+    # Plain strings that cannot name an attribute are not looked up
+    for value in ["/data/file.csv", "1.5e-3", "a b", "", "x..y"]:
+        assert ConfigFactory._extract_value(value) == value
+        with pytest.raises(ValueError, match="Not a dotted name"):
+            ConfigFactory._extract_attr(value)
+    assert imported == []
+
+    # Failed and successful imports are only attempted once
+    for _ in range(3):
+        assert ConfigFactory._extract_value("model.pt") == "model.pt"
+        assert ConfigFactory._extract_value(
+            "ttex.log.handler.WandbHandler"
+        ) is ConfigFactory._extract_attr("ttex.log.handler.WandbHandler")
+    assert sorted(imported) == ["model", "ttex.log.handler"]
+    # Lookups in the context are not cached, it might change
+    context = {}
+    assert ConfigFactory._extract_value("DummyEnum.A", context=context) == (
+        "DummyEnum.A"
+    )
+    context["DummyEnum"] = DummyEnum
+    assert ConfigFactory._extract_value("DummyEnum.A", context=context) == (DummyEnum.A)
+    ConfigFactory.clear_cache()
+    ConfigFactory._extract_value("model.pt")
+    assert imported.count("model") == 2
+
+
 @pytest.mark.parametrize("mode", ["extract", "dict", "json"])
 def test_from_dict(mode):
     if mode == "extract":
@@ -0,0 +1,141 @@
+import os
+import os.path as osp
+import shutil
+import pytest
+from cocopp import pproc, testbedsettings
+from ttex.log.coco.postp.dataset_cache import DataSetCache
+from ttex.log.coco.postp.testbed import TestbedFactory
+from ttex.log.coco.run_cocopp import run_cocopp
+from ttex.log.utils.coco_logging_setup import setup_coco_logger, teardown_coco_logger
+from tests.log.coco.postp.test_testbed import create_testbedsettings
+from tests.log.coco.test_coco_logging_integration import generate_events
+
+CACHE_DIR = "test_cache"
+
+
+@pytest.fixture(scope="function", autouse=True)
+def cleanup_dummy_files():
+    for path in ["test_exp_id", "test_dir", CACHE_DIR]:
+        shutil.rmtree(path, ignore_errors=True)
+
+    yield
+
+    for path in ["test_exp_id", "test_dir", CACHE_DIR, "ppdata"]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def log_results(name: str, suite_info, instances) -> str:
+    logger = setup_coco_logger(name, direct=True)
+    for inst in instances:
+        for dim_idx in [1, 2]:
+            events = generate_events(
+                num_evals=50,
+                suite=suite_info,
+                problem_idx=0,
+                dim_idx=dim_idx,
+                inst=inst,
+            )
+            for event in events:
+                logger.info(event)
+    teardown_coco_logger(name)
+    return osp.join("test_exp_id", suite_info.name, "test_algo")
+
+
+def summary(dsl) -> list:
+    return sorted(
+        (ds.funcId, ds.dim, tuple(ds.instancenumbers), ds.evals.tobytes()) for ds in dsl
+    )
+
+
+@pytest.mark.parametrize("key", ["mtime", "content"])
+def test_dataset_cache(key):
+    _, suite_info = create_testbedsettings()
+    TestbedFactory.create_testbed_class(suite_info)
+    result_path = log_results("coco_logger_cache", suite_info, [1, 2])
+    expected = summary(pproc.DataSetList(result_path))
+
+    cache = DataSetCache(CACHE_DIR, key=key)
+    with cache.patch():
+        assert summary(pproc.DataSetList(result_path)) == expected
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert pproc.DataSetList.processIndexFile is cache._process_index_file
+
+    cache = DataSetCache(CACHE_DIR, key=key)
+    with cache.patch():
+        assert summary(pproc.DataSetList(result_path)) == expected
+    assert (cache.hits, cache.misses) == (2, 0)
+
+    # Touching the data of one instance invalidates its entry if keyed by mtime
+    data_dir = osp.join(result_path, "data_1")
+    data_file = osp.join(data_dir, sorted(os.listdir(data_dir))[0])
+    os.utime(data_file, ns=(0, 0))
+    cache = DataSetCache(CACHE_DIR, key=key)
+    with cache.patch():
+        assert summary(pproc.DataSetList(result_path)) == expected
+    if key == "mtime":
+        assert (cache.hits, cache.misses) == (1, 1)
+    else:
+        assert (cache.hits, cache.misses) == (2, 0)
+
+
+def test_dataset_cache_eviction():
+    _, suite_info = create_testbedsettings()
+    TestbedFactory.create_testbed_class(suite_info)
+    result_path = log_results("coco_logger_evict", suite_info, [1, 2, 3])
+    cache = DataSetCache(CACHE_DIR)
+    with cache.patch():
+        pproc.DataSetList(result_path)
+    sizes = [osp.getsize(osp.join(CACHE_DIR, f)) for f in os.listdir(CACHE_DIR)]
+    assert len(sizes) == 3
+
+    # Only the most recently used entries fit
+    cache = DataSetCache(CACHE_DIR, max_bytes=max(sizes) + 1)
+    with cache.patch():
+        pproc.DataSetList(result_path)
+    assert cache.hits == 3
+    assert len(os.listdir(CACHE_DIR)) == 3
+    cache.evict()
+    assert len(os.listdir(CACHE_DIR)) == 1
+
+
+def test_run_cocopp_cached():
+    _, suite_info = create_testbedsettings()
+    result_path = log_results("coco_logger_cocopp", suite_info, [1, 2])
+    results = [
+        run_cocopp([result_path], suite_info, silent=True, cache_dir=CACHE_DIR)
+        for _ in range(2)
+    ]
+    assert len(os.listdir(CACHE_DIR)) == 2
+    uncached = run_cocopp([result_path], suite_info, silent=True)
+    for res in results:
+        assert summary(res[list(res)[0]]) == summary(uncached[list(uncached)[0]])
+
+
+def test_dataset_cache_settings():
+    _, suite_info = create_testbedsettings()
+    TestbedFactory.create_testbed_class(suite_info)
+    result_path = log_results("coco_logger_settings", suite_info, [1, 2])
+
+    def parse(suite_info) -> DataSetCache:
+        testbedsettings.reset_current_testbed()
+        cache = DataSetCache(CACHE_DIR, suite_info=suite_info)
+        with cache.patch():
+            pproc.DataSetList(result_path)
+        return cache
+
+    assert parse(suite_info).misses == 2
+    assert parse(suite_info).hits == 2
+    # DataSets parsed with other instances of interest or targets are not reused
+    suite_info.instancesOfInterest = {1: 1}
+    TestbedFactory.create_testbed_class(suite_info)
+    cache = parse(suite_info)
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert testbedsettings.current_testbed.instancesOfInterest == {1: 1}
+    suite_info.min_target = -4
+    TestbedFactory.create_testbed_class(suite_info)
+    assert parse(suite_info).misses == 2
+    # The suite info is part of the key even if the testbed is not recreated
+    suite_info.scenario = "fixed"
+    assert parse(suite_info).misses == 2
+    assert parse(suite_info).hits == 2
+    testbedsettings.reset_current_testbed()
@@ -30,3 +30,17 @@ def test_suite_Info():
     assert suite_info.number_of_points == 5
     assert suite_info.max_target == 2
     assert suite_info.min_target == -8
+
+
+def test_suite_info_subset():
+    suite_info = create_suite_info()
+    subset = suite_info.subset(func_ids=[1, 3], dims=[1, 3, 10])
+    assert [info.func_id for info in subset.function_infos] == [1, 3]
+    assert [info.dims for info in subset.function_infos] == [[3, 10], [0]]
+    assert subset.dimensions == [1, 3, 10]
+    assert subset.name == suite_info.name
+    assert subset.data_format is suite_info.data_format
+    # The original is unchanged
+    assert suite_info.dimensions == [1, 2, 3, 5, 6, 9, 10, 20]
+    assert suite_info.subset(dims=[5]).dimensions == [5]
+    assert suite_info.subset(func_ids=[1], dims=[5]).function_infos == []
@@ -1,7 +1,9 @@
 from ttex.log.coco.record import COCOLogHeader, COCOLogRecord
 from ..test_coco_events import get_coco_start_params, eval_params
-from ttex.log.coco import COCOState, COCOStart, COCOEval
+from ttex.log.coco import COCOState, COCOStart, COCOEval, COCOEvalBatch
+from ttex.log.formatter import StrRecordBatch
 import math
+import numpy as np
 import pytest
 import os.path as osp
 
@@ -60,3 +62,63 @@ def test_get_exp_bin():
         assert math.isclose(
             COCOLogRecord.get_exp_bin(n_bins, mid_value), next_value
         ), f"Failed at mid value: {mid_value}"
+
+
+def legacy_format(record: COCOLogRecord) -> str:
+    x_str = " ".join(f"{val:+.4e}" for val in record.x)
+    return COCOLogRecord.template.format(
+        f_evals=record.f_evals,
+        g_evals=record.g_evals,
+        best_diff_opt=record.best_diff_opt,
+        mf=record.mf,
+        best_mf=record.best_mf,
+        x_str=x_str,
+    )
+
+
+@pytest.mark.parametrize("dim", [0, 1, 3, 40, 640])
+def test_format_lines(dim):
+    state = COCOState()
+    state.update(COCOStart(**{**get_coco_start_params(fopt=True), "dim": dim}))
+    rng = np.random.default_rng(dim)
+    x = rng.normal(scale=10.0 ** rng.integers(-300, 300, size=(50, dim)))
+    # Special values, rounding boundaries and integer coordinates
+    special = [0.0, -0.0, math.inf, -math.inf, math.nan, 9.99995, 1.23455e-5, 1e308]
+    for i, val in enumerate(special):
+        x[i, :] = val
+    mf = rng.lognormal(sigma=20, size=50)
+    mf[:4] = [-0.0, math.inf, 5e-324, -1.5]
+    state.update(COCOEvalBatch(x=x, mf=mf))
+    records = [COCOLogRecord(state, idx) for idx in range(50)]
+
+    expected = [legacy_format(record) for record in records]
+    assert [str(record) for record in records] == expected
+    lines = COCOLogRecord.format_lines(
+        state.last_batch.f_evals,
+        [0] * 50,
+        state.last_batch.best_diff_opt,
+        state.last_batch.mf,
+        state.last_batch.best_mf,
+        state.last_batch.x,
+    )
+    assert lines == expected
+    assert str(StrRecordBatch(records)) == "\n".join(expected)
+
+    # Coordinates given as a list of python values
+    state.update(COCOEval(x=([1, 2.5, -3] * dim)[:dim], mf=2))
+    record = COCOLogRecord(state)
+    assert str(record) == legacy_format(record)
+
+
+def test_format_records_mixed():
+    state = COCOState()
+    state.update(COCOStart(**{**get_coco_start_params(fopt=False), "dim": 0}))
+    records = []
+    for dim in [2, 3]:
+        state.update(COCOEval(x=[0.5] * dim, mf=dim))
+        records.append(COCOLogRecord(state))
+    # Different dimensions are formatted one by one
+    assert COCOLogRecord.format_records(records) == "\n".join(
+        legacy_format(record) for record in records
+    )
+    assert str(StrRecordBatch()) == ""
@@ -1,4 +1,4 @@
-from ttex.log.coco.record import COCOdatRecord, COCOdatHeader
+from ttex.log.coco.record import COCOdatRecord, COCOdatHeader, TargetTriggerSchedule
 from ..test_coco_events import get_coco_start_params, random_eval_params
 from ttex.log.coco import COCOState, COCOStart, COCOEval
 import math
@@ -57,7 +57,8 @@ def test_improvement_trigger(coco_start_params):
     "coco_start_params",
     [get_coco_start_params(fopt=True), get_coco_start_params(fopt=False)],
 )
-def test_log_target_trigger(coco_start_params):
+@pytest.mark.parametrize("use_schedule", [True, False])
+def test_log_target_trigger(coco_start_params, use_schedule):
     state = COCOState()
     start_event = COCOStart(**coco_start_params)
     state.update(start_event)
@@ -66,24 +67,27 @@ def test_log_target_trigger(coco_start_params):
     eval_event = COCOEval(**random_eval_params(dim=coco_start_params["dim"]))
     state.update(eval_event)
     n_triggers = 10
+    schedule = TargetTriggerSchedule(n_triggers) if use_schedule else None
 
     record = COCOdatRecord(state)
     record.best_diff_opt = 1.0
     record.last_imp = 0.2  # so prev best_dist_opt = 1.2, prev target = 1.2589
-    assert record.log_target_trigger(n_triggers)
+    assert record.log_target_trigger(n_triggers, target_schedule=schedule)
     assert record.best_target == 1.0
 
     record = COCOdatRecord(state)
     record.best_diff_opt = 9
     record.last_imp = 1  # so prev best_dist_opt = 10, prev target = 10
-    assert not record.log_target_trigger(n_triggers)
+    assert not record.log_target_trigger(n_triggers, target_schedule=schedule)
     assert record.best_target is None
 
     record = COCOdatRecord(state)
     # Check we stop logging when within precision of optimum
     record.best_diff_opt = 1e-9
     record.last_imp = 1
-    assert not record.log_target_trigger(n_triggers, target_precision=1e-8)
+    assert not record.log_target_trigger(
+        n_triggers, target_precision=1e-8, target_schedule=schedule
+    )
     assert record.best_target is None
 
 
@@ -167,3 +171,39 @@ def test_first_eval_emit(coco_start_params, nt_triggers):
     record.f_evals = 1
     assert record.emit(number_target_triggers=nt_triggers)
     assert hasattr(record, "best_target")
+
+
+@pytest.mark.parametrize(
+    "coco_start_params",
+    [get_coco_start_params(fopt=True), get_coco_start_params(fopt=False)],
+)
+@pytest.mark.parametrize(
+    "trigger_args",
+    [
+        {},
+        {"improvement_step": 0.1, "number_target_triggers": 0},
+        {"improvement_step": 0, "number_target_triggers": 0},
+    ],
+)
+def test_trigger(coco_start_params, trigger_args):
+    state = COCOState()
+    start_event = COCOStart(**coco_start_params)
+    state.update(start_event)
+
+    for _ in range(50):
+        eval_event = COCOEval(**random_eval_params(dim=coco_start_params["dim"]))
+        state.update(eval_event)
+        reason, best_target = COCOdatRecord.trigger(
+            state.f_evals,
+            eval_event.mf,
+            state.best_diff_opt,
+            state.last_imp,
+            **trigger_args,
+        )
+        # Deciding without a record gives the same result as the record
+        record = COCOdatRecord(state)
+        assert record.emit(**trigger_args) == (best_target is not None)
+        assert record.reason == reason
+        assert record.best_target == best_target
+
+    assert COCOdatRecord.trigger(0, 0.5, 0.5, 0.1) == (None, None)
@@ -0,0 +1,90 @@
+from ttex.log.coco.record import (
+    COCOLogRecord,
+    COCOtdatRecord,
+    EvaluationTriggerSchedule,
+    TargetTriggerSchedule,
+)
+from .test_coco_log_tdat import correct_base_triggers, correct_n_triggers
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize("dim", [0, 1, 3, 40])
+@pytest.mark.parametrize("number_evaluation_triggers", [0, 1, 20])
+@pytest.mark.parametrize("base_evaluation_triggers", [None, [3], []])
+def test_evaluation_schedule(dim, number_evaluation_triggers, base_evaluation_triggers):
+    schedule = EvaluationTriggerSchedule(
+        base_evaluation_triggers, number_evaluation_triggers, dim
+    )
+    f_evals = np.arange(1, 20000)
+    expected = [
+        COCOtdatRecord.triggered(
+            base_evaluation_triggers, number_evaluation_triggers, dim, int(f)
+        )
+        for f in f_evals
+    ]
+    np.testing.assert_array_equal(schedule.triggered(f_evals), expected)
+    for f in [1, 2, 9, 10, 11, 100, 1000]:
+        assert schedule.is_trigger(f) == expected[f - 1]
+    assert not schedule.is_trigger(0)
+
+
+def test_evaluation_schedule_default():
+    dim = 3
+    schedule = EvaluationTriggerSchedule(dimension=dim)
+    correct_triggers = sorted(
+        set(
+            correct_base_triggers(dim=dim)
+            + correct_n_triggers(number_of_triggers=20)
+            + [1]
+        )
+    )
+    correct_triggers = [t for t in correct_triggers if t < 1000]
+    assert schedule.triggers[: len(correct_triggers)].tolist() == correct_triggers
+
+
+def test_evaluation_schedule_next_trigger():
+    schedule = EvaluationTriggerSchedule([1], 0, 2, decades=1)
+    assert schedule.horizon == 10
+    assert schedule.next_trigger(0) == 1
+    assert schedule.next_trigger(1) == 1
+    assert schedule.next_trigger(2) == 2
+    # Extends beyond the initial horizon
+    assert schedule.next_trigger(3) == 20
+    assert schedule.next_trigger(21) == 200
+    assert schedule.next_trigger(2 * 10**9 + 1) == 2 * 10**10
+    assert schedule.horizon >= 2 * 10**10
+
+    schedule = EvaluationTriggerSchedule([], 0, 2)
+    assert schedule.next_trigger(1) == 1
+    assert schedule.next_trigger(2) == EvaluationTriggerSchedule.NO_TRIGGER
+
+
+@pytest.mark.parametrize("n_triggers", [1, 10, 20])
+def test_target_schedule(n_triggers):
+    schedule = TargetTriggerSchedule(n_triggers, target_precision=1e-8)
+    values = np.exp(np.random.uniform(-20, 30, 1000))
+    bins = schedule.bin_indices(values)
+    for value, k in zip(values, bins):
+        assert schedule.target(k) == COCOLogRecord.get_exp_bin(n_triggers, value)
+        assert schedule.bin_index(value) == k
+    # Values on and next to the edges are binned like get_exp_bin
+    edges = np.array([schedule.target(k) for k in range(-200, 200)])
+    values = np.concatenate((edges, np.nextafter(edges, 0), np.nextafter(edges, 1e9)))
+    bins = schedule.bin_indices(values)
+    for value, k in zip(values, bins):
+        assert schedule.target(k) == COCOLogRecord.get_exp_bin(n_triggers, value)
+        assert schedule.bin_index(value) == k
+
+
+def test_target_schedule_triggered():
+    schedule = TargetTriggerSchedule(10)
+    # prev best_diff_opt = 1.2, prev target = 1.2589, new target = 1.0
+    # prev best_diff_opt = 10, prev target = 10, new target = 10 (9)
+    triggered = schedule.triggered(np.array([1.0, 9.0]), np.array([0.2, 1.0]))
+    assert triggered.tolist() == [True, False]
+    # e.g. the first evaluation, whose improvement is infinite
+    assert schedule.bin_indices(np.array([0.0, np.inf])).tolist() == [-np.inf, np.inf]
+
+    with pytest.raises(ValueError):
+        TargetTriggerSchedule(0)
@@ -0,0 +1,164 @@
+import logging
+import os
+import os.path as osp
+import shutil
+import numpy as np
+import pytest
+import cocopp
+from cocopp.pproc import DictAlg
+from ttex.log.coco import (
+    COCOBinaryHandler,
+    COCOEvalBatch,
+    COCOStart,
+    COCOState,
+    export_coco_text,
+)
+from ttex.log.coco.binary_sink import (
+    INDEX_SUFFIX,
+    RAW_SUFFIX,
+    binary_to_text,
+    read_binary_blocks,
+)
+from ttex.log.coco.record import COCOLogHeader, COCOLogRecord
+from ttex.log.coco.postp.testbed import TestbedFactory
+from ttex.log.formatter import StrRecordBatch
+from ttex.log.utils.coco_logging_setup import setup_coco_logger, teardown_coco_logger
+from tests.log.coco.postp.test_testbed import create_testbedsettings
+from tests.log.coco.test_coco_events import get_coco_start_params
+from tests.log.coco.test_coco_logging_integration import (
+    generate_events,
+    read_result_files,
+)
+
+
+@pytest.fixture(scope="function", autouse=True)
+def cleanup_dummy_files():
+    for path in ["test_exp_id", "test_dir"]:
+        shutil.rmtree(path, ignore_errors=True)
+
+    yield
+
+    for path in ["test_exp_id", "test_dir"]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def make_state(dim: int, num_evals: int) -> COCOState:
+    params = get_coco_start_params()
+    params["dim"] = dim
+    state = COCOState()
+    state.update(COCOStart(**params))
+    state.update(
+        COCOEvalBatch(
+            x=np.random.randn(num_evals, dim) * 10,
+            mf=np.random.rand(num_evals) * 1e3,
+        )
+    )
+    return state
+
+
+def make_record(record_obj) -> logging.LogRecord:
+    record = logging.makeLogRecord({"msg": str(record_obj)})
+    record.log_dat = record_obj
+    return record
+
+
+@pytest.mark.parametrize("buffer_rows", [1, 3, 1024])
+def test_binary_handler(buffer_rows):
+    state = make_state(dim=3, num_evals=7)
+    # Records with a different number of columns in the same file
+    other_state = make_state(dim=2, num_evals=2)
+    header = COCOLogHeader(state, file_type="dat")
+    records = [COCOLogRecord(state, idx) for idx in range(5)]
+    batch = StrRecordBatch([COCOLogRecord(state, idx) for idx in range(5, 7)])
+    other_records = [COCOLogRecord(other_state, idx) for idx in range(2)]
+
+    handler = COCOBinaryHandler(root_dir="test_dir", buffer_rows=buffer_rows)
+    for record_obj in [header, *records, batch, *other_records, header, records[0]]:
+        handler.handle(make_record(record_obj))
+    handler.close()
+
+    filepath = osp.join("test_dir", header.filepath)
+    assert not osp.exists(filepath)
+    lines = [str(header)] + [str(r) for r in records + batch.records + other_records]
+    lines += [str(header), str(records[0])]
+    assert binary_to_text(filepath) == "".join(f"{line}\n" for line in lines)
+
+    blocks = list(read_binary_blocks(filepath))
+    assert [kind for kind, _ in blocks].count("header") == 2
+    rows = np.concatenate(
+        [block for kind, block in blocks if kind == "rows" and block.shape[1] == 8]
+    )
+    assert rows.shape == (8, 8)
+    assert rows[:, 0].tolist() == [1, 2, 3, 4, 5, 6, 7, 1]
+    assert np.array_equal(rows[:7, 5:], state.last_batch.x)
+
+
+def test_binary_handler_truncate():
+    state = make_state(dim=2, num_evals=2)
+    header = COCOLogHeader(state, file_type="dat")
+    record = COCOLogRecord(state, 0)
+    for _ in range(2):
+        # A new handler replaces the files, the same handler appends to them
+        handler = COCOBinaryHandler(root_dir="test_dir")
+        for record_obj in [header, record, header, record]:
+            handler.handle(make_record(record_obj))
+        handler.close()
+    expected = f"{header}\n{record}\n" * 2
+    assert binary_to_text(osp.join("test_dir", header.filepath)) == expected
+
+
+def test_binary_handler_run_finished():
+    state = make_state(dim=2, num_evals=3)
+    header = COCOLogHeader(state, file_type="dat")
+    records = [COCOLogRecord(state, idx) for idx in range(3)]
+    handler = COCOBinaryHandler(root_dir="test_dir", buffer_rows=1024)
+    for record_obj in [header, *records]:
+        handler.handle(make_record(record_obj))
+    filepath = osp.join("test_dir", header.filepath)
+    assert [kind for kind, _ in read_binary_blocks(filepath)] == ["header"]
+
+    # Finishing the run writes its rows before the handler is closed
+    finished = logging.makeLogRecord({"msg": "finished"})
+    finished.run_finished = True
+    handler.handle(finished)
+    expected = "".join(f"{line}\n" for line in [header, *records])
+    assert binary_to_text(filepath) == expected
+    with open(filepath + INDEX_SUFFIX, "r") as f:
+        assert len(f.readlines()) == 2
+    handler.close()
+    assert binary_to_text(filepath) == expected
+
+
+def test_coco_logging_integration_binary():
+    _, suite_info = create_testbedsettings()
+    TestbedFactory.create_testbed_class(suite_info)
+    runs = [
+        generate_events(
+            num_evals=300, suite=suite_info, problem_idx=0, dim_idx=2, inst=inst
+        )
+        for inst in [1, 2]
+    ]
+
+    logger = setup_coco_logger("coco_logger_text")
+    for events in runs:
+        for event in events:
+            logger.info(event)
+    teardown_coco_logger("coco_logger_text")
+    text_contents = [read_result_files(events[0]) for events in runs]
+    shutil.rmtree("test_exp_id", ignore_errors=True)
+
+    logger = setup_coco_logger("coco_logger_binary", binary=True, buffer_lines=64)
+    for events in runs:
+        for event in events:
+            logger.info(event)
+    teardown_coco_logger("coco_logger_binary")
+
+    data_dir = osp.join("test_exp_id", suite_info.name, "test_algo", "data_1")
+    binary_files = sorted(os.listdir(data_dir))
+    assert all(f.endswith((RAW_SUFFIX, INDEX_SUFFIX)) for f in binary_files)
+    text_files = export_coco_text("test_exp_id")
+    assert len(text_files) == 2 * len(runs)
+    assert [read_result_files(events[0]) for events in runs] == text_contents
+
+    res = cocopp.main(f"-o test_exp_id/ppdata test_exp_id/{suite_info.name}/test_algo")
+    assert isinstance(res, DictAlg)
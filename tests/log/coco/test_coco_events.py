@@ -1,8 +1,9 @@
-from ttex.log.coco import COCOEval, COCOEnd, COCOStart
+from ttex.log.coco import COCOEval, COCOEvalBatch, COCOEnd, COCOStart
 from ttex.log.filter import LogEvent
 import pytest
 from dataclasses import FrozenInstanceError
 import random
+import numpy as np
 
 
 def get_coco_start_params(fopt: bool = True):
@@ -71,6 +72,35 @@ def test_coco_eval():
     assert event.mf == eval_params["mf"]
 
 
+def test_coco_eval_batch():
+    x = [[1.0, 2.0, 3.0], [4.0, 5.0, 6.0]]
+    mf = [0.5, 0.25]
+    event = COCOEvalBatch(x=x, mf=mf)
+    assert isinstance(event, LogEvent)
+    assert isinstance(event.x, np.ndarray)
+    assert isinstance(event.mf, np.ndarray)
+    assert event.x.shape == (2, 3)
+    assert len(event) == 2
+    np.testing.assert_array_equal(event.x, x)
+    np.testing.assert_array_equal(event.mf, mf)
+
+    with pytest.raises(AssertionError):
+        # x must be 2D
+        COCOEvalBatch(x=[1.0, 2.0], mf=[0.5, 0.25])
+    with pytest.raises(AssertionError):
+        # one mf value per point
+        COCOEvalBatch(x=x, mf=[0.5])
+
+    # The batch does not alias the caller's buffers
+    population = np.array(x)
+    fitness = np.array(mf)
+    event = COCOEvalBatch(x=population, mf=fitness)
+    population[:] = 0.0
+    fitness[:] = 0.0
+    np.testing.assert_array_equal(event.x, x)
+    np.testing.assert_array_equal(event.mf, mf)
+
+
 def test_coco_end():
     event = COCOEnd(**end_params)
     assert isinstance(event, LogEvent)
@@ -1,9 +1,12 @@
 # integration test for coco logging
+import dataclasses
 import os.path as osp
+from concurrent.futures import ThreadPoolExecutor
 import cocopp
 from ttex.log.coco import (
     COCOStart,
     COCOEval,
+    COCOEvalBatch,
     COCOEnd,
 )
 import numpy as np
@@ -196,3 +199,221 @@ def test_coco_logging_integration_no_dim_inst():
 
     res = cocopp.main(f"-o test_exp_id/ppdata test_exp_id/{suite_info.name}/test_algo")
     assert isinstance(res, DictAlg)
+
+
+def read_result_files(start_record: COCOStart) -> dict:
+    base = osp.join(start_record.exp_id, start_record.suite, start_record.algo)
+    log_file_base = osp.join(
+        base,
+        f"data_{start_record.problem}",
+        f"f{start_record.problem}_d{start_record.dim}_i{start_record.inst}",
+    )
+    paths = {
+        "info": osp.join(base, f"f{start_record.problem}_i{start_record.inst}.info"),
+        "dat": f"{log_file_base}.dat",
+        "tdat": f"{log_file_base}.tdat",
+    }
+    contents = {}
+    for key, path in paths.items():
+        with open(path, "r") as f:
+            contents[key] = f.read()
+    return contents
+
+
+def test_coco_logging_integration_batch():
+    _, suite_info = create_testbedsettings()
+    events = generate_events(
+        num_evals=500, suite=suite_info, problem_idx=0, dim_idx=2, inst=2
+    )
+    start_record, evals = events[0], events[1:-1]
+
+    logger = setup_coco_logger("coco_logger_single")
+    for event in events:
+        logger.info(event)
+    teardown_coco_logger("coco_logger_single")
+    single_contents = read_result_files(start_record)
+    shutil.rmtree("test_exp_id", ignore_errors=True)
+
+    logger = setup_coco_logger("coco_logger_batch")
+    logger.info(start_record)
+    for start in range(0, len(evals), 64):
+        chunk = evals[start : start + 64]
+        logger.info(COCOEvalBatch(x=[e.x for e in chunk], mf=[e.mf for e in chunk]))
+    logger.info(COCOEnd())
+    teardown_coco_logger("coco_logger_batch")
+    batch_contents = read_result_files(start_record)
+
+    assert batch_contents == single_contents
+
+
+def test_coco_logging_integration_direct():
+    _, suite_info = create_testbedsettings()
+    runs = [
+        generate_events(
+            num_evals=200, suite=suite_info, problem_idx=0, dim_idx=1, inst=inst
+        )
+        for inst in [1, 2, 3]
+    ]
+
+    logger = setup_coco_logger("coco_logger_staged")
+    for events in runs:
+        for event in events:
+            logger.info(event)
+    teardown_coco_logger("coco_logger_staged")
+    staged_contents = [read_result_files(events[0]) for events in runs]
+    shutil.rmtree("test_exp_id", ignore_errors=True)
+    shutil.rmtree("test_dir", ignore_errors=True)
+
+    logger = setup_coco_logger("coco_logger_direct", direct=True, max_open_files=2)
+    for events in runs:
+        for event in events:
+            logger.info(event)
+    teardown_coco_logger("coco_logger_direct")
+    direct_contents = [read_result_files(events[0]) for events in runs]
+
+    assert direct_contents == staged_contents
+    for type_str in ["info", "log_dat", "log_tdat"]:
+        # No staging files are written
+        assert not osp.exists(osp.join("test_dir", f"coco_{type_str}.txt"))
+
+
+def test_coco_logging_integration_asynchronous():
+    _, suite_info = create_testbedsettings()
+    runs = [
+        generate_events(
+            num_evals=200, suite=suite_info, problem_idx=0, dim_idx=1, inst=inst
+        )
+        for inst in [1, 2]
+    ]
+
+    logger = setup_coco_logger("coco_logger_sync")
+    for events in runs:
+        for event in events:
+            logger.info(event)
+    teardown_coco_logger("coco_logger_sync")
+    sync_contents = [read_result_files(events[0]) for events in runs]
+    shutil.rmtree("test_exp_id", ignore_errors=True)
+
+    logger = setup_coco_logger("coco_logger_async", asynchronous=True, max_queue_size=8)
+    for events in runs:
+        for event in events:
+            logger.info(event)
+    teardown_coco_logger("coco_logger_async")
+    async_contents = [read_result_files(events[0]) for events in runs]
+
+    assert async_contents == sync_contents
+
+
+@pytest.mark.parametrize("batched", [False, True])
+def test_coco_logging_asynchronous_reused_buffer(batched):
+    _, suite_info = create_testbedsettings()
+    events = generate_events(
+        num_evals=200, suite=suite_info, problem_idx=0, dim_idx=1, inst=1
+    )
+    start_record, evals = events[0], events[1:-1]
+    logger = setup_coco_logger("coco_logger_sync_buffer")
+    for event in events:
+        logger.info(event)
+    teardown_coco_logger("coco_logger_sync_buffer")
+    sync_contents = read_result_files(start_record)
+    shutil.rmtree("test_exp_id", ignore_errors=True)
+
+    # The optimizer overwrites its buffers after each log call, before the
+    # background thread formats the records
+    logger = setup_coco_logger(
+        "coco_logger_async_buffer", asynchronous=True, max_queue_size=10000
+    )
+    logger.info(start_record)
+    chunk_size = 10 if batched else 1
+    population = np.zeros((chunk_size, len(evals[0].x)))
+    fitness = np.zeros(chunk_size)
+    for start in range(0, len(evals), chunk_size):
+        chunk = evals[start : start + chunk_size]
+        for row, e in enumerate(chunk):
+            population[row] = e.x
+            fitness[row] = e.mf
+        if batched:
+            logger.info(COCOEvalBatch(x=population, mf=fitness))
+        else:
+            logger.info(COCOEval(x=population[0], mf=float(fitness[0])))
+    population[:] = 3.0
+    logger.info(COCOEnd())
+    teardown_coco_logger("coco_logger_async_buffer")
+
+    assert read_result_files(start_record) == sync_contents
+
+
+def with_run_key(events: list, run_key) -> list:
+    return [dataclasses.replace(event, run_key=run_key) for event in events]
+
+
+def test_coco_logging_integration_run_keys():
+    _, suite_info = create_testbedsettings()
+    runs = [
+        generate_events(
+            num_evals=200, suite=suite_info, problem_idx=0, dim_idx=1, inst=inst
+        )
+        for inst in [1, 2, 3, 4]
+    ]
+
+    logger = setup_coco_logger("coco_logger_sequential")
+    for events in runs:
+        for event in events:
+            logger.info(event)
+    teardown_coco_logger("coco_logger_sequential")
+    sequential_contents = [read_result_files(events[0]) for events in runs]
+    shutil.rmtree("test_exp_id", ignore_errors=True)
+
+    # Round robin over all runs within a single logger
+    logger = setup_coco_logger("coco_logger_interleaved", direct=True)
+    keyed_runs = [with_run_key(events, inst) for inst, events in enumerate(runs)]
+    for interleaved in zip(*keyed_runs):
+        for event in interleaved:
+            logger.info(event)
+    coco_filter = logger.filters[0]
+    assert coco_filter.states == {}  # All runs finished
+    teardown_coco_logger("coco_logger_interleaved")
+    assert [read_result_files(events[0]) for events in runs] == sequential_contents
+    shutil.rmtree("test_exp_id", ignore_errors=True)
+
+    # Runs evaluated concurrently in a thread pool
+    logger = setup_coco_logger("coco_logger_threaded", direct=True)
+
+    def log_run(events):
+        for event in events:
+            logger.info(event)
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(log_run, keyed_runs))
+    teardown_coco_logger("coco_logger_threaded")
+    assert [read_result_files(events[0]) for events in runs] == sequential_contents
+
+
+def test_coco_logging_interleaved_dims():
+    _, suite_info = create_testbedsettings()
+    # Same function and instance, i.e. the same .info file
+    runs = [
+        with_run_key(
+            generate_events(
+                num_evals=50, suite=suite_info, problem_idx=0, dim_idx=dim_idx, inst=1
+            ),
+            dim_idx,
+        )
+        for dim_idx in [0, 1]
+    ]
+    logger = setup_coco_logger("coco_logger_interleaved_dims", direct=True)
+    for interleaved in zip(*runs):
+        for event in interleaved:
+            logger.info(event)
+    for handler in logger.handlers:
+        # Finished runs are forgotten
+        assert getattr(handler, "_run_filepaths", {}) == {}
+    teardown_coco_logger("coco_logger_interleaved_dims")
+
+    info_lines = read_result_files(runs[0][0])["info"].strip().split("\n")
+    assert len(info_lines) == 6
+    # Each header is followed by its algorithm line and its data line
+    for start, events in zip(range(0, 6, 3), runs):
+        assert f"DIM = {events[0].dim}," in info_lines[start]
+        assert info_lines[start + 1].startswith("% ")
+        assert f"_d{events[0].dim}_i1.tdat, 1:50|" in info_lines[start + 2]
@@ -1,5 +1,13 @@
-from ttex.log.coco import COCOKeySplitter, COCOState, COCOStart, COCOEval, COCOEnd
+from ttex.log.coco import (
+    COCOKeySplitter,
+    COCOState,
+    COCOStart,
+    COCOEval,
+    COCOEvalBatch,
+    COCOEnd,
+)
 import pytest
+import numpy as np
 from .test_coco_events import random_eval_params
 
 
@@ -22,7 +30,8 @@ def get_started_state(splitter: COCOKeySplitter, dim=10):
 def test_process_coco_start():
     state, result = get_started_state(COCOKeySplitter())
 
-    assert "info" in result
+    # The info header is written together with the data line at the end
+    assert "info" not in result
     assert "log_dat" in result
     assert "log_tdat" in result
     assert state.dat_filepath is not None
@@ -77,6 +86,9 @@ def test_process_coco_end_default(add_last):
     state.update(end_event)
     result = splitter.process(state, end_event)
     assert "info" in result
+    info_lines = str(result["info"]).split("\n")
+    assert len(info_lines) == 3 and info_lines[0].startswith("suite = ")
+    assert f":{state.f_evals}|" in info_lines[2]
     assert (
         state._needs_start is True
     )  # After COCOEnd, state should require a new start event
@@ -124,3 +136,98 @@ def test_changing_dim():
     result = splitter.process(state, eval_event)
     assert "log_tdat" in result
     assert result["log_tdat"].dim == 20
+
+
+def process_single(splitter: COCOKeySplitter, evals, dim=10):
+    state, _ = get_started_state(splitter, dim=dim)
+    lines = {"log_dat": [], "log_tdat": []}
+    for eval_event in evals:
+        state.update(eval_event)
+        result = splitter.process(state, eval_event)
+        for key in lines:
+            if key in result:
+                lines[key].append(str(result[key]))
+    return state, lines
+
+
+def process_batches(splitter: COCOKeySplitter, evals, batch_size: int, dim=10):
+    state, _ = get_started_state(splitter, dim=dim)
+    lines = {"log_dat": [], "log_tdat": []}
+    for start in range(0, len(evals), batch_size):
+        chunk = evals[start : start + batch_size]
+        batch_event = COCOEvalBatch(x=[e.x for e in chunk], mf=[e.mf for e in chunk])
+        state.update(batch_event)
+        result = splitter.process(state, batch_event)
+        for key in lines:
+            if key in result:
+                lines[key].append(str(result[key]))
+    return state, lines
+
+
+@pytest.mark.parametrize("batch_size", [1, 7, 100, 1000])
+@pytest.mark.parametrize(
+    "splitter_args",
+    [{}, {"number_target_triggers": 0}, {"base_evaluation_triggers": [3]}],
+)
+def test_process_coco_eval_batch(batch_size, splitter_args):
+    dim = 4
+    evals = [COCOEval(**random_eval_params(dim=dim)) for _ in range(1000)]
+    # Add some long runs of improvements to hit plenty of targets
+    evals += [COCOEval(x=[0.0] * dim, mf=10 * 0.95**i - 0.1) for i in range(1, 400)]
+    state, single_lines = process_single(COCOKeySplitter(**splitter_args), evals, dim)
+    batch_state, batch_lines = process_batches(
+        COCOKeySplitter(**splitter_args), evals, batch_size, dim
+    )
+    for key in single_lines:
+        assert "\n".join(batch_lines[key]) == "\n".join(single_lines[key])
+    assert batch_state.last_tdat_emit == state.last_tdat_emit
+    assert batch_state.best_target == state.best_target
+
+    end_event = COCOEnd()
+    state.update(end_event)
+    batch_state.update(end_event)
+    single_end = COCOKeySplitter(**splitter_args).process(state, end_event)
+    batch_end = COCOKeySplitter(**splitter_args).process(batch_state, end_event)
+    assert single_end.keys() == batch_end.keys()
+    for key in single_end:
+        assert str(batch_end[key]) == str(single_end[key])
+
+
+def test_process_coco_eval_batch_empty():
+    splitter = COCOKeySplitter()
+    state, _ = get_started_state(splitter)
+    batch_event = COCOEvalBatch(x=np.zeros((0, 10)), mf=np.zeros(0))
+    state.update(batch_event)
+    assert splitter.process(state, batch_event) == {}
+
+
+def test_process_coco_eval_lazy_records(monkeypatch):
+    import ttex.log.coco.coco_splitter as coco_splitter
+
+    created = {"log_dat": 0, "log_tdat": 0}
+
+    class CountingdatRecord(coco_splitter.COCOdatRecord):
+        def __init__(self, *args, **kwargs):
+            created["log_dat"] += 1
+            super().__init__(*args, **kwargs)
+
+    class CountingtdatRecord(coco_splitter.COCOtdatRecord):
+        def __init__(self, *args, **kwargs):
+            created["log_tdat"] += 1
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(coco_splitter, "COCOdatRecord", CountingdatRecord)
+    monkeypatch.setattr(coco_splitter, "COCOtdatRecord", CountingtdatRecord)
+
+    splitter = COCOKeySplitter()
+    state, _ = get_started_state(splitter)
+    emitted = {"log_dat": 0, "log_tdat": 0}
+    for _ in range(1000):
+        eval_event = COCOEval(**random_eval_params(dim=10))
+        state.update(eval_event)
+        result = splitter.process(state, eval_event)
+        for key in emitted:
+            emitted[key] += key in result
+    # Records are only created for evaluations that are emitted
+    assert created == emitted
+    assert emitted["log_tdat"] < 100
@@ -1,8 +1,9 @@
-from ttex.log.coco import COCOState, COCOStart, COCOEval, COCOEnd
+from ttex.log.coco import COCOState, COCOStart, COCOEval, COCOEvalBatch, COCOEnd
 from .test_coco_events import get_coco_start_params, end_params, random_eval_params
 import pytest
 import os.path as osp
 import math
+import numpy as np
 
 
 def test_coco_state_end():
@@ -21,6 +22,15 @@ def test_coco_state_end():
     ), "State should require a start event after COCOEnd"
 
 
+def test_coco_state_finished():
+    state = COCOState()
+    assert not state.finished  # Not started yet
+    state.update(COCOStart(**get_coco_start_params(fopt=True)))
+    assert not state.finished
+    state.update(COCOEnd(**end_params))
+    assert state.finished
+
+
 @pytest.mark.parametrize(
     "coco_start_params",
     [get_coco_start_params(fopt=True), get_coco_start_params(fopt=False)],
@@ -134,3 +144,60 @@ def test_without_dim():
     assert state.best_mf == eval_params["mf"]
     assert state.last_imp is not None
     assert state.last_eval == eval_event
+
+
+@pytest.mark.parametrize(
+    "coco_start_params",
+    [get_coco_start_params(fopt=True), get_coco_start_params(fopt=False)],
+)
+def test_coco_state_eval_batch(coco_start_params):
+    dim = coco_start_params["dim"]
+    evals = [COCOEval(**random_eval_params(dim=dim)) for _ in range(20)]
+
+    state = COCOState()
+    state.update(COCOStart(**coco_start_params))
+    batch_state = COCOState()
+    batch_state.update(COCOStart(**coco_start_params))
+    batch_state.update(COCOEvalBatch(x=[e.x for e in evals], mf=[e.mf for e in evals]))
+
+    batch = batch_state.last_batch
+    assert batch is not None
+    assert len(batch) == len(evals)
+    for i, eval_event in enumerate(evals):
+        state.update(eval_event)
+        assert batch.f_evals[i] == state.f_evals
+        assert batch.best_mf[i] == state.best_mf
+        assert batch.best_diff_opt[i] == state.best_diff_opt
+        assert batch.last_imp[i] == state.last_imp
+        assert batch.mf[i] == eval_event.mf
+
+    assert batch_state.f_evals == state.f_evals
+    assert batch_state.best_mf == state.best_mf
+    assert batch_state.best_diff_opt == state.best_diff_opt
+    assert batch_state.last_imp == state.last_imp
+    assert batch_state.last_eval.x == state.last_eval.x
+    assert batch_state.last_eval.mf == state.last_eval.mf
+
+    # A following single evaluation continues from the batch
+    state.update(evals[0])
+    batch_state.update(evals[0])
+    assert batch_state.last_batch is None
+    assert batch_state.f_evals == state.f_evals
+    assert batch_state.best_mf == state.best_mf
+
+
+def test_coco_state_eval_batch_errors():
+    state = COCOState()
+    batch = COCOEvalBatch(x=np.zeros((3, 10)), mf=np.ones(3))
+    with pytest.raises(AssertionError):
+        # COCOStart must be processed first
+        state.update(batch)
+
+    state.update(COCOStart(**get_coco_start_params()))
+    with pytest.raises(AssertionError):
+        # Dimension mismatch
+        state.update(COCOEvalBatch(x=np.zeros((3, 2)), mf=np.ones(3)))
+
+    state.update(COCOEvalBatch(x=np.zeros((0, 10)), mf=np.ones(0)))
+    assert state.f_evals == 0
+    assert state.last_batch is None
@@ -0,0 +1,121 @@
+import os
+import os.path as osp
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pytest
+import cocopp
+from cocopp.pproc import DictAlg
+from ttex.log.coco import merge_coco_shards
+from ttex.log.coco.merge_shards import info_blocks, merge_info
+from ttex.log.coco.postp.testbed import TestbedFactory
+from ttex.log.utils.coco_logging_setup import (
+    flush_coco_logger,
+    setup_coco_logger,
+    teardown_coco_logger,
+)
+from tests.log.coco.postp.test_testbed import create_testbedsettings
+from tests.log.coco.test_coco_logging_integration import (
+    generate_events,
+    read_result_files,
+)
+
+SHARD_ROOT = "test_shards"
+
+header = "suite = 'S', funcId = 1, DIM = 2, Precision = 1.000e-08, algId = 'a'"
+
+
+@pytest.fixture(scope="function", autouse=True)
+def cleanup_dummy_files():
+    for path in [SHARD_ROOT, "test_exp_id", "test_dir"]:
+        shutil.rmtree(path, ignore_errors=True)
+
+    yield
+
+    for path in [SHARD_ROOT, "test_exp_id", "test_dir", "ppdata"]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def test_merge_info():
+    info_1 = f"{header}\n% a\ndata_1/f1_d2_i1.tdat, 1:10|1.0e-01\n"
+    info_2 = (
+        f"{header}\n% a\ndata_1/f1_d2_i1.tdat, 1:20|2.0e-01\n"
+        f"{header.replace('DIM = 2', 'DIM = 3')}\n% a\ndata_1/f1_d3_i1.tdat, 1:30|3.0e-01\n"
+    )
+    assert len(info_blocks(info_2)) == 2
+    merged = merge_info([info_1, info_2])
+    assert merged.splitlines() == [
+        header,
+        "% a",
+        "data_1/f1_d2_i1.tdat, 1:10|1.0e-01, 1:20|2.0e-01",
+        header.replace("DIM = 2", "DIM = 3"),
+        "% a",
+        "data_1/f1_d3_i1.tdat, 1:30|3.0e-01",
+    ]
+    # Incomplete blocks are kept
+    assert merge_info([f"{header}\n% a\n"]) == f"{header}\n% a\n"
+
+
+def log_run_sharded(events: list) -> int:
+    """Log a run in a worker process, into the shard of the worker"""
+    shard_dir = osp.join(SHARD_ROOT, f"worker_{os.getpid()}")
+    logger = setup_coco_logger("coco_logger_shard", direct=True, shard_dir=shard_dir)
+    for event in events:
+        logger.info(event)
+    # Direct mode writes to the final files, flushing is enough
+    flush_coco_logger("coco_logger_shard")
+    return os.getpid()
+
+
+def test_merge_coco_shards():
+    _, suite_info = create_testbedsettings()
+    np.random.seed(42)
+    # Same function and instance in several dimensions, one run repeated
+    runs = [
+        generate_events(
+            num_evals=100, suite=suite_info, problem_idx=0, dim_idx=d, inst=i
+        )
+        for d, i in [(0, 1), (1, 1), (0, 2), (1, 2), (0, 1)]
+    ]
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        pids = list(executor.map(log_run_sharded, runs))
+    assert len(os.listdir(SHARD_ROOT)) == len(set(pids))
+    # Nothing is written outside of the shards
+    assert not osp.exists("test_exp_id")
+
+    merged_files = merge_coco_shards(SHARD_ROOT, ".")
+    assert len(merged_files) == 2 + 2 * 4  # 2 .info files, 4 .dat and .tdat files
+    merged = {
+        start.inst: read_result_files(start) for start in [runs[0][0], runs[2][0]]
+    }
+
+    # Each dimension is one block in the .info file
+    for inst, contents in merged.items():
+        blocks = info_blocks(contents["info"])
+        assert len(blocks) == 2
+        for block in blocks:
+            runs_in_block = block[2].split(", ")[1:]
+            expected_runs = 2 if inst == 1 and "_d2_" in block[2] else 1
+            assert len(runs_in_block) == expected_runs
+
+    # Each run is logged the same way as without sharding
+    start = runs[3][0]
+    sharded = read_result_files(start)
+    shutil.rmtree("test_exp_id", ignore_errors=True)
+    logger = setup_coco_logger("coco_logger_unsharded")
+    for events in runs[2:4]:
+        for event in events:
+            logger.info(event)
+    teardown_coco_logger("coco_logger_unsharded")
+    unsharded = read_result_files(start)
+    assert unsharded["dat"] == sharded["dat"]
+    assert unsharded["tdat"] == sharded["tdat"]
+
+    shutil.rmtree("test_exp_id", ignore_errors=True)
+    merge_coco_shards(SHARD_ROOT, ".")
+    TestbedFactory.create_testbed_class(suite_info)
+    res = cocopp.main(f"-o ppdata test_exp_id/{suite_info.name}/test_algo")
+    assert isinstance(res, DictAlg)
+    instances = {ds.dim: sorted(ds.instancenumbers) for ds in res[list(res)[0]]}
+    # All runs are loaded, including both runs of the repeated instance
+    assert instances == {2: [1, 1, 2], 3: [1, 2]}
@@ -0,0 +1,117 @@
+import os
+import os.path as osp
+import shutil
+import numpy as np
+import pytest
+from ttex.log.coco import COCOResultReader, read_trajectories
+from ttex.log.coco.reader import parse_info, parse_rows, run_segments
+from ttex.log.utils.coco_logging_setup import setup_coco_logger, teardown_coco_logger
+from tests.log.coco.postp.test_testbed import create_testbedsettings
+from tests.log.coco.test_coco_logging_integration import generate_events
+
+
+@pytest.fixture(scope="function", autouse=True)
+def cleanup_dummy_files():
+    for path in ["test_exp_id", "test_dir"]:
+        shutil.rmtree(path, ignore_errors=True)
+
+    yield
+
+    for path in ["test_exp_id", "test_dir"]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def test_parse_rows():
+    data = (
+        b"1 0 +1.0e-01 +2.0e+00 +2.0e+00 +1.0000e+00\n3 0 +nan +inf +2.0e+00 -1.0e+00\n"
+    )
+    values = parse_rows(data)
+    assert values.shape == (2, 6)
+    assert values[1, 0] == 3 and np.isnan(values[1, 2]) and values[1, 5] == -1.0
+    # Lines with a different number of coordinates are padded
+    values = parse_rows(b"1 0 1 2 2 1\n2 0 1 2 2 1 5\n3 0 1 2 2\n")
+    assert values.shape == (3, 7)
+    assert np.isnan(values[0, 6]) and values[1, 6] == 5
+    assert np.isnan(values[2, 5:]).all()
+
+
+def test_run_segments():
+    filepath = osp.join("test_dir", "f1_d1_i1.dat")
+    lines = ["% header", "1 0 1 2 2 1", "% empty run", "% header", "1 0 1 2 2 3"]
+    lines += ["2 0 1 2 2 4"]
+    os.makedirs("test_dir", exist_ok=True)
+    with open(filepath, "w") as f:
+        f.write("".join(f"{line}\n" for line in lines))
+    segments = run_segments(filepath)
+    assert len(segments) == 2
+    trajectories = read_trajectories(filepath)
+    assert [t["x"][:, 0].tolist() for t in trajectories] == [[1], [3, 4]]
+    assert trajectories[1]["f_evals"].dtype == np.int64
+
+
+def log_runs(name: str, runs: list, **kwargs):
+    logger = setup_coco_logger(name, **kwargs)
+    for events in runs:
+        for event in events:
+            logger.info(event)
+    teardown_coco_logger(name)
+
+
+@pytest.mark.parametrize("binary", [False, True])
+def test_coco_result_reader(binary):
+    _, suite_info = create_testbedsettings()
+    runs = [
+        generate_events(
+            num_evals=100, suite=suite_info, problem_idx=0, dim_idx=dim_idx, inst=inst
+        )
+        for inst in [1, 2]
+        for dim_idx in [1, 2]
+        for _ in range(2)
+    ]
+    log_runs("coco_logger_reader", runs, binary=binary)
+
+    reader = COCOResultReader("test_exp_id")
+    dims = suite_info.function_infos[0].dims[1:3]
+    assert sorted(reader.index) == [(1, dim, inst) for dim in dims for inst in [1, 2]]
+    assert len(reader.runs()) == len(runs)
+    assert len(reader.runs(inst=2)) == len(runs) // 2
+    for events in runs[:4]:
+        start = events[0]
+        selected = reader.runs(start.problem, start.dim, start.inst)
+        assert len(selected) == 2
+        assert all(
+            run.suite == start.suite and run.algo == "test_algo" for run in selected
+        )
+        assert all(run.f_evals == 100 for run in selected)
+
+    start, evals = runs[3][0], runs[3][1:-1]
+    # Second run of the same function, dimension and instance
+    dat, tdat = (
+        reader.trajectories(start.problem, start.dim, start.inst, file_type)[1]
+        for file_type in ["dat", "tdat"]
+    )
+    mf = np.array([event.mf for event in evals])
+    x = np.array([event.x for event in evals])
+    for trajectory in [dat, tdat]:
+        assert trajectory["x"].shape[1] == start.dim
+        idx = trajectory["f_evals"] - 1
+        assert np.allclose(trajectory["mf"], mf[idx], rtol=1e-9)
+        assert np.allclose(trajectory["best_mf"], np.minimum.accumulate(mf)[idx])
+        assert np.allclose(trajectory["x"], x[idx], rtol=1e-4)
+    assert (np.diff(dat["f_evals"]) > 0).all()
+
+
+def test_parse_info_merged():
+    info_path = osp.join("test_dir", "f1_i1.info")
+    header = "suite = 's', funcId = 1, DIM = 2, Precision = 1.000e-08, algId = 'a b'"
+    content = f"{header}\n% a\ndata_1/f1_d2_i1.tdat, 1:10|1.0e-01, 1:20|nan\n"
+    content += f"{header}\n% a\n"
+    os.makedirs("test_dir", exist_ok=True)
+    with open(info_path, "w") as f:
+        f.write(content)
+    runs = parse_info(info_path)
+    assert [run.run_idx for run in runs] == [0, 1]
+    assert [run.f_evals for run in runs] == [10, 20]
+    assert runs[0].algo == "a b" and runs[0].dim == 2
+    assert np.isnan(runs[1].best_target)
+    assert runs[0].data_file("dat") == osp.join("test_dir", "data_1", "f1_d2_i1.dat")
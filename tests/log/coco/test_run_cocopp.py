@@ -1,4 +1,15 @@
-from ttex.log.coco.run_cocopp import run_cocopp
+import os
+import os.path as osp
+from ttex.log.coco.run_cocopp import (
+    filter_results,
+    partition_suite,
+    run_cocopp,
+    run_cocopp_parallel,
+)
+from ttex.log.utils.coco_logging_setup import setup_coco_logger, teardown_coco_logger
+from tests.log.coco.postp.test_info import create_suite_info
+from tests.log.coco.postp.test_testbed import create_testbedsettings
+from tests.log.coco.test_coco_logging_integration import generate_events
 from ttex.log.coco.postp.info import FunctionInfo, SuiteInfo
 import pytest
 import shutil
@@ -26,3 +37,68 @@ def test_run_cocopp():
 
     # Remove ppdata folder
     shutil.rmtree("ppdata", ignore_errors=True)
+
+
+def test_partition_suite():
+    suite_info = create_suite_info()
+    partitions = partition_suite(suite_info)
+    assert list(partitions) == [f"{dim:02d}D" for dim in suite_info.dimensions]
+    assert partitions["03D"].dimensions == [3]
+    assert [info.func_id for info in partitions["03D"].function_infos] == [1, 2]
+
+    partitions = partition_suite(suite_info, by="function", function_groups=[[1, 2]])
+    assert list(partitions) == ["f1_2"]
+    assert partitions["f1_2"].dimensions == [2, 3, 5, 6, 9, 10, 20]
+
+    partitions = partition_suite(suite_info, by="both")
+    assert "f1_02D" in partitions and "f2_02D" not in partitions
+    assert partitions["f3_01D"].function_infos[0].dims == [0]
+
+
+def test_run_cocopp_parallel():
+    _, suite_info = create_testbedsettings()
+    shutil.rmtree("test_exp_id", ignore_errors=True)
+    logger = setup_coco_logger("coco_logger_parallel", direct=True)
+    for dim_idx in [0, 1]:
+        for inst in [1, 2]:
+            events = generate_events(
+                num_evals=50,
+                suite=suite_info,
+                problem_idx=0,
+                dim_idx=dim_idx,
+                inst=inst,
+            )
+            for event in events:
+                logger.info(event)
+    teardown_coco_logger("coco_logger_parallel")
+    result_path = osp.join("test_exp_id", suite_info.name, "test_algo")
+
+    outputs = run_cocopp_parallel(
+        [result_path], suite_info, output_dir="ppdata", max_workers=2
+    )
+    # Partitions without results are skipped
+    assert outputs == {
+        "02D": osp.join("ppdata", "02D"),
+        "03D": osp.join("ppdata", "03D"),
+    }
+    for output in outputs.values():
+        assert osp.exists(osp.join(output, "index.html"))
+    with open(osp.join("ppdata", "index.html"), "r") as f:
+        index = f.read()
+    assert '<a href="02D/index.html">' in index and '<a href="03D/index.html">' in index
+
+    # The restricted .info files are removed after post-processing
+    assert sorted(os.listdir("ppdata")) == ["02D", "03D", "index.html"]
+
+    # The restricted .info files only list the runs of their dimension
+    partition = partition_suite(suite_info)["03D"]
+    assert filter_results(result_path, osp.join("test_dir", "test_algo"), partition)
+    info_path = osp.join("test_dir", "test_algo", "f1_i1.info")
+    with open(info_path, "r") as f:
+        lines = f.read().splitlines()
+    assert len(lines) == 3 and "DIM = 3," in lines[0]
+    assert lines[2].startswith(osp.abspath(result_path))
+
+    shutil.rmtree("ppdata", ignore_errors=True)
+    shutil.rmtree("test_exp_id", ignore_errors=True)
+    shutil.rmtree("test_dir", ignore_errors=True)
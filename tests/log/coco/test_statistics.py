@@ -0,0 +1,143 @@
+import shutil
+import numpy as np
+import pytest
+from ttex.log.coco import (
+    COCOEnd,
+    COCOEval,
+    COCOEvalBatch,
+    COCOStart,
+    COCOState,
+    RuntimeStatistics,
+)
+from ttex.log.coco.statistics import (
+    expected_running_time,
+    first_hits,
+    runtime_ecdf,
+    target_values,
+)
+from ttex.log.utils.coco_logging_setup import setup_coco_logger, teardown_coco_logger
+from tests.log.coco.postp.test_testbed import create_testbedsettings
+from tests.log.coco.test_coco_logging_integration import generate_events
+
+
+@pytest.fixture(scope="function", autouse=True)
+def cleanup_dummy_files():
+    for path in ["test_exp_id", "test_dir"]:
+        shutil.rmtree(path, ignore_errors=True)
+
+    yield
+
+    for path in ["test_exp_id", "test_dir"]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def test_target_values():
+    targets = target_values()
+    assert len(targets) == 51
+    assert targets[0] == 100 and np.isclose(targets[-1], 1e-8)
+    assert np.allclose(np.diff(np.log10(targets)), -0.2)
+    _, suite_info = create_testbedsettings()
+    stats = RuntimeStatistics.from_suite_info(suite_info)
+    assert np.array_equal(stats.targets, targets)
+
+
+def test_first_hits():
+    targets = np.array([10, 1, 0.1, 0.01])
+    hits = first_hits(np.array([1, 2, 5, 9]), np.array([20, 5, 1, 0.5]), targets)
+    assert hits.tolist() == [2, 5, np.inf, np.inf]
+    assert (
+        first_hits(np.array([], dtype=int), np.array([]), targets).tolist()
+        == [np.inf] * 4
+    )
+
+
+def test_expected_running_time():
+    hits = np.array([[10, 40, np.inf], [20, np.inf, np.inf]])
+    ert = expected_running_time(hits, np.array([100, 50]))
+    assert ert.tolist() == [15, 90, np.inf]
+    ecdf = runtime_ecdf(hits, np.array([1, 10, 20, 40, 1000]))
+    assert ecdf.tolist() == [0, 1 / 6, 2 / 6, 3 / 6, 3 / 6]
+
+
+def test_runtime_statistics_live_and_files():
+    _, suite_info = create_testbedsettings()
+    runs = [
+        generate_events(
+            num_evals=200, suite=suite_info, problem_idx=0, dim_idx=1, inst=inst
+        )
+        for inst in [1, 2, 3]
+    ]
+    live = RuntimeStatistics()
+    state = COCOState()
+    logger = setup_coco_logger("coco_logger_statistics", direct=True)
+    for events in runs:
+        for event in events:
+            logger.info(event)
+            state.update(event)
+            live.observe(state)
+        # Observing the ended run again does not add it twice
+        live.observe(state)
+    teardown_coco_logger("coco_logger_statistics")
+
+    files = RuntimeStatistics()
+    files.add_results("test_exp_id")
+    start = runs[0][0]
+    for stats in [live, files]:
+        hits, max_evals = stats.hits(start.problem, start.dim)
+        assert hits.shape == (3, len(stats.targets))
+        assert max_evals.tolist() == [200, 200, 200]
+    # The .dat files record the first hit of each target
+    assert np.isfinite(files.hits()[0]).any()
+    assert np.array_equal(live.hits()[0], files.hits()[0])
+    assert np.array_equal(
+        live.ert(start.problem, start.dim), files.ert(start.problem, start.dim)
+    )
+    budgets, ecdf = files.ecdf()
+    assert budgets[0] == 1 and np.isclose(budgets[-1], 200)
+    assert (np.diff(ecdf) >= 0).all() and ecdf[-1] > 0
+    assert files.hits(func=2)[0].shape == (0, len(files.targets))
+
+
+def test_runtime_statistics_live_batches():
+    params = {"algo": "a", "problem": 1, "dim": 2, "inst": 1}
+    params.update({"suite": "s", "exp_id": "e", "fopt": 0.0})
+    mf = np.geomspace(1e2, 1e-3, 50)
+    stats = RuntimeStatistics()
+    state = COCOState()
+    state.update(COCOStart(**params))
+    stats.observe(state)
+    for chunk in np.split(mf, 5):
+        state.update(COCOEvalBatch(x=np.zeros((len(chunk), 2)), mf=chunk))
+        stats.observe(state)
+    # The run is still live, its evaluations so far count as budget
+    hits, max_evals = stats.hits(1, 2)
+    assert max_evals.tolist() == [50]
+    expected = first_hits(np.arange(1, 51), mf, stats.targets)
+    assert np.array_equal(hits[0], expected)
+
+    # A new run on the same state ends the previous one
+    state.update(COCOStart(**params))
+    stats.observe(state)
+    assert stats.hits(1, 2)[1].tolist() == [50, 0]
+
+
+def test_runtime_statistics_live_run_keys():
+    params = {"algo": "a", "problem": 1, "dim": 2, "inst": 1}
+    params.update({"suite": "s", "exp_id": "e", "fopt": 0.0})
+    stats = RuntimeStatistics()
+    # Interleaved runs, each with a new state as in the splitter
+    for repeat in range(3):
+        states = {key: COCOState() for key in ["a", "b"]}
+        for key, state in states.items():
+            state.update(COCOStart(**params, run_key=key))
+            stats.observe(state)
+        for key, state in states.items():
+            state.update(COCOEval(x=[0.0, 0.0], mf=1.0, run_key=key))
+            stats.observe(state)
+            state.update(COCOEnd(run_key=key))
+            stats.observe(state)
+            stats.observe(state)
+        # Only the last ended run of each run key is remembered
+        assert set(stats._ended) == {"a", "b"}
+        assert not stats._live
+    assert stats.hits(1, 2)[1].tolist() == [1] * 6
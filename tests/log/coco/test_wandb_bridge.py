@@ -0,0 +1,115 @@
+import logging
+import shutil
+import pytest
+from ttex.log.coco import COCOWandbHandler
+from ttex.log.handler import WandbHandler
+from ttex.log.utils.coco_logging_setup import (
+    flush_coco_logger,
+    setup_coco_logger,
+    teardown_coco_logger,
+)
+from ttex.log.utils.wandb_logging_setup import setup_wandb_logger, teardown_wandb_logger
+from tests.log.coco.postp.test_testbed import create_testbedsettings
+from tests.log.coco.test_coco_logging_integration import generate_events
+
+
+class DummyRun:
+    def __init__(self):
+        self.logged = []
+
+    def log(self, data, step=None, commit=None):
+        self.logged.append(data)
+
+
+@pytest.fixture(scope="function", autouse=True)
+def cleanup_dummy_files():
+    for path in ["test_exp_id", "test_dir"]:
+        shutil.rmtree(path, ignore_errors=True)
+
+    yield
+
+    for path in ["test_exp_id", "test_dir"]:
+        shutil.rmtree(path, ignore_errors=True)
+
+
+def setup_loggers(name: str, max_log_rate: float, per_run: bool = False):
+    wandb_logger = setup_wandb_logger(name=f"{name}_wandb", snapshot=False)
+    run = DummyRun()
+    wandb_handler = wandb_logger.handlers[0]
+    assert isinstance(wandb_handler, WandbHandler)
+    wandb_handler.run = run
+    coco_logger = setup_coco_logger(
+        name,
+        wandb_logger_name=f"{name}_wandb",
+        wandb_max_log_rate=max_log_rate,
+    )
+    bridge = coco_logger.handlers[-1]
+    assert isinstance(bridge, COCOWandbHandler)
+    bridge.per_run = per_run
+    return coco_logger, bridge, run
+
+
+def teardown_loggers(name: str, wandb_handler_name: str):
+    teardown_coco_logger(name)
+    # The dummy run cannot be finished
+    logging.getLogger(wandb_handler_name).handlers[0]._run = None
+    teardown_wandb_logger(wandb_handler_name)
+
+
+def test_wandb_bridge_throttled():
+    _, suite_info = create_testbedsettings()
+    coco_logger, bridge, run = setup_loggers("coco_logger_bridge", 1e-6)
+    instances = [1, 2, 3]
+    for inst in instances:
+        for event in generate_events(100, suite_info, 0, 1, inst):
+            coco_logger.info(event)
+    # Nothing is logged before the interval passed
+    assert run.logged == []
+    assert bridge.runs_finished == 3
+    flush_coco_logger("coco_logger_bridge")
+    assert len(run.logged) == 1
+    metrics = run.logged[0]
+    assert metrics["coco/runs"] == 3 and metrics["coco/runs_finished"] == 3
+    assert metrics["coco/evaluations"] == 300
+    assert metrics["coco/targets_hit"] == bridge.targets_hit > 0
+    assert 0 <= metrics["coco/best_diff_opt"] <= 1
+    # Finished runs are dropped once logged
+    assert bridge.runs == {}
+    teardown_loggers("coco_logger_bridge", "coco_logger_bridge_wandb")
+    assert len(run.logged) == 1
+
+
+def test_wandb_bridge_live_per_run():
+    _, suite_info = create_testbedsettings()
+    coco_logger, bridge, run = setup_loggers("coco_logger_bridge2", 1e6, True)
+    events = generate_events(50, suite_info, 0, 1, 1)
+    for event in events[:-1]:
+        coco_logger.info(event)
+    # Logged while the run is still going
+    assert len(run.logged) > 1
+    metrics = run.logged[-1]
+    assert metrics["coco/runs_finished"] == 0
+    run_name = bridge.runs[None].name
+    assert run_name.endswith("_i1")
+    assert metrics[f"coco/{run_name}/f_evals"] == metrics["coco/evaluations"]
+    # Only logged if something changed
+    n_logs = len(run.logged)
+    bridge.flush()
+    assert len(run.logged) == n_logs
+    coco_logger.info(events[-1])
+    assert run.logged[-1]["coco/runs_finished"] == 1
+    assert run.logged[-1][f"coco/{run_name}/f_evals"] == 50
+    teardown_loggers("coco_logger_bridge2", "coco_logger_bridge2_wandb")
+
+
+def test_wandb_bridge_without_run():
+    _, suite_info = create_testbedsettings()
+    bridge = COCOWandbHandler(wandb_logger_name="no_wandb_logger", max_log_rate=1e6)
+    coco_logger = setup_coco_logger("coco_logger_bridge3")
+    coco_logger.addHandler(bridge)
+    for event in generate_events(20, suite_info, 0, 1, 1):
+        coco_logger.info(event)
+    # Changes are kept until a run is available
+    assert bridge.metrics()["coco/runs_finished"] == 1
+    assert len(bridge.runs) == 1
+    teardown_coco_logger("coco_logger_bridge3")
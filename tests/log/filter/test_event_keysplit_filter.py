@@ -126,3 +126,63 @@ def test_log_event_c():
     assert isinstance(filter.state, DummyLoggingState)
     assert filter.state.counts_a == 0
     assert filter.state.counts_b == 0
+
+
+class DummyRunEvent(DummyLogEventA):
+    def __init__(self, a: int, run_key=None, last: bool = False):
+        super().__init__(a)
+        self.run_key = run_key
+        self.last = last
+
+
+class DummyRunState(DummyLoggingState):
+    def __init__(self):
+        super().__init__()
+        self.done = False
+
+    def update(self, event: LogEvent) -> None:
+        super().update(event)
+        self.done = getattr(event, "last", False)
+
+    @property
+    def finished(self) -> bool:
+        return self.done
+
+
+class DummyRunKeySplitter(DummyKeySplitter):
+    def init_logging_state(self) -> DummyRunState:
+        return DummyRunState()
+
+
+def test_run_keys():
+    """
+    Test that events of different runs are tracked in separate states.
+    """
+    filter = EventKeysplitFilter(key_splitter_cls="monkey_patch.DummyRunKeySplitter")
+    records = [
+        makeLogRecord({"msg": DummyRunEvent(a=1, run_key=run_key)})
+        for run_key in ["run1", "run2", "run1", None, ("run", 3)]
+    ]
+    for record in records:
+        assert filter.filter(record) is True
+    assert [record.run_key for record in records] == [
+        "run1",
+        "run2",
+        "run1",
+        None,
+        ("run", 3),
+    ]
+    assert [record.event_a.val for record in records] == [1, 1, 2, 1, 1]
+    assert filter.state.counts_a == 1
+    assert set(filter.states.keys()) == {"run1", "run2", ("run", 3)}
+    assert filter.get_state("run1").counts_a == 2
+
+    # Finished runs are discarded
+    record = makeLogRecord({"msg": DummyRunEvent(a=1, run_key="run1", last=True)})
+    assert filter.filter(record) is True
+    assert record.event_a.val == 3
+    assert set(filter.states.keys()) == {"run2", ("run", 3)}
+    # A new run with the same key starts from scratch
+    record = makeLogRecord({"msg": DummyRunEvent(a=1, run_key="run1")})
+    assert filter.filter(record) is True
+    assert record.event_a.val == 1
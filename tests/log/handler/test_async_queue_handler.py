@@ -0,0 +1,98 @@
+import logging
+import threading
+import pytest
+from ttex.log.handler import AsyncQueueHandler
+
+
+class CollectingHandler(logging.Handler):
+    def __init__(self, gate: threading.Event):
+        super().__init__()
+        self.gate = gate
+        self.messages = []
+        self.threads = set()
+        self.flushed = 0
+        self.closed = False
+
+    def emit(self, record):
+        self.gate.wait()
+        self.messages.append(self.format(record))
+        self.threads.add(threading.current_thread().name)
+
+    def flush(self):
+        self.flushed += 1
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+def setup_logger(name: str, handler: AsyncQueueHandler) -> logging.Logger:
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.addHandler(handler)
+    return logger
+
+
+def test_async_queue_handler():
+    gate = threading.Event()
+    gate.set()
+    target = CollectingHandler(gate)
+    handler = AsyncQueueHandler([target], max_queue_size=5)
+    assert handler.running
+    logger = setup_logger("test_async_queue_handler", handler)
+
+    for i in range(100):
+        logger.info("msg %d", i)
+    handler.flush()
+    assert target.messages == [f"msg {i}" for i in range(100)]
+    assert target.flushed == 1
+    # Handled in the background thread
+    assert threading.current_thread().name not in target.threads
+
+    logger.info("last")
+    logger.removeHandler(handler)
+    handler.close()
+    assert not handler.running
+    assert target.messages[-1] == "last"
+    assert target.closed
+    # Closing twice is fine
+    handler.close()
+
+
+def test_async_queue_handler_unformatted():
+    """
+    Records are passed on as is, formatting happens in the wrapped handlers.
+    """
+    gate = threading.Event()
+    gate.set()
+    target = CollectingHandler(gate)
+    target.setFormatter(logging.Formatter("%(levelname)s %(message)s"))
+    handler = AsyncQueueHandler([target])
+    logger = setup_logger("test_async_queue_handler_unformatted", handler)
+    logger.warning({"a": 1})
+    logger.removeHandler(handler)
+    handler.close()
+    assert target.messages == ["WARNING {'a': 1}"]
+
+
+def test_async_queue_handler_backpressure():
+    gate = threading.Event()
+    target = CollectingHandler(gate)
+    handler = AsyncQueueHandler([target], max_queue_size=2, timeout=0.05)
+    logger = setup_logger("test_async_queue_handler_backpressure", handler)
+
+    errors = []
+    handler.handleError = lambda record: errors.append(record)  # type: ignore
+    # One record is blocked in the writer, two are queued, the rest time out
+    for i in range(5):
+        logger.info("msg %d", i)
+    assert len(errors) >= 2
+    gate.set()
+    logger.removeHandler(handler)
+    handler.close()
+    assert len(target.messages) + len(errors) == 5
+    assert target.messages == [f"msg {i}" for i in range(len(target.messages))]
+
+    with pytest.raises(AssertionError):
+        AsyncQueueHandler([target], max_queue_size=0)
@@ -183,3 +183,227 @@ def test_emit():
         content = f.read()
         assert "DummyRecord(val=100)" in content
         assert "DummyHeader(val=2.71)" in content
+
+
+def read_file(filepath: str) -> str:
+    if not osp.exists(filepath):
+        return ""
+    with open(filepath, "r") as f:
+        return f.read()
+
+
+def test_emit_buffered_lines():
+    """
+    In buffered mode, lines are only written once the line threshold is reached,
+    on rollover and on close.
+    """
+    filepath = osp.join("test_dir", "test_file_buffered.txt")
+    handler = ManualRotatingFileHandler(filepath=filepath, mode="a", buffer_lines=3)
+    assert handler.buffered
+    logger = logging.getLogger("test_emit_buffered_lines")
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+
+    filepath_1 = osp.join("test_dir", "buffered_header_file1.txt")
+    logger.info(DummyHeader(3.14, filepath=filepath_1))
+    logger.info(DummyRecord(1))
+    assert read_file(filepath) == ""
+    logger.info(DummyRecord(2))
+    # Threshold reached, all three lines written at once
+    assert read_file(filepath).splitlines() == [
+        "DummyHeader(val=3.14)",
+        "DummyRecord(val=1)",
+        "DummyRecord(val=2)",
+    ]
+    logger.info(DummyRecord(3))
+    assert "DummyRecord(val=3)" not in read_file(filepath)
+
+    # Rollover writes the remaining lines to the previous file
+    filepath_2 = osp.join("test_dir", "buffered_header_file2.txt")
+    logger.info(DummyHeader(2.71, filepath=filepath_2))
+    assert read_file(filepath_1).splitlines()[-1] == "DummyRecord(val=3)"
+    logger.info(DummyRecord(4))
+    assert not osp.exists(filepath_2)
+
+    logger.removeHandler(handler)
+    handler.close()
+    assert read_file(filepath_2).splitlines() == [
+        "DummyHeader(val=2.71)",
+        "DummyRecord(val=4)",
+    ]
+    assert not osp.exists(filepath)
+
+
+def test_emit_buffered_bytes():
+    filepath = osp.join("test_dir", "test_file_buffered_bytes.txt")
+    # Each DummyRecord line is 19 characters including the newline
+    handler = ManualRotatingFileHandler(filepath=filepath, mode="a", buffer_bytes=50)
+    logger = logging.getLogger("test_emit_buffered_bytes")
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+
+    filepath_1 = osp.join("test_dir", "buffered_bytes_header_file1.txt")
+    logger.info(DummyHeader(3.14, filepath=filepath_1))  # 22 characters
+    logger.info(DummyRecord(1))
+    assert read_file(filepath) == ""
+    logger.info(DummyRecord(2))
+    assert len(read_file(filepath).splitlines()) == 3
+
+    logger.info(DummyRecord(3))
+    handler.flush()
+    assert read_file(filepath).splitlines()[-1] == "DummyRecord(val=3)"
+
+    logger.removeHandler(handler)
+    handler.close()
+    assert len(read_file(filepath_1).splitlines()) == 4
+
+
+@pytest.mark.parametrize("buffer_lines", [0, 2])
+def test_emit_direct(buffer_lines):
+    """
+    In direct mode, records are written to the file of their header
+    without staging file, switching back and forth between files.
+    """
+    filepath = osp.join("test_dir", "test_file_direct.txt")
+    handler = ManualRotatingFileHandler(
+        filepath=filepath,
+        mode="a",
+        buffer_lines=buffer_lines,
+        direct=True,
+        max_open_files=2,
+    )
+    logger = logging.getLogger(f"test_emit_direct_{buffer_lines}")
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+
+    filepaths = [
+        osp.join("test_dir", f"direct_{buffer_lines}", f"header_file{i}.txt")
+        for i in range(3)
+    ]
+    for i, header_filepath in enumerate(filepaths):
+        logger.info(DummyHeader(i, filepath=header_filepath))
+        logger.info(DummyRecord(i))
+    assert len(handler._streams) == 2
+    # Switch back to an evicted file, which is appended to
+    logger.info(DummyHeader(0, filepath=filepaths[0]))
+    logger.info(DummyRecord(3))
+    logger.info(DummyHeader(2, filepath=filepaths[2]))
+    logger.info(DummyRecord(4))
+    handler.flush()
+    assert read_file(filepaths[2]).splitlines() == [
+        "DummyHeader(val=2)",
+        "DummyRecord(val=2)",
+        "DummyHeader(val=2)",
+        "DummyRecord(val=4)",
+    ]
+
+    logger.removeHandler(handler)
+    handler.close()
+    assert len(handler._streams) == 0
+    assert read_file(filepaths[0]).splitlines() == [
+        "DummyHeader(val=0)",
+        "DummyRecord(val=0)",
+        "DummyHeader(val=0)",
+        "DummyRecord(val=3)",
+    ]
+    assert read_file(filepaths[1]).splitlines() == [
+        "DummyHeader(val=1)",
+        "DummyRecord(val=1)",
+    ]
+    assert not osp.exists(filepath)
+
+
+def test_emit_direct_truncate():
+    """
+    Files are replaced by a new handler, as with rotation.
+    """
+    header_filepath = osp.join("test_dir", "direct_truncate.txt")
+    for val in [1, 2]:
+        handler = ManualRotatingFileHandler(
+            filepath=osp.join("test_dir", "test_file_direct.txt"), direct=True
+        )
+        logger = logging.getLogger("test_emit_direct_truncate")
+        logger.setLevel(logging.DEBUG)
+        logger.addHandler(handler)
+        logger.info(DummyHeader(val, filepath=header_filepath))
+        logger.removeHandler(handler)
+        handler.close()
+    assert read_file(header_filepath) == "DummyHeader(val=2)\n"
+
+    with pytest.raises(AssertionError):
+        ManualRotatingFileHandler(
+            filepath=osp.join("test_dir", "test_file_direct.txt"),
+            direct=True,
+            max_open_files=0,
+        )
+
+
+def make_run_record(record_obj, run_key) -> logging.LogRecord:
+    record = logging.makeLogRecord({"msg": str(record_obj)})
+    record.msg = record_obj
+    record.run_key = run_key
+    return record
+
+
+def test_emit_direct_run_keys():
+    """
+    In direct mode, records of interleaved runs are written to the file of their run.
+    """
+    handler = ManualRotatingFileHandler(
+        filepath=osp.join("test_dir", "test_file_runs.txt"), direct=True
+    )
+    filepaths = {
+        run_key: osp.join("test_dir", "runs", f"{run_key}.txt")
+        for run_key in ["a", "b"]
+    }
+    for run_key, filepath in filepaths.items():
+        handler.handle(make_run_record(DummyHeader(0, filepath=filepath), run_key))
+    for val in range(4):
+        run_key = "a" if val % 2 == 0 else "b"
+        handler.handle(make_run_record(DummyRecord(val), run_key))
+    with pytest.raises(AssertionError):
+        # Unknown run without header
+        handler.shouldRollover(make_run_record(DummyRecord(0), "c"))
+    handler.close()
+    assert read_file(filepaths["a"]).splitlines() == [
+        "DummyHeader(val=0)",
+        "DummyRecord(val=0)",
+        "DummyRecord(val=2)",
+    ]
+    assert read_file(filepaths["b"]).splitlines() == [
+        "DummyHeader(val=0)",
+        "DummyRecord(val=1)",
+        "DummyRecord(val=3)",
+    ]
+
+
+def test_interleaved_run_keys_staging():
+    """
+    Interleaved runs cannot be written through the staging file.
+    """
+    handler = ManualRotatingFileHandler(
+        filepath=osp.join("test_dir", "test_file_runs_staging.txt")
+    )
+    header_a = DummyHeader(0, filepath=osp.join("test_dir", "staging_run_a.txt"))
+    header_b = DummyHeader(0, filepath=osp.join("test_dir", "staging_run_b.txt"))
+    assert not handler.shouldRollover(make_run_record(header_a, "a"))
+    assert not handler.shouldRollover(make_run_record(DummyRecord(0), "a"))
+    # Consecutive runs are fine
+    assert handler.shouldRollover(make_run_record(header_b, "b"))
+    handler.doRollover()
+    with pytest.raises(AssertionError):
+        handler.shouldRollover(make_run_record(DummyRecord(1), "a"))
+    handler.close()
+
+
+@pytest.mark.parametrize("direct", [False, True])
+def test_root_dir(direct):
+    root_dir = osp.join("test_dir", f"root_{direct}")
+    handler = ManualRotatingFileHandler(
+        filepath=osp.join(root_dir, "staging.txt"), direct=direct, root_dir=root_dir
+    )
+    assert handler.output_path("header.txt") == osp.join(root_dir, "header.txt")
+    handler.handle(make_run_record(DummyHeader(1, filepath="header.txt"), None))
+    handler.close()
+    assert read_file(osp.join(root_dir, "header.txt")) == "DummyHeader(val=1)\n"
+    assert not osp.exists("header.txt")
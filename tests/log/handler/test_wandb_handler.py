@@ -1,5 +1,8 @@
+import json
 import logging
-from ttex.log.handler import WandbHandler
+from ttex.log import LOGGER_NAME, SnapshotStore
+from ttex.log.handler import ArtifactStaging, WandbHandler
+import time
 import os
 import shutil
 from importlib.metadata import version
@@ -7,6 +10,7 @@ from typing import Dict, Optional
 from wandb.sdk import launch
 import wandb
 import pytest
+import numpy as np
 import os.path as osp
 
 
@@ -169,6 +173,280 @@ def test_with_non_dict():
     logger.warning("i encountered an error")
 
 
+class DummyRun:
+    """Stand-in for a wandb run that records the calls to log"""
+
+    id = "dummy"
+    url = "dummy_url"
+
+    def __init__(self):
+        self.calls = []
+        self.finished = False
+
+    def define_metric(self, *args, **kwargs):
+        pass
+
+    def log(self, data, step=None, commit=None):
+        self.calls.append((data, step, commit))
+
+    def alert(self, **kwargs):
+        pass
+
+    def finish(self):
+        self.finished = True
+
+
+def batched_logger(name: str, **kwargs):
+    handler = WandbHandler(snapshot=False, **kwargs)
+    run = DummyRun()
+    handler.run = run
+    logger = logging.getLogger(name)
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.addHandler(handler)
+    return logger, handler, run
+
+
+def test_batched_implicit_steps():
+    logger, handler, run = batched_logger("test_wandb_batched", batch_size=100)
+    for step in range(10):
+        logger.info({"a": step}, extra={"commit": False})
+        logger.info({"b": step})
+    assert run.calls == []
+    handler.close()
+    logger.removeHandler(handler)
+    # One committed call per step, flushed on close before finishing
+    assert run.calls == [({"a": i, "b": i}, None, True) for i in range(10)]
+    assert run.finished
+
+
+def test_batched_explicit_steps():
+    logger, handler, run = batched_logger("test_wandb_batched2", batch_size=6)
+    for step in range(3):
+        logger.info({"a": step}, extra={"step": step})
+        logger.info({"b": step}, extra={"step": step})
+    # The last step might still get more records
+    assert run.calls == [
+        ({"a": 0, "b": 0}, 0, True),
+        ({"a": 1, "b": 1}, 1, True),
+        ({"a": 2, "b": 2}, 2, False),
+    ]
+    logger.info({"c": 2}, extra={"step": 2, "commit": True})
+    logger.info({"a": 3}, extra={"step": 3})
+    handler.flush()
+    assert run.calls[3:] == [({"c": 2}, 2, True), ({"a": 3}, 3, False)]
+    handler.close()
+    logger.removeHandler(handler)
+
+
+def test_batched_interval():
+    logger, handler, run = batched_logger(
+        "test_wandb_batched3", batch_size=100, batch_interval=0
+    )
+    for step in range(3):
+        logger.info({"a": step})
+    assert run.calls == [({"a": i}, None, True) for i in range(3)]
+    handler.close()
+    logger.removeHandler(handler)
+
+
+def test_structured_metrics():
+    logger, handler, run = batched_logger("test_wandb_structured")
+    values = np.arange(5.0)
+    logger.info({"array": values, "scalar": np.float32(1.5), "count": np.int64(3)})
+    logger.info("metrics", {"loss": np.float64(0.5)})
+    logger.info(str({"legacy": 1}))
+    logger.info("not a dict")
+    logger.info("{not a dict")
+    assert len(run.calls) == 3
+    data = run.calls[0][0]
+    # Values are passed on as they are
+    assert data["array"] is values
+    assert isinstance(data["scalar"], np.float32)
+    assert run.calls[1][0] == {"loss": 0.5}
+    assert run.calls[2][0] == {"legacy": 1}
+    handler.close()
+    logger.removeHandler(handler)
+
+
+class SlowArtifactRun(DummyRun):
+    """Stand-in run that takes a while to log an artifact"""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+        self.artifacts = []
+
+    def log_artifact(self, artifact):
+        time.sleep(self.delay)
+        self.artifacts.append(artifact)
+
+    def finish(self):
+        self.artifacts_at_finish = len(self.artifacts)
+        super().finish()
+
+
+def test_async_artifacts(caplog):
+    folder = osp.join("/tmp", "async_art_test")
+    os.makedirs(folder, exist_ok=True)
+    with open(osp.join(folder, "file.txt"), "w") as f:
+        f.write("content")
+    handler = WandbHandler(snapshot=False)
+    run = SlowArtifactRun(delay=0.2)
+    handler.run = run
+    start = time.perf_counter()
+    futures = [handler.log_artifact(f"art{i}", folder) for i in range(2)]
+    # Returns before the artifacts are logged
+    assert time.perf_counter() - start < 0.2
+    handler.close()
+    assert all(future.done() for future in futures)
+    assert sorted(a.name for a in run.artifacts) == ["art0_dummy", "art1_dummy"]
+    assert run.finished
+    assert handler.log_artifact("art", folder) is None
+
+    # After the timeout, queued artifacts are cancelled and the running one finishes
+    handler = WandbHandler(snapshot=False, close_timeout=0.3, artifact_workers=1)
+    run = SlowArtifactRun(delay=0.5)
+    handler.run = run
+    futures = [handler.log_artifact(f"art{i}", folder) for i in range(3)]
+    start = time.perf_counter()
+    with caplog.at_level(logging.WARNING, logger=LOGGER_NAME):
+        handler.close()
+    assert time.perf_counter() - start < 1.0
+    assert futures[0].done() and not futures[0].cancelled()
+    assert all(future.cancelled() for future in futures[1:])
+    assert "cancelled: art1, art2" in caplog.text
+    assert "running uploads" in caplog.text and "art0" in caplog.text
+    # The running upload was logged before the run was finished
+    assert [a.name for a in run.artifacts] == ["art0_dummy"]
+    assert run.finished and run.artifacts_at_finish == 1
+
+    # A hung upload does not block the close
+    caplog.clear()
+    handler = WandbHandler(snapshot=False, close_timeout=0.1)
+    run = SlowArtifactRun(delay=2)
+    handler.run = run
+    future = handler.log_artifact("hung", folder)
+    start = time.perf_counter()
+    with caplog.at_level(logging.WARNING, logger=LOGGER_NAME):
+        handler.close()
+    assert time.perf_counter() - start < 1.0
+    assert run.finished and run.artifacts_at_finish == 0
+    assert not future.done()
+    assert "still running" in caplog.text and "hung" in caplog.text
+    future.result()
+    shutil.rmtree(folder, ignore_errors=True)
+
+
+def test_artifact_staging():
+    folder = osp.join("/tmp", "staging_art_test")
+    staging_dir = osp.join("/tmp", "staging_test")
+    for sub in ["a", "b"]:
+        os.makedirs(osp.join(folder, sub), exist_ok=True)
+        for i in range(3):
+            with open(osp.join(folder, sub, f"{i}.txt"), "w") as f:
+                f.write(f"content {i}")
+    staging = ArtifactStaging(staging_dir)
+    run = DummyRun()
+    run.log_artifact = lambda artifact: None
+    artifact = WandbHandler.create_wandb_artifact(
+        run=run, artifact_name="art", local_path=folder, staging=staging
+    )
+    assert artifact is not None
+    names = sorted(entry.path for entry in artifact.manifest.entries.values())
+    assert names == [
+        osp.join("art_dummy", sub, f"{i}.txt") for sub in ["a", "b"] for i in range(3)
+    ]
+    # Identical files are staged once
+    objects = [f for _, _, files in os.walk(staging.objects_dir) for f in files]
+    assert len(objects) == 3
+    unstaged = wandb.Artifact(name="unstaged", type="evaluation")
+    unstaged.add_dir(folder, name="art_dummy")
+    assert sorted(e.digest for e in artifact.manifest.entries.values()) == sorted(
+        e.digest for e in unstaged.manifest.entries.values()
+    )
+
+    # Unchanged files are not hashed again, also by a new staging
+    staging = ArtifactStaging(staging_dir)
+    path = osp.join(folder, "a", "0.txt")
+    assert osp.abspath(path) in staging._hashes
+    staging._hashes[osp.abspath(path)][2] = "cached"
+    assert staging.file_hash(path) == "cached"
+    with open(path, "w") as f:
+        f.write("changed content")
+    assert staging.file_hash(path) != "cached"
+    shutil.rmtree(folder, ignore_errors=True)
+    shutil.rmtree(staging_dir, ignore_errors=True)
+
+
+def test_artifact_staging_cleanup(tmp_path):
+    folder = tmp_path / "art"
+    os.makedirs(folder)
+    for i in range(4):
+        with open(folder / f"{i}.txt", "w") as f:
+            f.write(f"content {i}" * 100)
+    staging_dir = str(tmp_path / "staging")
+
+    def objects():
+        return sorted(
+            osp.join(root, f) for root, _, files in os.walk(staging_dir) for f in files
+        )
+
+    handler = WandbHandler(snapshot=False, staging_dir=staging_dir)
+    handler.run = DummyRun()
+    handler.run.log_artifact = lambda artifact: None
+    handler.log_artifact("art", str(folder))
+    handler.close()
+    # Within max_bytes, nothing is evicted
+    staged = [path for path in objects() if "objects" in path]
+    assert len(staged) == 4
+
+    staging = ArtifactStaging(staging_dir, max_bytes=2500, min_age=10)
+    assert staging.cleanup() == 0  # Recently used objects are kept
+    for age, path in enumerate(staged):
+        os.utime(path, (time.time() - 100 * (age + 1),) * 2)
+    # The least recently used objects are evicted until the store fits
+    assert staging.cleanup() == 2
+    assert [path for path in objects() if "objects" in path] == staged[:2]
+    # Hashes of deleted files are forgotten
+    os.remove(folder / "0.txt")
+    staging.cleanup()
+    with open(osp.join(staging_dir, ArtifactStaging.INDEX_FILE), "r") as f:
+        assert len(json.load(f)) == 3
+
+
+def test_differential_snapshot(tmp_path):
+    snapshot_dir = str(tmp_path / "snapshots")
+    cache_dir = str(tmp_path / "cache")
+    artifacts = []
+    for run_id in ["first", "second"]:
+        run = DummyRun()
+        run.id = run_id
+        run.log_artifact = artifacts.append
+        handler = WandbHandler(
+            snapshot=True, snapshot_dir=snapshot_dir, snapshot_cache_dir=cache_dir
+        )
+        handler.run = run
+        handler.close()
+        assert run.finished
+    # Only the first run uploads the base
+    assert [artifact.name for artifact in artifacts] == [
+        "system_snapshot_base_first",
+        "system_snapshot_first",
+        "system_snapshot_second",
+    ]
+    store = SnapshotStore(snapshot_dir)
+    for run_id in ["first", "second"]:
+        with open(f"snapshot_{run_id}.json", "r") as f:
+            diff = json.load(f)
+        assert diff["base"] == "system_snapshot_base_first"
+        assert set(store.reconstruct(diff)) == set(diff["hashes"])
+        os.remove(f"snapshot_{run_id}.json")
+    assert "apt_packages" not in diff["sections"]
+    # The static sections of the second snapshot came from the cache
+    assert len(os.listdir(cache_dir)) == 1
+
+
 if __name__ == "__main__":
     # This is to test launch from wandb
     if not os.environ.get("WANDB_CONFIG", None):
@@ -0,0 +1,224 @@
+import os
+import os.path as osp
+import shutil
+import numpy as np
+import pytest
+import wandb
+from ttex.__main__ import main
+from ttex.log.handler import SpoolRun, WandbHandler, read_spool, sync_spool
+from ttex.log.handler.wandb_spool import SYNC_PROGRESS, SYNCED_MARKER
+from ttex.log.utils.wandb_logging_setup import (
+    log_wandb_artifact,
+    log_wandb_init,
+    setup_wandb_logger,
+    teardown_wandb_logger,
+)
+
+SPOOL_DIR = "test_spool"
+
+
+class ReplayRun:
+    """Stand-in for the wandb run a spool is synced to"""
+
+    def __init__(self, run_id, config=None, project=None, group=None):
+        self.id = run_id
+        self.init = (config, project, group)
+        self.calls = []
+        self.artifacts = []
+
+    def define_metric(self, name, step_metric=None):
+        self.calls.append(("define_metric", name, step_metric))
+
+    def log(self, data, step=None, commit=None):
+        self.calls.append(("log", data, step, commit))
+
+    def log_artifact(self, artifact):
+        self.artifacts.append(artifact)
+
+    def alert(self, title, text, level=None):
+        self.calls.append(("alert", title))
+
+    def finish(self):
+        self.calls.append(("finish",))
+
+
+@pytest.fixture(autouse=True)
+def online_mode_env_var():
+    if not os.environ.get("WANDB_CONFIG", None):
+        prev_mode = os.environ.get("WANDB_MODE", "online")
+        os.environ["WANDB_MODE"] = "offline"
+    yield
+    if not os.environ.get("WANDB_CONFIG", None):
+        os.environ["WANDB_MODE"] = prev_mode
+
+
+@pytest.fixture(autouse=True)
+def cleanup_spool():
+    shutil.rmtree(SPOOL_DIR, ignore_errors=True)
+    yield
+    shutil.rmtree(SPOOL_DIR, ignore_errors=True)
+    shutil.rmtree("wandb", ignore_errors=True)
+
+
+def replay(spool_dir: str, **kwargs):
+    runs = []
+
+    def init_run(run_id, config, project, group):
+        runs.append(ReplayRun(run_id, config, project, group))
+        return runs[-1]
+
+    return sync_spool(spool_dir, init_run=init_run, **kwargs), runs
+
+
+def test_spool_and_sync():
+    wandb_logger = setup_wandb_logger(
+        name="wandb_spool_logger",
+        custom_metrics={"env/step": ["env/*"]},
+        snapshot=False,
+        project="ci-cd",
+        spool_dir=SPOOL_DIR,
+    )
+    run = log_wandb_init({"param": 1}, logger_name="wandb_spool_logger")
+    assert isinstance(run, SpoolRun)
+    values = np.arange(3, dtype=np.float32)
+    for step in range(3):
+        wandb_logger.info({"env/r": np.float64(step), "env/x": values + step})
+    wandb_logger.info({"loss": 0.5}, extra={"step": 7, "commit": True})
+    with open("test_spool_artifact.txt", "w") as f:
+        f.write("artifact")
+    assert (
+        log_wandb_artifact("wandb_spool_logger", "art", "test_spool_artifact.txt")
+        is None
+    )
+    teardown_wandb_logger("wandb_spool_logger")
+
+    synced, runs = replay(SPOOL_DIR)
+    assert synced == [run.id] and len(runs) == 1
+    replayed = runs[0]
+    assert replayed.id == run.id
+    assert replayed.init == ({"param": 1}, "ci-cd", None)
+    assert replayed.calls[:2] == [
+        ("define_metric", "env/step", None),
+        ("define_metric", "env/*", "env/step"),
+    ]
+    logs = [call for call in replayed.calls if call[0] == "log"]
+    assert len(logs) == 4
+    assert logs[1][1]["env/r"] == 1.0
+    assert logs[1][1]["env/x"].dtype == np.float32
+    assert np.array_equal(logs[1][1]["env/x"], values + 1)
+    assert logs[3][1:] == ({"loss": 0.5}, 7, True)
+    assert [artifact.name for artifact in replayed.artifacts] == [f"art_{run.id}"]
+    assert replayed.calls[-2][0] == "alert" and replayed.calls[-1] == ("finish",)
+
+    # Synced runs are skipped
+    assert replay(SPOOL_DIR)[0] == []
+    os.remove("test_spool_artifact.txt")
+
+
+def test_spool_rotation_and_crash():
+    run = SpoolRun(SPOOL_DIR, config={}, max_bytes=200)
+    for step in range(20):
+        run.log({"value": step})
+    assert len(os.listdir(run.dir)) > 5
+    # An unfinished run is only synced on request
+    assert replay(SPOOL_DIR)[0] == []
+    # A partially written line, e.g. from a killed process
+    last_file = sorted(os.listdir(run.dir))[-1]
+    with open(osp.join(run.dir, last_file), "a") as f:
+        f.write('{"type": "log", "da')
+    entries = list(read_spool(run.dir))
+    assert [entry["data"]["value"] for entry in entries[1:]] == list(range(20))
+    synced, runs = replay(SPOOL_DIR, include_unfinished=True)
+    assert synced == [run.id]
+    assert len(runs[0].calls) == 21 and runs[0].calls[-1] == ("finish",)
+    assert osp.exists(osp.join(run.dir, SYNCED_MARKER))
+
+
+def test_sync_command(capsys):
+    handler = WandbHandler(snapshot=False, spool_dir=SPOOL_DIR)
+    handler.run = WandbHandler.wandb_init({"param": 2}, spool_dir=SPOOL_DIR)
+    handler.run.log({"value": 1})
+    handler.close()
+    main(["sync", SPOOL_DIR])
+    assert "Synced 1 run(s)" in capsys.readouterr().out
+    # The offline wandb run was created with the spooled id
+    run_dirs = [d for d in os.listdir("wandb") if d.startswith("offline-run")]
+    assert any(d.endswith(os.listdir(SPOOL_DIR)[0]) for d in run_dirs)
+
+
+def test_spool_media():
+    run = SpoolRun(SPOOL_DIR, config={})
+    image = wandb.Image(np.zeros((4, 4, 3), dtype=np.uint8), caption="zeros")
+    histogram = wandb.Histogram(np.arange(10))
+    table = wandb.Table(columns=["step", "image"], data=[[1, image]])
+    run.log({"image": image, "histogram": histogram, "table": table})
+    # Other media would be stringified, so they are rejected
+    with pytest.raises(TypeError):
+        run.log({"html": wandb.Html("<p>spooled</p>")})
+    run.finish()
+    data = list(read_spool(run.dir))[1]["data"]
+    assert isinstance(data["image"], wandb.Image)
+    assert data["image"]._caption == "zeros"
+    assert osp.dirname(data["image"]._path) != osp.dirname(image._path)
+    assert data["histogram"].bins == histogram.bins
+    assert data["histogram"].histogram == histogram.histogram
+    assert data["table"].columns == ["step", "image"]
+    assert isinstance(data["table"].data[0][1], wandb.Image)
+
+
+def test_spool_array_likes():
+    class Tensor:
+        """Stand-in for a tensor, converted by numpy"""
+
+        def __init__(self, values):
+            self.values = np.asarray(values, dtype=np.float32)
+
+        def __array__(self, dtype=None, copy=None):
+            return self.values
+
+    class Scalar:
+        def item(self):
+            return 1.5
+
+    run = SpoolRun(SPOOL_DIR, config={})
+    run.log({"tensor": Tensor([1, 2]), "loss": Tensor(0.5), "scalar": Scalar()})
+    # Anything else fails when it is spooled, not after the run
+    with pytest.raises(TypeError):
+        run.log({"object": object()})
+    run.finish()
+    data = list(read_spool(run.dir))[1]["data"]
+    assert data["tensor"].dtype == np.float32
+    assert data["tensor"].tolist() == [1.0, 2.0]
+    assert data["loss"] == 0.5 and data["scalar"] == 1.5
+
+
+def test_sync_resumes_after_interruption():
+    run = SpoolRun(SPOOL_DIR, config={})
+    run.define_metric("value")
+    for step in range(10):
+        run.log({"value": step})
+    run.finish()
+
+    class InterruptedRun(ReplayRun):
+        def log(self, data, step=None, commit=None):
+            if data["value"] == 6:
+                raise ConnectionError("Connection lost")
+            super().log(data, step=step, commit=commit)
+
+    runs = []
+
+    def init_interrupted(run_id, config, project, group):
+        runs.append(InterruptedRun(run_id, config, project, group))
+        return runs[-1]
+
+    with pytest.raises(ConnectionError):
+        sync_spool(SPOOL_DIR, init_run=init_interrupted)
+    assert not osp.exists(osp.join(run.dir, SYNCED_MARKER))
+    synced, resumed = replay(SPOOL_DIR)
+    assert synced == [run.id]
+    calls = runs[0].calls + resumed[0].calls
+    logs = [call[1]["value"] for call in calls if call[0] == "log"]
+    assert logs == list(range(10))
+    # Metric definitions are repeated for the resumed run
+    assert resumed[0].calls[0] == ("define_metric", "value", None)
+    assert not osp.exists(osp.join(run.dir, SYNC_PROGRESS))
@@ -1,4 +1,8 @@
-from ttex.log.utils.coco_logging_setup import setup_coco_logger, teardown_coco_logger
+from ttex.log.utils.coco_logging_setup import (
+    flush_coco_logger,
+    setup_coco_logger,
+    teardown_coco_logger,
+)
 
 
 def test_setup_teardown_coco_logger():
@@ -52,3 +56,32 @@ def test_setup_teardown_coco_logger():
     assert len(logger.filters) == 1  # Filters should be re-initialized
     assert logger._coco_setup is True  # Setup flag should be set again
     logger.info("This is a test log message after re-setup.")
+
+
+def test_setup_coco_logger_buffered():
+    logger = setup_coco_logger(
+        name="test_coco_logger_buffered", buffer_lines=100, buffer_bytes=4096
+    )
+    for handler in logger.handlers:
+        assert handler.buffer_lines == 100
+        assert handler.buffer_bytes == 4096
+    teardown_coco_logger(name="test_coco_logger_buffered")
+
+
+def test_setup_coco_logger_asynchronous():
+    from ttex.log.handler import AsyncQueueHandler, ManualRotatingFileHandler
+
+    logger = setup_coco_logger(
+        name="test_coco_logger_async", asynchronous=True, max_queue_size=10
+    )
+    assert len(logger.handlers) == 1
+    handler = logger.handlers[0]
+    assert isinstance(handler, AsyncQueueHandler)
+    assert handler.queue.maxsize == 10
+    assert len(handler.handlers) == 3
+    for inner_handler in handler.handlers:
+        assert isinstance(inner_handler, ManualRotatingFileHandler)
+    flush_coco_logger(name="test_coco_logger_async")
+    teardown_coco_logger(name="test_coco_logger_async")
+    assert len(logger.handlers) == 0
+    assert not handler.running
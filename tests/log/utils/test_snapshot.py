@@ -1,5 +1,8 @@
 from ttex.log import capture_snapshot
+from ttex.log.utils import system_snapshot
 import os
+import subprocess
+import sys
 
 
 def test_capture_snapshot():
@@ -22,3 +25,108 @@ def test_capture_snapshot():
     # Check that the file is created
     assert os.path.exists(file_name)
     os.remove(file_name)
+
+
+def test_snapshot_cache(monkeypatch, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    snapshot = capture_snapshot(cache_dir=cache_dir)
+    assert len(os.listdir(cache_dir)) == 1
+
+    calls = []
+
+    def python_info():
+        calls.append("python")
+        return {}
+
+    monkeypatch.setattr(system_snapshot, "get_python_info", python_info)
+    cached = capture_snapshot(cache_dir=cache_dir)
+    # Static sections come from the cache, the others are collected again
+    assert calls == []
+    for key in system_snapshot.STATIC_SECTIONS:
+        assert cached[key] == snapshot[key]
+    assert capture_snapshot(cache_dir=None)["python"] == {}
+    assert calls == ["python"]
+
+    # A different environment does not use the cache
+    monkeypatch.setenv("TTEX_IMAGE_ID", "other_image")
+    assert capture_snapshot(cache_dir=cache_dir)["python"] == {}
+    assert len(os.listdir(cache_dir)) == 2
+
+
+def test_snapshot_cache_other_node(monkeypatch, tmp_path):
+    cache_dir = str(tmp_path / "cache")
+    uname = os.uname()
+    assert capture_snapshot(cache_dir=cache_dir)["os"]["kernel"]["output"].startswith(
+        " ".join(uname[:3])
+    )
+    # Another node running the same image shares the cache
+    other = os.uname_result(
+        (uname.sysname, "other_node", "9.9.9", uname.version, uname.machine)
+    )
+    monkeypatch.setattr(system_snapshot.os, "uname", lambda: other)
+    kernel = capture_snapshot(cache_dir=cache_dir)["os"]["kernel"]["output"]
+    assert kernel.startswith(f"{uname.sysname} other_node 9.9.9")
+
+
+def test_snapshot_cache_opt_in(monkeypatch):
+    stored = []
+    monkeypatch.setattr(
+        system_snapshot, "_store_static", lambda *args: stored.append(args)
+    )
+    capture_snapshot()
+    assert stored == []
+    # The key depends on the environment, not on the container it runs in
+    key = system_snapshot.snapshot_cache_key()
+    monkeypatch.setattr(system_snapshot.platform, "node", lambda: "other_host")
+    assert system_snapshot.snapshot_cache_key() == key
+    monkeypatch.setattr(system_snapshot.sys, "path", sys.path + ["/"])
+    assert system_snapshot.snapshot_cache_key() != key
+
+
+def test_run_cmd_timeout():
+    result = system_snapshot.run_cmd("sleep 5", timeout=0.1)
+    assert result["success"] is False
+    assert result["timeout"] == 0.1
+
+
+def test_in_process_probes():
+    packages = system_snapshot.get_installed_packages()["data"]
+    frozen = system_snapshot.run_cmd("pip freeze", parse="kv", split_char="==")
+    for name, version in frozen["data"].items():
+        if not name.startswith("#"):
+            assert packages[name] == version
+    assert system_snapshot.read_kv(
+        "/etc/os-release", split_char="="
+    ) == system_snapshot.run_cmd("cat /etc/os-release", parse="kv", split_char="=")
+    assert system_snapshot.get_kernel_info()["output"].startswith(
+        " ".join(os.uname()[:3])
+    )
+    lines = system_snapshot.get_memory_info()["memory"]["lines"]
+    assert [line.split()[0] for line in lines] == ["total", "Mem:", "Swap:"]
+    cpu = system_snapshot.get_cpu_info()["cpu"]["data"]
+    assert int(cpu["CPU(s)"]) == os.cpu_count()
+
+
+def test_git_info(monkeypatch, tmp_path):
+    def git(*args):
+        subprocess.check_output(
+            ["git", "-c", "user.name=t", "-c", "user.email=t@t", *args], cwd=tmp_path
+        )
+
+    monkeypatch.chdir(tmp_path)
+    git("init", "-q", "-b", "main")
+    # No commit yet, falls back to git
+    assert system_snapshot.get_git_info() == system_snapshot.get_git_info_cmd()
+    git("commit", "-q", "--allow-empty", "-m", "first")
+    git("remote", "add", "origin", "https://example.com/repo.git")
+    git("remote", "add", "backup", "/tmp/backup")
+    assert system_snapshot.get_git_info() == system_snapshot.get_git_info_cmd()
+    git("pack-refs", "--all")
+    os.makedirs(tmp_path / "sub")
+    monkeypatch.chdir(tmp_path / "sub")
+    assert system_snapshot.get_git_info() == system_snapshot.get_git_info_cmd()
+    git("checkout", "-q", "--detach")
+    assert system_snapshot.get_git_info()["branch"]["output"] == "HEAD"
+    assert system_snapshot.get_git_info() == system_snapshot.get_git_info_cmd()
+    monkeypatch.chdir("/")
+    assert system_snapshot.get_git_info() == {"in_repo": False}
@@ -0,0 +1,105 @@
+import json
+from ttex.log import SnapshotStore, diff_snapshot, reconstruct_snapshot
+from ttex.log.utils.snapshot_diff import section_hash
+
+
+def make_snapshot(**changes):
+    snapshot = {
+        "timestamp": "2024-01-01T00:00:00",
+        "python": {"version": "3.10", "packages": [f"pkg{i}==1.0" for i in range(50)]},
+        "apt_packages": [f"apt{i} 1.0" for i in range(50)],
+        "custom_info": {},
+    }
+    snapshot.update(changes)
+    return snapshot
+
+
+def test_diff_and_reconstruct():
+    base = make_snapshot()
+    snapshot = make_snapshot(timestamp="2024-01-02T00:00:00", custom_info={"a": 1})
+    diff = diff_snapshot(snapshot, base, "base_ref")
+    assert diff["base"] == "base_ref"
+    assert set(diff["sections"]) == {"timestamp"}
+    # Dict sections only keep the changed keys
+    assert diff["keys"] == {"custom_info": {"set": {"a": 1}}}
+    assert diff["hashes"]["python"] == section_hash(base["python"])
+    full = reconstruct_snapshot(diff, base)
+    assert full == snapshot and list(full) == list(snapshot)
+    # Full snapshots are returned as they are
+    assert reconstruct_snapshot(snapshot, base) is snapshot
+    # The hash does not depend on the order of the keys
+    assert section_hash({"a": 1, "b": 2}) == section_hash({"b": 2, "a": 1})
+
+
+def test_reconstruct_wrong_base():
+    diff = diff_snapshot(make_snapshot(), make_snapshot(), "base_ref")
+    other = make_snapshot(apt_packages=[])
+    try:
+        reconstruct_snapshot(diff, other)
+        assert False, "Expected mismatching base to fail"
+    except AssertionError as e:
+        assert "apt_packages" in str(e)
+
+
+def test_snapshot_store(tmp_path):
+    store = SnapshotStore(str(tmp_path))
+    assert store.current_base() is None
+    first = make_snapshot()
+    diff, new_base = store.diff(first, new_base_ref="base_1")
+    assert new_base and diff["sections"] == {}
+    assert store.reconstruct(diff) == first
+
+    second = make_snapshot(timestamp="2024-01-02T00:00:00")
+    diff, new_base = store.diff(second, new_base_ref="base_2")
+    assert not new_base and diff["base"] == "base_1"
+    assert list(diff["sections"]) == ["timestamp"]
+    assert len(json.dumps(diff)) < len(json.dumps(second))
+    assert store.reconstruct(diff) == second
+
+    # Too much changed, the snapshot becomes the new base
+    third = make_snapshot(
+        python={"version": "3.12", "packages": [f"pkg{i}==2.0" for i in range(50)]},
+        apt_packages=[f"apt{i} 2.0" for i in range(50)],
+    )
+    diff, new_base = store.diff(third, new_base_ref="base_3")
+    assert new_base and diff["base"] == "base_3"
+    assert store.current_base() == ("base_3", third)
+    # Diffs against the old base can still be reconstructed
+    assert store.reconstruct(diff_snapshot(second, first, "base_1")) == second
+
+
+def test_diff_keys_within_sections(tmp_path):
+    def snapshot(run: int, pkg0: str = "1.0"):
+        return make_snapshot(
+            timestamp=f"2024-01-0{run}T00:00:00",
+            python={
+                "version": "3.10",
+                "packages": {f"pkg{i}": pkg0 if i == 0 else "1.0" for i in range(50)},
+            },
+            env_vars={**{f"VAR{i}": str(i) for i in range(50)}, "RUN_ID": str(run)},
+            memory={"used": run},
+        )
+
+    base = snapshot(1)
+    changed = snapshot(2, pkg0="2.0")
+    del changed["env_vars"]["VAR0"]
+    diff = diff_snapshot(changed, base, "base_ref")
+    assert diff["keys"]["python"] == {"nested": {"packages": {"set": {"pkg0": "2.0"}}}}
+    assert diff["keys"]["env_vars"] == {"set": {"RUN_ID": "2"}, "removed": ["VAR0"]}
+    assert reconstruct_snapshot(diff, base) == changed
+    # The changed keys have to apply to the same base
+    other = snapshot(1, pkg0="3.0")
+    try:
+        reconstruct_snapshot(diff_snapshot(snapshot(2), base, "base_ref"), other)
+        assert False, "Expected mismatching base to fail"
+    except AssertionError as e:
+        assert "python" in str(e)
+
+    # Volatile sections change with every run without promoting a new base
+    store = SnapshotStore(str(tmp_path), max_diff_ratio=0.05)
+    assert store.diff(base, new_base_ref="base_1")[1]
+    for run in range(2, 5):
+        diff, new_base = store.diff(snapshot(run), new_base_ref=f"base_{run}")
+        assert not new_base and diff["base"] == "base_1"
+        assert len(json.dumps(diff)) < len(json.dumps(base)) / 2
+        assert store.reconstruct(diff) == snapshot(run)
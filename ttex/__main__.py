@@ -0,0 +1,34 @@
+"""Command line tools of ttex.
+
+Usage:
+    ttex sync SPOOL_DIR [--include-unfinished]
+    python -m ttex sync SPOOL_DIR [--include-unfinished]
+"""
+
+import argparse
+from typing import List, Optional
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(prog="ttex", description="ttex tools")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    sync_parser = subparsers.add_parser(
+        "sync", help="Replay runs spooled by the WandbHandler into wandb"
+    )
+    sync_parser.add_argument("spool_dir", help="spool_dir of the WandbHandler")
+    sync_parser.add_argument(
+        "--include-unfinished",
+        action="store_true",
+        help="Also sync runs that did not finish, e.g. after a crash",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "sync":
+        from ttex.log.handler import sync_spool
+
+        synced = sync_spool(args.spool_dir, include_unfinished=args.include_unfinished)
+        print(f"Synced {len(synced)} run(s) from {args.spool_dir}")
+
+
+if __name__ == "__main__":
+    main()
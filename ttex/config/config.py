@@ -1,8 +1,10 @@
 """Config class and ConfigFactory to create one from different sources"""
 
 from abc import ABC
-from typing import TypeVar, Type, Union, Dict, Optional, Protocol, Any
+from typing import TypeVar, Type, Union, Dict, Optional, Protocol, Any, Tuple
 from inspect import signature, Parameter
+from functools import lru_cache
+from dataclasses import dataclass
 import importlib
 import json
 import logging
@@ -127,46 +129,100 @@ class Config(ABC):  # pylint: disable=too-few-public-methods
 T = TypeVar("T", bound=Config)
 
 
+@dataclass(frozen=True)
+class _ExtractionPlan:
+    """Parameters ConfigFactory.extract passes to a config class"""
+
+    # (name, default) in signature order, default is Parameter.empty if required
+    defaults: Tuple[Tuple[str, Any], ...]
+    required: Tuple[str, ...]
+
+
+class _Unresolved:
+    """Result of a failed attribute lookup, raised as ValueError where needed"""
+
+    def __init__(self, reason: str):
+        self.reason = reason
+
+
 class ConfigFactory(ABC):
     """Provides different convenience methods to create a Config Object"""
 
     @staticmethod
-    def _extract_attr(
-        full_name: str, context: Optional[Dict] = None, assume_enum: bool = False
-    ) -> Type:
+    def _is_attr_name(full_name: str) -> bool:
         """
-        Extract attribute from a string
+        Check whether a string can name an attribute, i.e. is a dotted identifier.
+        Other strings, e.g. file paths, are plain values and not looked up.
 
         Args:
-            full_name (str): Full name of the attribute to extract
-            context: A dictionary containing the globals() context from where the config is loaded
-            assume_enum (bool): Whether to assume the last part of the string is an enum value
+            full_name (str): The string to check
 
         Returns:
-            c (Type): The extracted attribute
+            bool: Whether each part between the dots is an identifier
         """
-        # Split the string, will throw value error if there is no .
+        return all(part.isidentifier() for part in full_name.split("."))
+
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def _import_attr(module_name: str, class_name: str) -> Any:
+        """
+        Import a module and get an attribute from it.
+        Cached, so failed imports are not attempted again for repeated strings.
+        See `clear_cache` if modules become importable later.
+
+        Args:
+            module_name (str): Name of the module to import
+            class_name (str): Name of the attribute in the module
+
+        Returns:
+            Any: The attribute, or _Unresolved with the reason if it cannot be found
+        """
+        # load the module, fails with ImportError if module cannot be loaded
+        try:
+            m = importlib.import_module(module_name)
+        except ImportError as e:
+            return _Unresolved(f"ImportError {e}")
+        # get the class, fails with AttributeError if class cannot be found
+        try:
+            return getattr(m, class_name)
+        except AttributeError as e:
+            return _Unresolved(f"AttributeError {e}")
+
+    @staticmethod
+    def clear_cache() -> None:
+        """
+        Clear the cached attribute imports and extraction plans,
+        e.g. after changing sys.path or reloading a module
+        """
+        ConfigFactory._import_attr.cache_clear()
+        ConfigFactory._extraction_plan.cache_clear()
+
+    @staticmethod
+    def _lookup_attr(
+        full_name: str, context: Optional[Dict] = None, assume_enum: bool = False
+    ) -> Any:
+        """
+        Look up attribute from a string, without raising if it is not found.
+        See `_extract_attr`.
+
+        Returns:
+            c (Any): The attribute, or _Unresolved with the reason if it cannot be found
+        """
+        if not ConfigFactory._is_attr_name(full_name):
+            return _Unresolved(f"Did not recognise {full_name}: Not a dotted name")
+        # Split the string, there might be no .
         module_name = None  # type: Optional[str]
         enum_val = None
-        try:
-            if assume_enum:
-                module_name, class_name, enum_val = full_name.rsplit(".", 2)
-            else:
-                module_name, class_name = full_name.rsplit(".", 1)
-        except ValueError:
-            # We do not enforce . - class could already be loaded
-            pass
+        parts = full_name.rsplit(".", 2 if assume_enum else 1)
+        if len(parts) == 3:
+            module_name, class_name, enum_val = parts
+        elif len(parts) == 2 and not assume_enum:
+            module_name, class_name = parts
+        # We do not enforce . - class could already be loaded
         if module_name:
-            # load the module, will raise ImportError if module cannot be loaded
-            try:
-                m = importlib.import_module(module_name)
-            except ImportError as e:
-                raise ValueError(f"Did not recognise {full_name}: ImportError {e}")
-            # get the class, will raise AttributeError if class cannot be found
-            try:
-                c = getattr(m, class_name)
-            except AttributeError as e:
-                raise ValueError(f"Did not recognise {full_name}: AttributeError {e}")
+            c = ConfigFactory._import_attr(module_name, class_name)
+            if isinstance(c, _Unresolved):
+                return _Unresolved(f"Did not recognise {full_name}: {c.reason}")
         else:
             # If no module, try loading from globals and context
             if "." in full_name:
@@ -178,7 +234,7 @@ class ConfigFactory(ABC):
             elif class_name in globals():
                 c = globals()[class_name]
             else:
-                raise ValueError(
+                return _Unresolved(
                     f"Did not recognise {class_name}: KeyError Not in context or globals()"
                 )
         if enum_val:
@@ -187,6 +243,43 @@ class ConfigFactory(ABC):
 
         return c
 
+    @staticmethod
+    def _try_lookup_attr(full_name: str, context: Optional[Dict] = None) -> Any:
+        """
+        Look up attribute from a string, also as enum value, without raising
+        if it is not found. See `_try_extract_attr`.
+
+        Returns:
+            c (Any): The attribute, or _Unresolved with the reason if it cannot be found
+        """
+        c = ConfigFactory._lookup_attr(full_name, context=context, assume_enum=False)
+        if isinstance(c, _Unresolved) and "." in full_name:
+            # Without a ., the enum lookup is the same
+            c = ConfigFactory._lookup_attr(full_name, context=context, assume_enum=True)
+        return c
+
+    @staticmethod
+    def _extract_attr(
+        full_name: str, context: Optional[Dict] = None, assume_enum: bool = False
+    ) -> Type:
+        """
+        Extract attribute from a string
+
+        Args:
+            full_name (str): Full name of the attribute to extract
+            context: A dictionary containing the globals() context from where the config is loaded
+            assume_enum (bool): Whether to assume the last part of the string is an enum value
+
+        Returns:
+            c (Type): The extracted attribute
+        """
+        c = ConfigFactory._lookup_attr(
+            full_name, context=context, assume_enum=assume_enum
+        )
+        if isinstance(c, _Unresolved):
+            raise ValueError(c.reason)
+        return c
+
     @staticmethod
     def _try_extract_attr(full_name: str, context: Optional[Dict] = None) -> Type:
         """Try to extract attribute from a string
@@ -198,36 +291,26 @@ class ConfigFactory(ABC):
         Returns:
             c (Type): The extracted attribute
         """
-        try:
-            return ConfigFactory._extract_attr(
-                full_name, context=context, assume_enum=False
-            )
-        except ValueError:
-            return ConfigFactory._extract_attr(
-                full_name, context=context, assume_enum=True
-            )
+        c = ConfigFactory._try_lookup_attr(full_name, context=context)
+        if isinstance(c, _Unresolved):
+            raise ValueError(c.reason)
+        return c
 
     @staticmethod
     def _extract_value(value: Any, context: Optional[Dict] = None) -> Any:
-        logger.debug(f"Extracting value {value}")
+        logger.debug("Extracting value %s", value)
         if isinstance(value, str):
-            try:
-                # For each string, see if it is an attribute
-                v_attr = ConfigFactory._try_extract_attr(value, context)
-                return v_attr
-            except ValueError:
-                return value
+            # For each string, see if it is an attribute
+            v_attr = ConfigFactory._try_lookup_attr(value, context)
+            return value if isinstance(v_attr, _Unresolved) else v_attr
         elif isinstance(value, dict):
             if len(value.keys()) == 1:
                 # 1-key dicts might be configs, try converting
                 key_class = list(value.keys())[0]
-                try:
-                    v_attr = ConfigFactory._try_extract_attr(key_class, context)
-                    if issubclass(v_attr, Config):
-                        # found a config, process values recursively
-                        return ConfigFactory.extract(v_attr, value[key_class], context)
-                except ValueError:
-                    pass
+                v_attr = ConfigFactory._try_lookup_attr(key_class, context)
+                if not isinstance(v_attr, _Unresolved) and issubclass(v_attr, Config):
+                    # found a config, process values recursively
+                    return ConfigFactory.extract(v_attr, value[key_class], context)
             return {
                 k: ConfigFactory._extract_value(v, context=context)
                 for k, v in value.items()
@@ -244,6 +327,29 @@ class ConfigFactory(ABC):
         else:
             return value
 
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _extraction_plan(config_class: Type[Config]) -> _ExtractionPlan:
+        """
+        Get the parameters to extract for a config class from the signature of
+        its __init__. Cached, the signature is only inspected on first use.
+
+        Args:
+            config_class (Type[Config]): The config class
+
+        Returns:
+            plan (_ExtractionPlan): The parameters with their defaults
+        """
+        params = [
+            p
+            for p in signature(config_class.__init__).parameters.values()
+            if p.name != "self"
+        ]
+        return _ExtractionPlan(
+            defaults=tuple((p.name, p.default) for p in params),
+            required=tuple(p.name for p in params if p.default is Parameter.empty),
+        )
+
     @staticmethod
     def extract(
         config_class: Type[T],
@@ -264,17 +370,13 @@ class ConfigFactory(ABC):
             sub_config (T:Config): the extracted config of type config_class
 
         """
-        signa = signature(config_class.__init__)
-        values = {
-            p.name: config.get(p.name, p.default)
-            for _, p in signa.parameters.items()
-            if p.name != "self"
-        }
+        plan = ConfigFactory._extraction_plan(config_class)
+        values = {name: config.get(name, default) for name, default in plan.defaults}
         logger.debug(values)
 
         # Make sure no non-default params are missing
-        non_empty = [np.sum([v != Parameter.empty]) for _, v in values.items()]
-        assert all(non_empty), f"Missing values for {config_class} in config {values}"
+        missing = [name for name in plan.required if values[name] is Parameter.empty]
+        assert not missing, f"Missing values for {config_class} in config {values}"
         if isinstance(config, dict):
             # If we have a dict, we have a potential mismatch of values
             # check that all passed values are in the signature
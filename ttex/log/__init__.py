@@ -4,14 +4,21 @@ from ttex.log.utils.logging_setup import (
     initiate_logger,
 )
 from ttex.log.utils.system_snapshot import capture_snapshot
+from ttex.log.utils.snapshot_diff import (
+    SnapshotStore,
+    diff_snapshot,
+    reconstruct_snapshot,
+)
 from ttex.log.utils.wandb_logging_setup import (
     get_wandb_logger,
     log_wandb_artifact,
+    log_wandb_artifact_async,
     log_wandb_init,
     setup_wandb_logger,
     teardown_wandb_logger,
 )
 from ttex.log.utils.coco_logging_setup import (
+    flush_coco_logger,
     setup_coco_logger,
     teardown_coco_logger,
 )
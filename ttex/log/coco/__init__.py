@@ -1,3 +1,13 @@
-from ttex.log.coco.coco_events import COCOEval, COCOEnd, COCOStart
+from ttex.log.coco.coco_events import (
+    COCOEval,
+    COCOEvalBatch,
+    COCOEnd,
+    COCOStart,
+)
 from ttex.log.coco.coco_state import COCOState
 from ttex.log.coco.coco_splitter import COCOKeySplitter
+from ttex.log.coco.merge_shards import merge_coco_shards
+from ttex.log.coco.binary_sink import COCOBinaryHandler, export_coco_text
+from ttex.log.coco.reader import COCOResultReader, COCORun, read_trajectories
+from ttex.log.coco.statistics import RuntimeStatistics
+from ttex.log.coco.wandb_bridge import COCOWandbHandler
@@ -0,0 +1,259 @@
+import json
+import logging
+import os
+import os.path as osp
+from typing import Dict, Hashable, Iterator, List, Optional, Set, Tuple, Union
+import numpy as np
+from ttex.log.coco.record import COCOLogRecord
+from ttex.log.formatter import StrRecordBatch
+
+# Suffixes of the binary files, appended to the path of the text file
+RAW_SUFFIX = ".f64"
+INDEX_SUFFIX = ".idx"
+
+
+class COCOBinaryHandler(logging.Handler):
+    """
+    Writes .dat/.tdat trajectories as binary columns instead of text.
+
+    For each text file, the rows are appended to a raw float64 file (`RAW_SUFFIX`),
+    one row per record with the columns f_evals, g_evals, best_diff_opt, mf,
+    best_mf, x1, x2, ... The index file (`INDEX_SUFFIX`) lists the header lines
+    and the number of rows and columns of each block of rows, one JSON object per line.
+    The text files can be regenerated with `export_coco_text`.
+    """
+
+    def __init__(
+        self,
+        key: str = "log_dat",
+        root_dir: Optional[str] = None,
+        buffer_rows: int = 1024,
+        level=logging.NOTSET,
+    ):
+        """
+        Args:
+            key (str): Attribute of the log record holding the record to write.
+            root_dir (Optional[str]): Directory the header filepaths are relative to.
+                Defaults to None, i.e. the current working directory.
+            buffer_rows (int): Write the rows of a file once this many are collected.
+            level ([type], optional): Logging level. Defaults to logging.NOTSET.
+        """
+        super().__init__(level)
+        assert buffer_rows > 0, "buffer_rows must be positive"
+        self.key = key
+        self.root_dir = root_dir
+        self.buffer_rows = buffer_rows
+        # Current file of each run
+        self._run_filepaths: Dict[Hashable, str] = {}
+        # Rows not written yet, by file
+        self._pending: Dict[str, List[List[float]]] = {}
+        # Files written before, appended to when they are written again
+        self._opened: Set[str] = set()
+
+    def output_path(self, filepath: str) -> str:
+        """
+        Get the path of the text file for a header filepath.
+
+        Args:
+            filepath (str): Filepath of a header record.
+        Returns:
+            str: The filepath within root_dir.
+        """
+        if self.root_dir is None:
+            return filepath
+        return osp.join(self.root_dir, filepath)
+
+    @staticmethod
+    def record_row(record: COCOLogRecord) -> List[float]:
+        return [
+            record.f_evals,
+            record.g_evals,
+            record.best_diff_opt,
+            record.mf,
+            record.best_mf,
+            *record.x,
+        ]
+
+    def emit(self, record):
+        """
+        Collect the rows of a record, or start a new block of rows for a header.
+        Records that finish a run may come without the key, see KeyFilter.
+        The rows of a finished run are written right away.
+        """
+        if hasattr(record, self.key):
+            self._collect(record)
+        if getattr(record, "run_finished", False):
+            # The run has no more records, write and forget its file
+            filepath = self._run_filepaths.pop(getattr(record, "run_key", None), None)
+            if filepath is not None:
+                try:
+                    self._write_rows(filepath)
+                except Exception:
+                    self.handleError(record)
+
+    def _collect(self, record):
+        try:
+            record_obj = getattr(record, self.key)
+            run_key = getattr(record, "run_key", None)
+            if hasattr(record_obj, "filepath"):
+                filepath = self.output_path(record_obj.filepath)
+                self._run_filepaths[run_key] = filepath
+                # Rows collected so far come before the header
+                self._write_rows(filepath, header=str(record_obj))
+                return
+            assert (
+                run_key in self._run_filepaths
+            ), "First message of each run should always be a Header."
+            filepath = self._run_filepaths[run_key]
+            if isinstance(record_obj, StrRecordBatch):
+                log_records = record_obj.records
+            else:
+                log_records = [record_obj]
+            rows = self._pending.setdefault(filepath, [])
+            rows.extend(
+                COCOBinaryHandler.record_row(log_record) for log_record in log_records
+            )
+            if len(rows) >= self.buffer_rows:
+                self._write_rows(filepath)
+        except Exception:
+            self.handleError(record)
+
+    def _prepare(self, filepath: str):
+        """
+        Create or truncate the binary files when they are first written.
+        """
+        if filepath in self._opened:
+            return
+        dirname = osp.dirname(filepath)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        for suffix in [RAW_SUFFIX, INDEX_SUFFIX]:
+            open(filepath + suffix, "wb").close()
+        self._opened.add(filepath)
+
+    def _write_rows(self, filepath: str, header: Optional[str] = None):
+        """
+        Append the pending rows of a file, one block per number of columns,
+        followed by a header if given. The index entries are written at once.
+        """
+        rows = self._pending.pop(filepath, None)
+        if not rows and header is None:
+            return
+        self._prepare(filepath)
+        entries: List[Dict] = []
+        if rows:
+            with open(filepath + RAW_SUFFIX, "ab") as f:
+                start = 0
+                for end in range(1, len(rows) + 1):
+                    if end == len(rows) or len(rows[end]) != len(rows[start]):
+                        block = np.array(rows[start:end], dtype=np.float64)
+                        block.tofile(f)
+                        entries.append({"rows": block.shape[0], "cols": block.shape[1]})
+                        start = end
+        if header is not None:
+            entries.append({"header": header})
+        with open(filepath + INDEX_SUFFIX, "a") as f:
+            f.write("".join(json.dumps(entry) + "\n" for entry in entries))
+
+    def flush(self):
+        """
+        Write all pending rows.
+        """
+        self.acquire()
+        try:
+            for filepath in list(self._pending):
+                self._write_rows(filepath)
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        self._run_filepaths.clear()
+        super().close()
+
+
+def read_binary_blocks(
+    filepath: str,
+) -> Iterator[Tuple[str, Union[str, np.ndarray]]]:
+    """
+    Read the blocks of a binary trajectory, in the order they were written.
+
+    Args:
+        filepath (str): Path of the text file the binary files belong to.
+    Returns:
+        Iterator[Tuple[str, Union[str, np.ndarray]]]: ("header", header line) or
+            ("rows", rows x columns array) for each block.
+    """
+    data = np.fromfile(filepath + RAW_SUFFIX, dtype=np.float64)
+    offset = 0
+    with open(filepath + INDEX_SUFFIX, "r") as f:
+        for line in f:
+            entry = json.loads(line)
+            if "header" in entry:
+                yield "header", entry["header"]
+            else:
+                size = entry["rows"] * entry["cols"]
+                rows = data[offset : offset + size].reshape(
+                    entry["rows"], entry["cols"]
+                )
+                offset += size
+                yield "rows", rows
+
+
+def binary_to_text(filepath: str) -> str:
+    """
+    Render a binary trajectory in the bbob-new2 text format.
+
+    Args:
+        filepath (str): Path of the text file the binary files belong to.
+    Returns:
+        str: Content of the text file, the same as written by the text handlers.
+    """
+    lines: List[str] = []
+    for _, block in read_binary_blocks(filepath):
+        if isinstance(block, str):
+            lines.append(block)
+            continue
+        lines.extend(
+            COCOLogRecord.format_lines(
+                block[:, 0].astype(np.int64).tolist(),
+                block[:, 1].astype(np.int64).tolist(),
+                block[:, 2],
+                block[:, 3],
+                block[:, 4],
+                block[:, 5:],
+            )
+        )
+    return "".join(f"{line}\n" for line in lines)
+
+
+def export_coco_text(
+    root_dir: str = ".", output_dir: Optional[str] = None
+) -> List[str]:
+    """
+    Regenerate the .dat/.tdat text files of all binary trajectories below a directory,
+    e.g. before post-processing with `run_cocopp`.
+
+    Args:
+        root_dir (str): Directory to search for binary trajectories.
+        output_dir (Optional[str]): Directory to write the text files to, keeping
+            their path relative to root_dir. Defaults to None, i.e. next to the
+            binary files.
+    Returns:
+        List[str]: Paths of the written text files.
+    """
+    text_files = []
+    for dirpath, _, filenames in os.walk(root_dir):
+        for filename in sorted(filenames):
+            if not filename.endswith(INDEX_SUFFIX):
+                continue
+            filepath = osp.join(dirpath, filename[: -len(INDEX_SUFFIX)])
+            text_file = filepath
+            if output_dir is not None:
+                text_file = osp.join(output_dir, osp.relpath(filepath, root_dir))
+                os.makedirs(osp.dirname(text_file), exist_ok=True)
+            content = binary_to_text(filepath)
+            with open(text_file, "w") as f:
+                f.write(content)
+            text_files.append(text_file)
+    return text_files
@@ -1,6 +1,7 @@
 from uuid import uuid4
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Hashable, List, Optional
+import numpy as np
 from ttex.log.filter import LogEvent
 
 
@@ -8,11 +9,32 @@ from ttex.log.filter import LogEvent
 class COCOEval(LogEvent):
     x: List[float]  # point in search space
     mf: float  # measured fitness
+    run_key: Optional[Hashable] = None  # run the event belongs to
+
+
+@dataclass(frozen=True, eq=False)
+class COCOEvalBatch(LogEvent):
+    x: np.ndarray  # N x D points in search space, in evaluation order
+    mf: np.ndarray  # N measured fitness values
+    run_key: Optional[Hashable] = None  # run the event belongs to
+
+    def __post_init__(self):
+        # Store as float arrays so the state can process the batch vectorized.
+        # Copied, optimizers may reuse their population buffers after logging
+        x = np.array(self.x, dtype=float, copy=True)
+        mf = np.array(self.mf, dtype=float, copy=True).reshape(-1)
+        assert x.ndim == 2, "x must be a 2D array of shape (N, D)"
+        assert len(x) == len(mf), "x and mf must contain the same number of points"
+        object.__setattr__(self, "x", x)
+        object.__setattr__(self, "mf", mf)
+
+    def __len__(self) -> int:
+        return len(self.mf)
 
 
 @dataclass(frozen=True)
 class COCOEnd(LogEvent):
-    pass
+    run_key: Optional[Hashable] = None  # run the event belongs to
 
 
 @dataclass(frozen=True)
@@ -25,6 +47,7 @@ class COCOStart(LogEvent):
     fopt: Optional[float] = None  # optimal fitness value (if known)
     dim: int = 0  # search space dimension
     inst: int = 0  # instance id
+    run_key: Optional[Hashable] = None  # run the event belongs to
 
 
 # TODO: potentially add a transform to know the "inner function" fitness value
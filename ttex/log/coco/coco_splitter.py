@@ -1,7 +1,7 @@
-from ttex.log.coco import COCOEnd, COCOEval, COCOStart, COCOState
+from ttex.log.coco import COCOEnd, COCOEval, COCOEvalBatch, COCOStart, COCOState
 from ttex.log.filter import KeySplitter, LogEvent
 from ttex.log.filter.event_keysplit_filter import LoggingState
-from ttex.log.formatter import StrRecord
+from ttex.log.formatter import StrRecord, StrRecordBatch
 from ttex.log.coco.record import (
     COCOInfoHeader,
     COCOInfoRecord,
@@ -9,8 +9,11 @@ from ttex.log.coco.record import (
     COCOtdatRecord,
     COCOdatHeader,
     COCOdatRecord,
+    EvaluationTriggerSchedule,
+    TargetTriggerSchedule,
 )
 from typing import List, Dict, Optional
+import numpy as np
 
 
 class COCOKeySplitter(KeySplitter):
@@ -27,6 +30,50 @@ class COCOKeySplitter(KeySplitter):
         self.improvement_steps = improvement_steps
         self.number_target_triggers = number_target_triggers
         self.target_precision = target_precision
+        # Precomputed triggers, evaluation triggers depend on the dimension
+        self._evaluation_schedules: Dict[int, EvaluationTriggerSchedule] = {}
+        self.target_schedule: Optional[TargetTriggerSchedule] = None
+        if number_target_triggers > 0 and target_precision > 0:
+            self.target_schedule = TargetTriggerSchedule(
+                number_target_triggers, target_precision
+            )
+
+    def evaluation_schedule(self, dim: int) -> EvaluationTriggerSchedule:
+        """
+        Get the (cached) evaluation trigger schedule for a dimension.
+        Args:
+            dim (int): Problem dimension.
+        Returns:
+            EvaluationTriggerSchedule: Schedule of evaluations that emit a .tdat record.
+        """
+        if dim not in self._evaluation_schedules:
+            self._evaluation_schedules[dim] = EvaluationTriggerSchedule(
+                self.base_evaluation_triggers, self.number_evaluation_triggers, dim
+            )
+        return self._evaluation_schedules[dim]
+
+    def tdat_trigger(self, state: COCOState, dim: int) -> bool:
+        """
+        Check if the current evaluation of the state emits a .tdat record.
+        Only compares against the cursor of the state unless a trigger is reached.
+        Args:
+            state (COCOState): The current state of the COCO logging.
+            dim (int): Dimension of the current evaluation.
+        Returns:
+            bool: True if a .tdat record should be emitted, False otherwise.
+        """
+        f_evals = state.f_evals
+        if f_evals < state.next_tdat_trigger and dim == state.tdat_trigger_dim:
+            return False
+        schedule = self.evaluation_schedule(dim)
+        if f_evals > state.next_tdat_trigger or dim != state.tdat_trigger_dim:
+            # Cursor is outdated, e.g. after a dimension change
+            state.next_tdat_trigger = schedule.next_trigger(f_evals)
+            state.tdat_trigger_dim = dim
+        if f_evals < state.next_tdat_trigger:
+            return False
+        state.next_tdat_trigger = schedule.next_trigger(f_evals + 1)
+        return True
 
     def process(self, state: LoggingState, event: LogEvent) -> Dict[str, StrRecord]:
         assert isinstance(state, COCOState)
@@ -37,47 +84,100 @@ class COCOKeySplitter(KeySplitter):
             log_tdat_header = COCOtdatHeader(state)
             log_dat_header = COCOdatHeader(state)
             state.set_dat_filepath(log_tdat_header.filepath, info_header.filepath)
-            if info_header.emit():
-                return_dict["info"] = info_header
+            # The info header is written with the data line when the run ends
             if log_tdat_header.emit():
                 return_dict["log_tdat"] = log_tdat_header
             if log_dat_header.emit():
                 return_dict["log_dat"] = log_dat_header
         elif isinstance(event, COCOEval):
-            log_tdat_record = COCOtdatRecord(state)
-            log_dat_record = COCOdatRecord(state)
-            if log_tdat_record.emit(
-                base_evaluation_triggers=self.base_evaluation_triggers,
-                number_evaluation_triggers=self.number_evaluation_triggers,
-                last_tdat_emit=None,
-            ):
+            if self.tdat_trigger(state, len(event.x)):
                 # explicitly not the last eval
-                return_dict["log_tdat"] = log_tdat_record
+                return_dict["log_tdat"] = COCOtdatRecord(state)
                 state.last_tdat_emit = state.f_evals
-            if log_dat_record.emit(
+            # Decide first, only create the record if it is emitted
+            reason, best_target = COCOdatRecord.trigger(
+                state.f_evals,
+                event.mf,
+                state.best_diff_opt,
+                state.last_imp,
                 improvement_step=self.improvement_steps,
                 number_target_triggers=self.number_target_triggers,
                 target_precision=self.target_precision,
-            ):
+                target_schedule=self.target_schedule,
+            )
+            if best_target is not None:
+                log_dat_record = COCOdatRecord(state)
+                log_dat_record.reason = reason
+                log_dat_record.best_target = best_target
                 return_dict["log_dat"] = log_dat_record
                 # Update best target reached for COCOInfoRecord
-                assert hasattr(
-                    log_dat_record, "best_target"
-                ), "log_dat_record must have best_target attribute"
-                assert log_dat_record.best_target is not None, "best_target must be set"
-                state.best_target = log_dat_record.best_target
+                state.best_target = best_target
+        elif isinstance(event, COCOEvalBatch):
+            return_dict.update(self._process_eval_batch(state))
         elif isinstance(event, COCOEnd):
+            assert (
+                state.last_eval is not None
+            ), "COCOEnd requires at least one COCOEval event"
             # Emit last evaluation if not already done
-            log_tdat_record = COCOtdatRecord(state)
-            if log_tdat_record.emit(
-                base_evaluation_triggers=self.base_evaluation_triggers,
-                number_evaluation_triggers=self.number_evaluation_triggers,
-                last_tdat_emit=state.last_tdat_emit,
-            ):
-                return_dict["log_tdat"] = log_tdat_record
-            info_record = COCOInfoRecord(state)
-            if info_record.emit():
-                return_dict["info"] = info_record
+            if state.f_evals > max(state.last_tdat_emit, 0):
+                return_dict["log_tdat"] = COCOtdatRecord(state)
+            info_header = COCOInfoHeader(state, record=COCOInfoRecord(state))
+            if info_header.emit():
+                return_dict["info"] = info_header
+        return return_dict
+
+    def _process_eval_batch(self, state: COCOState) -> Dict[str, StrRecord]:
+        """
+        Process the last COCOEvalBatch of the state.
+        Emits the same records as processing each evaluation as a COCOEval,
+        collected into one StrRecordBatch per key.
+        """
+        return_dict: Dict[str, StrRecord] = {}
+        batch = state.last_batch
+        if batch is None:
+            return return_dict
+        dim = batch.x.shape[1]
+
+        schedule = self.evaluation_schedule(dim)
+        triggered = np.flatnonzero(schedule.triggered(batch.f_evals))
+        if len(triggered) > 0:
+            return_dict["log_tdat"] = StrRecordBatch(
+                [COCOtdatRecord(state, idx) for idx in triggered.tolist()]
+            )
+            state.last_tdat_emit = int(batch.f_evals[triggered[-1]])
+        # Move the cursor past the batch
+        state.tdat_trigger_dim = dim
+        state.next_tdat_trigger = schedule.next_trigger(state.f_evals + 1)
+
+        # Only the first evaluation and improvements can hit new targets
+        candidates = batch.last_imp > 0
+        if self.target_schedule is not None:
+            # Log target triggers, resolve the bins of all evaluations at once
+            candidates &= batch.best_diff_opt >= self.target_precision
+            candidates &= self.target_schedule.triggered(
+                batch.best_diff_opt, batch.last_imp
+            )
+        candidates |= batch.f_evals == 1
+        log_dat_records = StrRecordBatch()
+        for idx in np.flatnonzero(candidates).tolist():
+            reason, best_target = COCOdatRecord.trigger(
+                int(batch.f_evals[idx]),
+                batch.mf[idx],
+                batch.best_diff_opt[idx],
+                batch.last_imp[idx],
+                improvement_step=self.improvement_steps,
+                number_target_triggers=self.number_target_triggers,
+                target_precision=self.target_precision,
+                target_schedule=self.target_schedule,
+            )
+            if best_target is not None:
+                log_dat_record = COCOdatRecord(state, idx)
+                log_dat_record.reason = reason
+                log_dat_record.best_target = best_target
+                log_dat_records.append(log_dat_record)
+                state.best_target = best_target
+        if log_dat_records.emit():
+            return_dict["log_dat"] = log_dat_records
         return return_dict
 
     def init_logging_state(self) -> COCOState:
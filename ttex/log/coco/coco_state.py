@@ -1,31 +1,78 @@
 from ttex.log.filter import LoggingState, LogEvent
-from ttex.log.coco import COCOEval, COCOStart, COCOEnd
+from ttex.log.coco import COCOEval, COCOEvalBatch, COCOStart, COCOEnd
+from dataclasses import dataclass
+import math
 import numpy as np
 import os.path as osp
 from typing import Optional
 
 
+@dataclass(frozen=True, eq=False, slots=True)
+class COCOBatchState:
+    """
+    Per-evaluation state values of the last processed COCOEvalBatch.
+    Entry i holds the values COCOState would have after the i-th evaluation.
+    """
+
+    x: np.ndarray  # N x D evaluated points
+    mf: np.ndarray  # measured fitness values
+    f_evals: np.ndarray  # function evaluation counts
+    best_mf: np.ndarray  # best observed function values
+    best_diff_opt: np.ndarray  # best differences to optimal value
+    last_imp: np.ndarray  # improvements of best_mf per evaluation
+
+    def __len__(self) -> int:
+        return len(self.mf)
+
+
 class COCOState(LoggingState):
+    # Fixed layout, there can be one state per concurrent problem instance
+    __slots__ = (
+        "_needs_start",
+        "last_tdat_emit",
+        "best_target",
+        "dat_filepath",
+        "coco_start",
+        "f_evals",
+        "g_evals",
+        "best_mf",
+        "fopt",
+        "inst",
+        "last_eval",
+        "best_diff_opt",
+        "last_imp",
+        "last_batch",
+        "next_tdat_trigger",
+        "tdat_trigger_dim",
+    )
+
     def __init__(self):
         self._needs_start = True
         self.last_tdat_emit = 0
-        self.best_target: Optional[
-            float
-        ] = None  # Best target reached (from .dat logging)
-        self.dat_filepath: Optional[
-            str
-        ] = None  # Path to the .dat file (relative to info file)
+        self.best_target: Optional[float] = (
+            None  # Best target reached (from .dat logging)
+        )
+        self.dat_filepath: Optional[str] = (
+            None  # Path to the .dat file (relative to info file)
+        )
         self.coco_start: Optional[COCOStart] = None  # The last COCOStart event
         self.f_evals = 0  # Number of function evaluations
         self.g_evals = 0  # Number of constraint evaluations (not currently supported)
-        self.best_mf = np.inf  # Best observed function value
+        self.best_mf = math.inf  # Best observed function value
         self.fopt: Optional[float] = None  # Optimal function value (if known)
         self.inst: Optional[int] = None  # Problem instance number
         self.last_eval: Optional[COCOEval] = None  # The last COCOEval event
         self.best_diff_opt: Optional[float] = None  # Best difference to optimal value
-        self.last_imp: Optional[
-            float
-        ] = None  # Improvement of best_mf since last evaluation
+        self.last_imp: Optional[float] = (
+            None  # Improvement of best_mf since last evaluation
+        )
+        self.last_batch: Optional[COCOBatchState] = (
+            None  # Per-evaluation values of the last COCOEvalBatch event
+        )
+        self.next_tdat_trigger = 0  # Cursor: next f_evals that emits a .tdat record
+        self.tdat_trigger_dim: Optional[int] = (
+            None  # Dimension the .tdat trigger cursor was computed for
+        )
         super().__init__()
 
     def update(self, event: LogEvent) -> None:
@@ -33,18 +80,20 @@ class COCOState(LoggingState):
             self._update_start(event)
         elif isinstance(event, COCOEval):
             self._update_eval(event)
+        elif isinstance(event, COCOEvalBatch):
+            self._update_eval_batch(event)
         elif isinstance(event, COCOEnd):
             self._update_end(event)
         else:
             raise ValueError(
-                "COCOState can only process COCOStart, COCOEval, and COCOEnd events"
+                "COCOState can only process COCOStart, COCOEval, COCOEvalBatch and COCOEnd events"
             )
 
     def _update_start(self, coco_start: COCOStart) -> None:
         self.f_evals = 0
         self.g_evals = 0
-        self.best_mf = np.inf
-        self.fopt = coco_start.fopt
+        self.best_mf = math.inf
+        self.fopt = float(coco_start.fopt) if coco_start.fopt is not None else None
         self.inst = coco_start.inst
         self.coco_start = coco_start
         self.best_diff_opt = None
@@ -52,6 +101,9 @@ class COCOState(LoggingState):
         self._needs_start = False
         self.last_tdat_emit = 0
         self.best_target = None
+        self.last_batch = None
+        self.next_tdat_trigger = 0
+        self.tdat_trigger_dim = None
 
     def _update_eval(self, coco_eval: COCOEval) -> None:
         assert not self._needs_start, "COCOStart must be processed before COCOEval"
@@ -59,19 +111,66 @@ class COCOState(LoggingState):
         if self.coco_start.dim > 0:  # If dimension changes, it is set to 0
             # Check that the dimension of x matches the problem dimension
             assert len(coco_eval.x) == self.coco_start.dim
+        self.last_batch = None
         self.f_evals += 1
-        self.last_imp = max(
-            self.best_mf - coco_eval.mf, 0
-        )  # positive or zero (minimisation)
-        self.best_mf = min(self.best_mf, coco_eval.mf)
+        mf = float(coco_eval.mf)
+        self.last_imp = max(self.best_mf - mf, 0.0)  # positive or zero (minimisation)
+        self.best_mf = min(self.best_mf, mf)
         if self.fopt is not None:
             self.best_diff_opt = self.best_mf - self.fopt
         else:
             self.best_diff_opt = self.best_mf  # If fopt is unknown, use best_mf
-        self.last_eval = coco_eval
+        # Copy x, the optimizer may reuse its buffer before the run ends
+        self.last_eval = COCOEval(
+            x=list(coco_eval.x), mf=coco_eval.mf, run_key=coco_eval.run_key
+        )
+
+    def _update_eval_batch(self, coco_eval_batch: COCOEvalBatch) -> None:
+        """
+        Process a batch of evaluations in one vectorized pass.
+        The resulting state is the same as after processing each evaluation
+        as a separate COCOEval, with the per-evaluation values kept in last_batch.
+        """
+        assert not self._needs_start, "COCOStart must be processed before COCOEval"
+        assert self.coco_start is not None
+        x, mf = coco_eval_batch.x, coco_eval_batch.mf
+        if self.coco_start.dim > 0:  # If dimension changes, it is set to 0
+            # Check that the dimension of x matches the problem dimension
+            assert x.shape[1] == self.coco_start.dim
+        if len(mf) == 0:
+            self.last_batch = None
+            return
+        f_evals = np.arange(self.f_evals + 1, self.f_evals + len(mf) + 1)
+        # Running minimum, including the best value before this batch
+        best_mf = np.minimum.accumulate(np.concatenate(([self.best_mf], mf)))
+        # positive or zero (minimisation)
+        last_imp = np.maximum(best_mf[:-1] - mf, 0)
+        best_mf = best_mf[1:]
+        if self.fopt is not None:
+            best_diff_opt = best_mf - self.fopt
+        else:
+            best_diff_opt = best_mf  # If fopt is unknown, use best_mf
+        self.last_batch = COCOBatchState(
+            x=x,
+            mf=mf,
+            f_evals=f_evals,
+            best_mf=best_mf,
+            best_diff_opt=best_diff_opt,
+            last_imp=last_imp,
+        )
+        # Scalar state reflects the last evaluation of the batch
+        self.f_evals = int(f_evals[-1])
+        self.best_mf = float(best_mf[-1])
+        self.best_diff_opt = float(best_diff_opt[-1])
+        self.last_imp = float(last_imp[-1])
+        self.last_eval = COCOEval(x=x[-1].tolist(), mf=float(mf[-1]))
 
     def _update_end(self, coco_end: COCOEnd) -> None:
         self._needs_start = True
 
+    @property
+    def finished(self) -> bool:
+        return self._needs_start and self.coco_start is not None
+
     def set_dat_filepath(self, dat_filepath: str, info_filepath: str):
         self.dat_filepath = osp.relpath(dat_filepath, start=osp.dirname(info_filepath))
@@ -0,0 +1,113 @@
+import os
+import os.path as osp
+from typing import Dict, List, Optional, Tuple
+
+COCO_EXTENSIONS = (".info", ".dat", ".tdat")
+
+
+def info_blocks(content: str) -> List[List[str]]:
+    """
+    Split the content of an .info file into its blocks.
+    Each block consists of the header line, the algorithm comment line and
+    the data line listing the data file and its runs.
+
+    Args:
+        content (str): Content of the .info file.
+    Returns:
+        List[List[str]]: Lines of each block.
+    """
+    blocks: List[List[str]] = []
+    for line in content.splitlines():
+        if line.startswith("suite = ") or not blocks:
+            blocks.append([line])
+        else:
+            blocks[-1].append(line)
+    return blocks
+
+
+def merge_info(contents: List[str]) -> str:
+    """
+    Merge the contents of .info files.
+    Blocks with the same header that refer to the same data file are combined
+    into one block listing the runs of all blocks, in order. This matches the
+    runs in the data file, which are concatenated in the same order.
+
+    Args:
+        contents (List[str]): Contents of the .info files.
+    Returns:
+        str: Content of the merged .info file.
+    """
+    # Header lines and data file -> runs, None for blocks without data line
+    merged: Dict[Tuple[str, ...], Optional[List[str]]] = {}
+    for content in contents:
+        for block in info_blocks(content):
+            if len(block) < 3:
+                # Incomplete block, e.g. if the run was not ended
+                merged.setdefault(tuple(block), None)
+                continue
+            data_file, _, entries = block[-1].partition(", ")
+            key = tuple(block[:-1]) + (data_file,)
+            merged_runs = merged.setdefault(key, [])
+            assert merged_runs is not None
+            merged_runs.extend(run for run in entries.split(", ") if run)
+    lines: List[str] = []
+    for key, runs in merged.items():
+        if runs is None:
+            lines.extend(key)
+        else:
+            lines.extend(key[:-1])
+            lines.append(", ".join((key[-1],) + tuple(runs)))
+    return "".join(f"{line}\n" for line in lines)
+
+
+def merge_coco_shards(shard_root: str, output_dir: str = ".") -> List[str]:
+    """
+    Merge the COCO files written by several shards into one result tree.
+
+    Each subdirectory of `shard_root` is a shard, e.g. written by one worker process
+    with `setup_coco_logger(shard_dir=...)`. Files with the same relative path in
+    several shards are combined in shard order: .dat/.tdat files are concatenated,
+    so they contain the runs of all shards, each starting with its own header line.
+    The .info files are merged with `merge_info`, listing all runs of a data file
+    in the same order. Loggers writing to the shards need to be flushed or torn
+    down first.
+
+    Args:
+        shard_root (str): Directory containing one subdirectory per shard.
+        output_dir (str): Directory to write the merged result tree to.
+    Returns:
+        List[str]: Paths of the merged files.
+    """
+    shard_dirs = sorted(
+        osp.join(shard_root, shard)
+        for shard in os.listdir(shard_root)
+        if osp.isdir(osp.join(shard_root, shard))
+    )
+    # Relative path -> files of all shards, in shard order
+    sources: Dict[str, List[str]] = {}
+    for shard_dir in shard_dirs:
+        for dirpath, _, filenames in os.walk(shard_dir):
+            for filename in sorted(filenames):
+                if filename.endswith(COCO_EXTENSIONS):
+                    filepath = osp.join(dirpath, filename)
+                    relpath = osp.relpath(filepath, shard_dir)
+                    sources.setdefault(relpath, []).append(filepath)
+
+    merged_files = []
+    for relpath in sorted(sources):
+        contents = []
+        for filepath in sources[relpath]:
+            with open(filepath, "r") as f:
+                content = f.read()
+            if content and not content.endswith("\n"):
+                content += "\n"
+            contents.append(content)
+        merged_file = osp.join(output_dir, relpath)
+        os.makedirs(osp.dirname(merged_file), exist_ok=True)
+        with open(merged_file, "w") as f:
+            if relpath.endswith(".info"):
+                f.write(merge_info(contents))
+            else:
+                f.write("".join(contents))
+        merged_files.append(merged_file)
+    return merged_files
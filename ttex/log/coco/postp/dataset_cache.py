@@ -0,0 +1,271 @@
+import hashlib
+import json
+import os
+import os.path as osp
+import pickle
+from contextlib import contextmanager
+from typing import Any, Iterator, List, Optional
+import numpy as np
+import cocopp
+from cocopp import pproc, testbedsettings
+from ttex.log.coco.merge_shards import info_blocks
+from ttex.log.coco.postp.info import SuiteInfo
+from ttex.log.coco.reader import INFO_ENTRY_PATTERN
+
+# Data files cocopp may read for a data line of an .info file
+DATA_EXTENSIONS = (".dat", ".tdat", ".mdat", ".rdat")
+
+
+class DataSetCache:
+    """
+    Caches the cocopp DataSets parsed from each .info file on disk,
+    so that unchanged results are not parsed again by later cocopp runs.
+    Entries are keyed by the .info file and its data files, either by their
+    modification times and sizes or by their content, and by the settings the
+    DataSets are parsed with (the cocopp testbed and the suite info).
+    The least recently used entries are evicted once the cache exceeds `max_bytes`.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        max_bytes: int = 2**30,
+        key: str = "mtime",
+        suite_info: Optional[SuiteInfo] = None,
+    ):
+        """
+        Args:
+            cache_dir (str): Directory to store the cached DataSets in.
+            max_bytes (int): Maximum size of the cache directory.
+            key (str): "mtime" to key entries by modification time and size of the
+                files, "content" to key them by a hash of their content.
+            suite_info (Optional[SuiteInfo]): Suite the testbed was created from,
+                part of the cache key.
+        """
+        assert key in ["mtime", "content"], f"Unknown cache key {key}"
+        assert max_bytes > 0, "max_bytes must be positive"
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.key_type = key
+        self.suite_info = suite_info
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(cache_dir, exist_ok=True)
+
+    @staticmethod
+    def data_files(index_file: str) -> List[str]:
+        """
+        Get the existing data files referenced by an .info file.
+
+        Args:
+            index_file (str): Path of the .info file.
+        Returns:
+            List[str]: Paths of the data files.
+        """
+        with open(index_file, "r", errors="replace") as f:
+            content = f.read()
+        data_files = set()
+        for block in info_blocks(content):
+            if len(block) < 3:
+                continue
+            data_path = osp.join(osp.dirname(index_file), block[-1].split(", ")[0])
+            base = osp.splitext(data_path)[0]
+            for ext in DATA_EXTENSIONS:
+                if osp.exists(base + ext):
+                    data_files.add(base + ext)
+        return sorted(data_files)
+
+    @staticmethod
+    def canonical(value: Any, depth: int = 0) -> Any:
+        """
+        Convert settings to a json serializable form that does not depend on
+        object identities, e.g. the TargetValues of a testbed.
+
+        Args:
+            value: The settings.
+            depth (int): Nesting depth, deeper values are replaced by their type.
+        Returns:
+            The settings as nested lists, dicts and primitives.
+        """
+        if value is None or isinstance(value, (bool, int, float, str)):
+            return value
+        if depth > 8:
+            return type(value).__qualname__
+        if isinstance(value, np.ndarray):
+            return value.tolist()
+        if isinstance(value, np.generic):
+            return value.item()
+        if isinstance(value, dict):
+            return sorted(
+                [str(k), DataSetCache.canonical(v, depth + 1)] for k, v in value.items()
+            )
+        if isinstance(value, (list, tuple, set, frozenset)):
+            items = [DataSetCache.canonical(v, depth + 1) for v in value]
+            return (
+                sorted(items, key=repr)
+                if isinstance(value, (set, frozenset))
+                else items
+            )
+        if hasattr(value, "__dict__"):
+            return [
+                type(value).__qualname__,
+                DataSetCache.canonical(vars(value), depth + 1),
+            ]
+        return repr(value)
+
+    @staticmethod
+    def testbed(index_file: str):
+        """
+        Get the testbed cocopp parses the DataSets of an .info file with.
+        As when parsing, the testbed of the file's suite is loaded if there is
+        no current testbed.
+
+        Args:
+            index_file (str): Path of the .info file.
+        Returns:
+            The testbed, None if it cannot be loaded.
+        """
+        if not testbedsettings.current_testbed:
+            with open(index_file, "r", errors="replace") as f:
+                header = dict(INFO_ENTRY_PATTERN.findall(f.readline()))
+            try:
+                testbedsettings.load_current_testbed(
+                    header.get("suite", "").strip("'"), pproc.TargetValues
+                )
+            except ValueError:
+                # Parsing raises for unknown suites, the entry is never stored
+                return None
+        return testbedsettings.current_testbed
+
+    def settings(self, index_file: str) -> str:
+        """
+        Describe the settings the DataSets of an .info file are parsed with.
+
+        Args:
+            index_file (str): Path of the .info file.
+        Returns:
+            str: The testbed and suite info in canonical json form.
+        """
+        settings = [DataSetCache.testbed(index_file), self.suite_info]
+        return json.dumps(DataSetCache.canonical(settings))
+
+    def key(self, index_file: str, alg_name: Optional[str] = None) -> str:
+        """
+        Compute the cache key of an .info file.
+
+        Args:
+            index_file (str): Path of the .info file.
+            alg_name (Optional[str]): Algorithm name cocopp assigns to the DataSets.
+        Returns:
+            str: The cache key.
+        """
+        digest = hashlib.sha256()
+        for part in [
+            cocopp.__version__,
+            self.key_type,
+            alg_name,
+            osp.abspath(index_file),
+            self.settings(index_file),
+        ]:
+            digest.update(f"{part}\0".encode())
+        for filepath in [index_file] + DataSetCache.data_files(index_file):
+            if self.key_type == "mtime":
+                stat = os.stat(filepath)
+                digest.update(
+                    f"{filepath}\0{stat.st_size}\0{stat.st_mtime_ns}\0".encode()
+                )
+            else:
+                with open(filepath, "rb") as f:
+                    for chunk in iter(lambda: f.read(1 << 20), b""):
+                        digest.update(chunk)
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return osp.join(self.cache_dir, f"{key}.pickle")
+
+    def load(self, key: str) -> Optional[List[pproc.DataSet]]:
+        """
+        Load cached DataSets, marking the entry as recently used.
+
+        Args:
+            key (str): The cache key.
+        Returns:
+            Optional[List[pproc.DataSet]]: The DataSets, None if not cached.
+        """
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                datasets = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            return None
+        os.utime(path)
+        return datasets
+
+    def store(self, key: str, datasets: List[pproc.DataSet]):
+        """
+        Store DataSets and evict the least recently used entries if necessary.
+
+        Args:
+            key (str): The cache key.
+            datasets (List[pproc.DataSet]): The DataSets parsed from an .info file.
+        """
+        path = self._path(key)
+        # Write to a temporary file first, so readers never see partial entries
+        with open(f"{path}.tmp", "wb") as f:
+            pickle.dump(datasets, f)
+        os.replace(f"{path}.tmp", path)
+        self.evict()
+
+    def evict(self):
+        """
+        Remove the least recently used entries until the cache fits into max_bytes.
+        """
+        entries = []
+        for filename in os.listdir(self.cache_dir):
+            if filename.endswith(".pickle"):
+                stat = os.stat(osp.join(self.cache_dir, filename))
+                entries.append((stat.st_mtime_ns, stat.st_size, filename))
+        total = sum(size for _, size, _ in entries)
+        for _, size, filename in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            os.remove(osp.join(self.cache_dir, filename))
+            total -= size
+
+    def process_index_file(
+        self, dsl: pproc.DataSetList, index_file: str, alg_name: Optional[str] = None
+    ):
+        """
+        Replacement for DataSetList.processIndexFile that reads from the cache.
+        """
+        key = self.key(index_file, alg_name)
+        datasets = self.load(key)
+        if datasets is None:
+            self.misses += 1
+            # Parse into an empty list to capture the DataSets of this file only
+            parsed = pproc.DataSetList()
+            self._process_index_file(parsed, index_file, alg_name)
+            datasets = list(parsed)
+            self.store(key, datasets)
+        else:
+            # The key loaded the testbed, as parsing a DataSet would have
+            self.hits += 1
+        for dataset in datasets:
+            dsl.append(dataset)
+
+    @contextmanager
+    def patch(self) -> Iterator["DataSetCache"]:
+        """
+        Use the cache for all .info files cocopp reads within the context.
+        """
+        self._process_index_file = pproc.DataSetList.processIndexFile
+        cache = self
+
+        def process_index_file(dsl, index_file, alg_name=None):
+            cache.process_index_file(dsl, index_file, alg_name)
+
+        pproc.DataSetList.processIndexFile = process_index_file  # type: ignore[method-assign]
+        try:
+            yield self
+        finally:
+            pproc.DataSetList.processIndexFile = self._process_index_file  # type: ignore[method-assign]
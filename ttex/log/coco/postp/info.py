@@ -1,3 +1,4 @@
+import copy
 from dataclasses import dataclass
 from typing import List
 from cocopp.dataformatsettings import BBOBNewDataFormat
@@ -44,3 +45,34 @@ class SuiteInfo:
         # replace 0 with 1 to avoid having 0 dimensions in postp
         all_dims = [1 if dim == 0 else dim for dim in all_dims]
         self.dimensions = sorted(list(set(all_dims)))
+
+    def subset(
+        self, func_ids: Optional[List[int]] = None, dims: Optional[List[int]] = None
+    ) -> "SuiteInfo":
+        """
+        Get a copy restricted to some functions and dimensions.
+
+        Args:
+            func_ids (Optional[List[int]]): Functions to keep, None for all.
+            dims (Optional[List[int]]): Dimensions to keep (as in `dimensions`),
+                None for all.
+        Returns:
+            SuiteInfo: The restricted suite, without functions that have no
+                dimension left.
+        """
+        function_infos = []
+        for info in self.function_infos:
+            if func_ids is not None and info.func_id not in func_ids:
+                continue
+            info_dims = [
+                dim for dim in info.dims if dims is None or max(dim, 1) in dims
+            ]
+            if info_dims:
+                function_infos.append(
+                    FunctionInfo(info.func_id, info.name, info.long_name, info_dims)
+                )
+        suite_info = copy.copy(self)
+        suite_info.function_infos = function_infos
+        all_dims = [dim for info in function_infos for dim in info.dims]
+        suite_info.dimensions = sorted(set(1 if dim == 0 else dim for dim in all_dims))
+        return suite_info
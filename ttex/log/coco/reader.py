@@ -0,0 +1,311 @@
+import io
+import mmap
+import os
+import os.path as osp
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+from ttex.log.coco.binary_sink import INDEX_SUFFIX, read_binary_blocks
+from ttex.log.coco.merge_shards import info_blocks
+
+# Leading columns of .dat/.tdat lines, followed by the coordinates x1, x2, ...
+TRAJECTORY_COLUMNS = ["f_evals", "g_evals", "best_diff_opt", "mf", "best_mf"]
+INFO_ENTRY_PATTERN = re.compile(r"(\w+) = ('[^']*'|[^,]*)")
+
+
+def trajectory_dtype(dim: int) -> np.dtype:
+    """
+    Get the structured dtype of a trajectory with `dim` coordinates.
+
+    Args:
+        dim (int): Number of coordinates.
+    Returns:
+        np.dtype: The structured dtype, with the coordinates as subarray field "x".
+    """
+    return np.dtype(
+        [
+            ("f_evals", np.int64),
+            ("g_evals", np.int64),
+            ("best_diff_opt", np.float64),
+            ("mf", np.float64),
+            ("best_mf", np.float64),
+            ("x", np.float64, (dim,)),
+        ]
+    )
+
+
+def to_trajectory(values: np.ndarray) -> np.ndarray:
+    """
+    Convert the rows x columns values of a run to a structured array.
+
+    Args:
+        values (np.ndarray): Values of the .dat/.tdat lines of a run.
+    Returns:
+        np.ndarray: Structured array with dtype `trajectory_dtype`.
+    """
+    n_leading = len(TRAJECTORY_COLUMNS)
+    trajectory = np.empty(
+        len(values), dtype=trajectory_dtype(values.shape[1] - n_leading)
+    )
+    for idx, column in enumerate(TRAJECTORY_COLUMNS):
+        trajectory[column] = values[:, idx]
+    trajectory["x"] = values[:, n_leading:]
+    return trajectory
+
+
+def parse_rows(data: bytes) -> np.ndarray:
+    """
+    Parse the data lines of a run into a rows x columns array.
+    Lines with fewer coordinates, e.g. if the dimension changed during the run,
+    are padded with nan.
+
+    Args:
+        data (bytes): Data lines, each terminated by a newline.
+    Returns:
+        np.ndarray: The parsed values.
+    """
+    buffer = np.frombuffer(data, dtype=np.uint8)
+    line_ends = np.flatnonzero(buffer == ord("\n"))
+    # Columns are separated by single spaces, lines without x end with a space
+    spaces = np.diff(
+        np.searchsorted(np.flatnonzero(buffer == ord(" ")), line_ends), prepend=0
+    )
+    n_cols = spaces + 1 - (buffer[line_ends - 1] == ord(" "))
+    n_rows = len(line_ends)
+    if (n_cols == n_cols[0]).all():
+        # Tokenized and converted in C
+        return np.loadtxt(io.BytesIO(data), dtype=np.float64, ndmin=2)
+    lines = [line.split() for line in data.splitlines()]
+    padded = np.full((n_rows, n_cols.max()), np.nan)
+    for idx, line in enumerate(lines):
+        padded[idx, : len(line)] = np.array(line, dtype=np.float64)
+    return padded
+
+
+def run_segments(filepath: str) -> List[Tuple[int, int]]:
+    """
+    Find the byte ranges of the data lines of each run in a .dat/.tdat file.
+    The file is memory-mapped, runs start with a header line (starting with %).
+    Runs without data lines are skipped, as they are not listed in the .info files.
+
+    Args:
+        filepath (str): Path of the .dat/.tdat file.
+    Returns:
+        List[Tuple[int, int]]: Start and end offset of each run.
+    """
+    if osp.getsize(filepath) == 0:
+        return []
+    with open(filepath, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            buffer = np.frombuffer(mm, dtype=np.uint8)
+            newlines = np.flatnonzero(buffer == ord("\n"))
+            line_starts = np.concatenate([[0], newlines + 1])
+            line_starts = line_starts[line_starts < len(buffer)]
+            headers = line_starts[buffer[line_starts] == ord("%")]
+            # Data lines start after the header line, up to the next header
+            line_ends = np.append(newlines, len(buffer))
+            starts = line_ends[np.searchsorted(line_ends, headers)] + 1
+            ends = np.append(headers[1:], len(buffer))
+            segments = [
+                (int(start), int(end))
+                for start, end in zip(starts, ends)
+                if start < end
+            ]
+            del buffer  # release the buffer before closing the map
+    return segments
+
+
+def read_trajectories(filepath: str) -> List[np.ndarray]:
+    """
+    Read all runs of a .dat/.tdat file.
+    If only the binary files of `COCOBinaryHandler` exist, they are read instead.
+
+    Args:
+        filepath (str): Path of the .dat/.tdat file.
+    Returns:
+        List[np.ndarray]: Structured array of each run, see `trajectory_dtype`.
+    """
+    if not osp.exists(filepath) and osp.exists(filepath + INDEX_SUFFIX):
+        trajectories: List[List[np.ndarray]] = []
+        for _, block in read_binary_blocks(filepath):
+            if isinstance(block, str):
+                trajectories.append([])
+            else:
+                trajectories[-1].append(block)
+        return [
+            to_trajectory(np.concatenate(blocks)) for blocks in trajectories if blocks
+        ]
+    segments = run_segments(filepath)
+    if not segments:
+        return []
+    with open(filepath, "rb") as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return [to_trajectory(parse_rows(mm[start:end])) for start, end in segments]
+
+
+@dataclass(frozen=True)
+class COCORun:
+    """
+    A run listed in an .info file.
+    """
+
+    suite: str
+    algo: str
+    func: int
+    dim: int
+    inst: int
+    f_evals: int
+    best_target: float
+    info_path: str
+    data_path: str  # Path of the .tdat file
+    run_idx: int  # Index of the run within its data files
+
+    def data_file(self, file_type: str = "dat") -> str:
+        """
+        Get the path of the .dat or .tdat file of the run.
+
+        Args:
+            file_type (str): "dat" or "tdat".
+        Returns:
+            str: Path of the data file.
+        """
+        return f"{osp.splitext(self.data_path)[0]}.{file_type}"
+
+
+def parse_info(info_path: str) -> List[COCORun]:
+    """
+    Parse the runs listed in an .info file.
+
+    Args:
+        info_path (str): Path of the .info file.
+    Returns:
+        List[COCORun]: The runs, in the order of their data lines.
+    """
+    with open(info_path, "r") as f:
+        content = f.read()
+    runs: List[COCORun] = []
+    # Runs already listed for each data file
+    run_counts: Dict[str, int] = {}
+    for block in info_blocks(content):
+        if len(block) < 3:
+            # Run without data line, e.g. if it was not ended
+            continue
+        header = {
+            key: value.strip("'") for key, value in INFO_ENTRY_PATTERN.findall(block[0])
+        }
+        entries = block[-1].split(", ")
+        data_path = osp.join(osp.dirname(info_path), entries[0])
+        for entry in entries[1:]:
+            inst, _, result = entry.partition(":")
+            f_evals, _, best_target = result.partition("|")
+            run_idx = run_counts.get(data_path, 0)
+            run_counts[data_path] = run_idx + 1
+            runs.append(
+                COCORun(
+                    suite=header["suite"],
+                    algo=header["algId"],
+                    func=int(header["funcId"]),
+                    dim=int(header["DIM"]),
+                    inst=int(inst),
+                    f_evals=int(f_evals),
+                    best_target=float(best_target),
+                    info_path=info_path,
+                    data_path=data_path,
+                    run_idx=run_idx,
+                )
+            )
+    return runs
+
+
+class COCOResultReader:
+    """
+    Reads back the results of the COCO logger, e.g. an exp_id/suite/algo tree.
+    The .info files are indexed on first use, trajectories are only read
+    when they are requested and cached per data file.
+    """
+
+    def __init__(self, root_dir: str):
+        """
+        Args:
+            root_dir (str): Directory to search for .info files.
+        """
+        self.root_dir = root_dir
+        self._index: Optional[Dict[Tuple[int, int, int], List[COCORun]]] = None
+        self._trajectories: Dict[str, List[np.ndarray]] = {}
+
+    @property
+    def index(self) -> Dict[Tuple[int, int, int], List[COCORun]]:
+        """
+        Runs by (function, dimension, instance), built on first access.
+        """
+        if self._index is None:
+            self._index = {}
+            for dirpath, _, filenames in os.walk(self.root_dir):
+                for filename in sorted(filenames):
+                    if filename.endswith(".info"):
+                        for run in parse_info(osp.join(dirpath, filename)):
+                            key = (run.func, run.dim, run.inst)
+                            self._index.setdefault(key, []).append(run)
+        return self._index
+
+    def runs(
+        self,
+        func: Optional[int] = None,
+        dim: Optional[int] = None,
+        inst: Optional[int] = None,
+    ) -> List[COCORun]:
+        """
+        Get the runs matching the given function, dimension and instance.
+
+        Args:
+            func (Optional[int]): Function id, None for all functions.
+            dim (Optional[int]): Dimension, None for all dimensions.
+            inst (Optional[int]): Instance, None for all instances.
+        Returns:
+            List[COCORun]: The matching runs.
+        """
+        if func is not None and dim is not None and inst is not None:
+            return list(self.index.get((func, dim, inst), []))
+        return [
+            run
+            for key, runs in sorted(self.index.items())
+            if all(v is None or v == k for k, v in zip(key, (func, dim, inst)))
+            for run in runs
+        ]
+
+    def trajectory(self, run: COCORun, file_type: str = "dat") -> np.ndarray:
+        """
+        Get the trajectory of a run.
+
+        Args:
+            run (COCORun): The run.
+            file_type (str): "dat" for the target-triggered records,
+                "tdat" for the evaluation-triggered records.
+        Returns:
+            np.ndarray: Structured array, see `trajectory_dtype`.
+        """
+        data_file = run.data_file(file_type)
+        if data_file not in self._trajectories:
+            self._trajectories[data_file] = read_trajectories(data_file)
+        trajectories = self._trajectories[data_file]
+        assert run.run_idx < len(
+            trajectories
+        ), f"Run {run.run_idx} not found in {data_file}"
+        return trajectories[run.run_idx]
+
+    def trajectories(
+        self, func: int, dim: int, inst: int, file_type: str = "dat"
+    ) -> List[np.ndarray]:
+        """
+        Get the trajectories of all runs of a function, dimension and instance.
+
+        Args:
+            func (int): Function id.
+            dim (int): Dimension.
+            inst (int): Instance.
+            file_type (str): "dat" or "tdat".
+        Returns:
+            List[np.ndarray]: Structured array of each run.
+        """
+        return [self.trajectory(run, file_type) for run in self.runs(func, dim, inst)]
@@ -1,19 +1,22 @@
 from ttex.log.formatter import StrHeader, StrRecord
 import os.path as osp
 from ttex.log.coco import COCOState
+from typing import Optional
 from uuid import uuid4
 
 
 class COCOInfoHeader(StrHeader):
     template = "suite = '{suite}', funcId = {funcId}, DIM = {dim}, Precision = {prec:.3e}, algId = '{algId}', coco_version = '{coco_version}', logger = '{logger}', data_format = '{data_format}'\n% {alg_info}"
 
-    def __init__(self, state: COCOState):
+    def __init__(self, state: COCOState, record: Optional["COCOInfoRecord"] = None):
         """
         Initialize a COCOInfoHeader with the given COCOState and COCOStart.
 
         Args:
             state (COCOState): The current state of the COCO logging.
-            coco_log (COCOStart): The COCO start log containing problem and algorithm details.
+            record (Optional[COCOInfoRecord]): Data line of the run, written right
+                after the header. Runs of other dimensions can share the .info file,
+                so the header is only written together with its data line.
         """
         assert (
             state.coco_start is not None
@@ -38,6 +41,7 @@ class COCOInfoHeader(StrHeader):
             f"f{self.funcId}_i{self.inst}.info",
         )
         self._uuid = str(uuid4())  # always emit header
+        self.record = record
 
     @property
     def filepath(self) -> str:
@@ -59,14 +63,17 @@ class COCOInfoHeader(StrHeader):
         """
         return self._uuid
 
+    def emit(self) -> bool:
+        return self.record is None or self.record.emit()
+
     def __str__(self) -> str:
         """
-        Format the COCOInfoHeader as a string.
+        Format the COCOInfoHeader as a string, followed by its data line if any.
 
         Returns:
             str: Formatted COCOInfoHeader string.
         """
-        return COCOInfoHeader.template.format(
+        header = COCOInfoHeader.template.format(
             suite=self.suite,
             funcId=self.funcId,
             dim=max(self.dim, 1),  # avoid 0 dimensions for postprocessing
@@ -77,9 +84,13 @@ class COCOInfoHeader(StrHeader):
             data_format=self.data_format,
             alg_info=self.alg_info,
         )
+        if self.record is None:
+            return header
+        return f"{header}\n{self.record}"
 
 
 class COCOInfoRecord(StrRecord):
+    __slots__ = ("file_path", "inst", "f_evals", "best_target")
     template = "{file_path}, {inst}:{f_evals}|{best_target:.1e}"
 
     def __init__(self, state: COCOState):
@@ -2,28 +2,129 @@ import os.path as osp
 from ttex.log.formatter import StrHeader, StrRecord
 from ttex.log.coco import COCOState
 import math
+import numpy as np
+from functools import lru_cache
+from typing import List, Optional, Sequence
 from uuid import uuid4
 
 
 class COCOLogRecord(StrRecord):
+    __slots__ = (
+        "x",
+        "dim",
+        "mf",
+        "f_evals",
+        "g_evals",
+        "best_diff_opt",
+        "best_mf",
+        "last_imp",
+    )
     template = (
         "{f_evals} {g_evals} {best_diff_opt:+.9e} {mf:+.9e} {best_mf:+.9e} {x_str}"
     )
 
-    def __init__(self, state: COCOState):
+    def __init__(self, state: COCOState, idx: Optional[int] = None):
+        """
+        Copy the evaluation values of the current state.
+
+        Args:
+            state (COCOState): The current state of the COCO logging.
+            idx (Optional[int]): Index into the last COCOEvalBatch. If given,
+                the record is built from that evaluation of the batch instead
+                of the last evaluation.
+        """
+        self.g_evals = state.g_evals
+        self.best_diff_opt: Optional[float]
+        self.last_imp: Optional[float]
+        if idx is not None:
+            batch = state.last_batch
+            assert batch is not None, "idx requires a processed COCOEvalBatch event"
+            # Copied, the record may be formatted later, e.g. by AsyncQueueHandler
+            self.x = batch.x[idx].copy()
+            self.dim = len(self.x)
+            self.mf = float(batch.mf[idx])
+            self.f_evals = int(batch.f_evals[idx])
+            self.best_diff_opt = float(batch.best_diff_opt[idx])
+            self.best_mf = float(batch.best_mf[idx])
+            self.last_imp = float(batch.last_imp[idx])
+            return
         assert hasattr(
             state, "last_eval"
         ), "COCOLogRecord requires at least one COCOEval event"
         assert state.last_eval is not None
-        self.x = state.last_eval.x
+        # Copied, the record may be formatted later, e.g. by AsyncQueueHandler
+        self.x = np.array(state.last_eval.x, dtype=float)
         self.dim = len(self.x)
         self.mf = state.last_eval.mf
         self.f_evals = state.f_evals
-        self.g_evals = state.g_evals
         self.best_diff_opt = state.best_diff_opt
         self.best_mf = state.best_mf
         self.last_imp = state.last_imp
 
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def line_format(dim: int) -> str:
+        """
+        Get the printf-style format of a line for a given dimension.
+        Renders the same line as `template`, with one field per coordinate.
+        Args:
+            dim (int): Number of coordinates.
+        Returns:
+            str: The line format.
+        """
+        return "%s %s %+.9e %+.9e %+.9e " + " ".join(["%+.4e"] * dim)
+
+    @staticmethod
+    def format_lines(
+        f_evals: Sequence[int],
+        g_evals: Sequence[int],
+        best_diff_opt: np.ndarray,
+        mf: np.ndarray,
+        best_mf: np.ndarray,
+        x: np.ndarray,
+    ) -> List[str]:
+        """
+        Format many records at once from arrays, one line per evaluation.
+        The lines are the same as formatting a COCOLogRecord per evaluation.
+        Args:
+            f_evals (Sequence[int]): Function evaluation counts.
+            g_evals (Sequence[int]): Constraint evaluation counts.
+            best_diff_opt (np.ndarray): Best differences to optimal value.
+            mf (np.ndarray): Measured fitness values.
+            best_mf (np.ndarray): Best measured fitness values.
+            x (np.ndarray): N x D evaluated points.
+        Returns:
+            List[str]: Formatted lines.
+        """
+        x = np.asarray(x, dtype=float)
+        line_format = COCOLogRecord.line_format(x.shape[1])
+        # One row of floats per line, formatted with a single operation each
+        rows = np.column_stack((best_diff_opt, mf, best_mf, x)).tolist()
+        return [line_format % (f, g, *row) for f, g, row in zip(f_evals, g_evals, rows)]
+
+    @classmethod
+    def format_records(cls, records: Sequence[StrRecord]) -> str:
+        """
+        Format several records of the same dimension with `format_lines`.
+        """
+        log_records = [record for record in records if isinstance(record, cls)]
+        if len(log_records) != len(records) or not log_records:
+            return super().format_records(records)
+        dim = log_records[0].dim
+        if any(record.dim != dim for record in log_records):
+            return super().format_records(records)
+        lines = COCOLogRecord.format_lines(
+            [record.f_evals for record in log_records],
+            [record.g_evals for record in log_records],
+            np.array([record.best_diff_opt for record in log_records], dtype=float),
+            np.array([record.mf for record in log_records], dtype=float),
+            np.array([record.best_mf for record in log_records], dtype=float),
+            np.array([record.x for record in log_records], dtype=float).reshape(
+                len(log_records), dim
+            ),
+        )
+        return "\n".join(lines)
+
     @staticmethod
     def get_exp_bin(n_bins: int, val: float) -> float:
         """
@@ -49,14 +150,13 @@ class COCOLogRecord(StrRecord):
         Returns:
             str: Formatted COCO step string.
         """
-        x_str = " ".join(f"{val:+.4e}" for val in self.x)
-        return COCOLogRecord.template.format(
-            f_evals=self.f_evals,
-            g_evals=self.g_evals,
-            best_diff_opt=self.best_diff_opt,
-            mf=self.mf,
-            best_mf=self.best_mf,
-            x_str=x_str,
+        return COCOLogRecord.line_format(self.dim) % (
+            self.f_evals,
+            self.g_evals,
+            self.best_diff_opt,
+            self.mf,
+            self.best_mf,
+            *self.x,
         )
 
 
@@ -1,18 +1,22 @@
 from ttex.log.coco.record import COCOLogRecord, COCOLogHeader
+from ttex.log.coco.record.triggers import TargetTriggerSchedule
 from ttex.log.coco import COCOState
 import math
-from typing import Optional
+from typing import Optional, Tuple
 
 
 class COCOdatRecord(COCOLogRecord):
-    def __init__(self, state: COCOState):
+    __slots__ = ("reason", "best_target")
+
+    def __init__(self, state: COCOState, idx: Optional[int] = None):
         """
         Initialize a COCO dat record with the current state.
 
         Args:
             state (COCOState): The current state of the COCO logging.
+            idx (Optional[int]): Index into the last COCOEvalBatch, if any.
         """
-        super().__init__(state)
+        super().__init__(state, idx)
         self.reason: Optional[str] = None
         self.best_target: Optional[
             float
@@ -22,94 +26,211 @@ class COCOdatRecord(COCOLogRecord):
     def ceil_to_target(value: float, improvement_step: float = 1e-5) -> float:
         return math.ceil(value / improvement_step) * improvement_step
 
-    def improvement_trigger(self, improvement_step: float) -> bool:
+    @staticmethod
+    def improvement_target(
+        mf: float, last_imp: float, improvement_step: float
+    ) -> Optional[float]:
         """
-        Check if a new target has been reached based on the last improvement.
+        Get the new linear target reached by the last improvement.
         Args:
+            mf (float): Measured fitness of the evaluation.
+            last_imp (float): Improvement of the evaluation.
             improvement_step (float): The step size for improvement targets.
         Returns:
-            bool: True if a new target has been reached, False otherwise.
+            Optional[float]: The new target reached, None if no new target has been reached.
         """
         assert (
-            self.last_imp is not None and self.last_imp > 0
+            last_imp is not None and last_imp > 0
         ), "last_imp must be positive to check for improvement"
-        new_target_reached = COCOdatRecord.ceil_to_target(self.mf, improvement_step)
+        new_target_reached = COCOdatRecord.ceil_to_target(mf, improvement_step)
         prev_target_reached = COCOdatRecord.ceil_to_target(
-            self.mf + self.last_imp, improvement_step
+            mf + last_imp, improvement_step
         )
         if new_target_reached < prev_target_reached:
             # New target reached.
-            self.best_target = new_target_reached
-            return True
-        else:
-            return False
+            return new_target_reached
+        return None
 
-    def log_target_trigger(
-        self, number_target_triggers: int, target_precision: float = 1e-8
-    ) -> bool:
+    @staticmethod
+    def log_target(
+        best_diff_opt: float,
+        last_imp: float,
+        number_target_triggers: int,
+        target_precision: float = 1e-8,
+        target_schedule: Optional[TargetTriggerSchedule] = None,
+    ) -> Optional[float]:
+        """
+        Get the new log target reached by the last improvement.
+        Args:
+            best_diff_opt (float): Best difference to optimal value.
+            last_imp (float): Improvement of the evaluation.
+            number_target_triggers (int): Number of target triggers between each power of 10.
+            target_precision (float): Precision threshold for considering proximity to the optimum.
+            target_schedule (Optional[TargetTriggerSchedule]): Precomputed target bins
+                to use instead of computing them for this evaluation.
+        Returns:
+            Optional[float]: The new target reached, None if no new target has been reached.
+        """
         assert (
-            self.best_diff_opt is not None
+            best_diff_opt is not None
         ), "best_diff_opt must be set to check for log targets"
-        if self.best_diff_opt < target_precision:
+        if best_diff_opt < target_precision:
             # No best distance to optimum recorded or already within precision of optimum
-            return False
-        else:  # Check if a new target has been reached based on the last improvement.
-            assert (
-                self.last_imp is not None and self.last_imp > 0
-            ), "last_imp must be positive to check for target triggers"
-
-            new_value = COCOLogRecord.get_exp_bin(
-                number_target_triggers, self.best_diff_opt
-            )
-            prev_value = COCOLogRecord.get_exp_bin(
-                number_target_triggers, self.best_diff_opt + self.last_imp
-            )
-            if new_value < prev_value:
-                self.best_target = new_value
-                return True
-            else:
-                return False
+            return None
+        # Check if a new target has been reached based on the last improvement.
+        assert (
+            last_imp is not None and last_imp > 0
+        ), "last_imp must be positive to check for target triggers"
 
-    def emit(
-        self,
+        if target_schedule is not None:
+            new_bin = target_schedule.bin_index(best_diff_opt)
+            prev_bin = target_schedule.bin_index(best_diff_opt + last_imp)
+            if new_bin < prev_bin:
+                return target_schedule.target(new_bin)
+            return None
+
+        new_value = COCOLogRecord.get_exp_bin(number_target_triggers, best_diff_opt)
+        prev_value = COCOLogRecord.get_exp_bin(
+            number_target_triggers, best_diff_opt + last_imp
+        )
+        if new_value < prev_value:
+            return new_value
+        return None
+
+    @staticmethod
+    def trigger(
+        f_evals: int,
+        mf: float,
+        best_diff_opt: Optional[float],
+        last_imp: Optional[float],
         improvement_step: float = 1e-5,
         number_target_triggers: int = 20,
         target_precision: float = 1e-8,
-    ) -> bool:  # type: ignore[override]
+        target_schedule: Optional[TargetTriggerSchedule] = None,
+    ) -> Tuple[Optional[str], Optional[float]]:
         """
-        Determine if the current record should be emitted based on target triggers.
+        Decide if an evaluation emits a record, without creating the record.
         If possible, uses log target triggers, otherwise uses linear targets based on improvement
         Args:
+            f_evals (int): Function evaluation count.
+            mf (float): Measured fitness of the evaluation.
+            best_diff_opt (Optional[float]): Best difference to optimal value.
+            last_imp (Optional[float]): Improvement of the evaluation.
             improvement_step (float): Step size for improvement targets.
             number_target_triggers (int): Number of target triggers between each power of 10.
             target_precision (float): Precision threshold for considering proximity to the optimum.
+            target_schedule (Optional[TargetTriggerSchedule]): Precomputed target bins for
+                the log target triggers.
         Returns:
-            bool: True if the record should be emitted, False otherwise.
+            Tuple[Optional[str], Optional[float]]: The reason of the decision and the
+                best target reached. The record is emitted if the best target is not None.
         """
-        if self.f_evals <= 0:
-            return False
-        elif self.f_evals == 1:
+        if f_evals <= 0:
+            return None, None
+        elif f_evals == 1:
             # Always log the first evaluation
-            self.reason = "first"
-            self.best_target = (
-                self.mf
-            )  # This is not super meaningful, but we need to set it to something just for info logging
-            return True
-        elif self.last_imp is None or self.last_imp <= 0:
-            self.reason = "noimp"
+            # The target is not super meaningful, but we need to set it to something just for info logging
+            return "first", mf
+        elif last_imp is None or last_imp <= 0:
             # No improvement in the last evaluation, therefore has not hit any new targets
-            return False
+            return "noimp", None
         elif (
             number_target_triggers > 0 and target_precision > 0
         ):  # Prefer log target triggers if possible
-            self.reason = "target"
-            return self.log_target_trigger(number_target_triggers, target_precision)
+            assert best_diff_opt is not None
+            return "target", COCOdatRecord.log_target(
+                best_diff_opt,
+                last_imp,
+                number_target_triggers,
+                target_precision,
+                target_schedule,
+            )
         elif improvement_step > 0:
-            self.reason = "imp"
-            return self.improvement_trigger(improvement_step)
+            return "imp", COCOdatRecord.improvement_target(
+                mf, last_imp, improvement_step
+            )
         # No valid triggers set, so never emit
-        self.reason = "notrg"
-        return False
+        return "notrg", None
+
+    def improvement_trigger(self, improvement_step: float) -> bool:
+        """
+        Check if a new target has been reached based on the last improvement.
+        Args:
+            improvement_step (float): The step size for improvement targets.
+        Returns:
+            bool: True if a new target has been reached, False otherwise.
+        """
+        assert self.last_imp is not None
+        target = COCOdatRecord.improvement_target(
+            self.mf, self.last_imp, improvement_step
+        )
+        if target is not None:
+            self.best_target = target
+        return target is not None
+
+    def log_target_trigger(
+        self,
+        number_target_triggers: int,
+        target_precision: float = 1e-8,
+        target_schedule: Optional[TargetTriggerSchedule] = None,
+    ) -> bool:
+        """
+        Check if a new log target has been reached based on the last improvement.
+        Args:
+            number_target_triggers (int): Number of target triggers between each power of 10.
+            target_precision (float): Precision threshold for considering proximity to the optimum.
+            target_schedule (Optional[TargetTriggerSchedule]): Precomputed target bins
+                to use instead of computing them for this record.
+        Returns:
+            bool: True if a new target has been reached, False otherwise.
+        """
+        assert (
+            self.best_diff_opt is not None
+        ), "best_diff_opt must be set to check for log targets"
+        assert self.last_imp is not None
+        target = COCOdatRecord.log_target(
+            self.best_diff_opt,
+            self.last_imp,
+            number_target_triggers,
+            target_precision,
+            target_schedule,
+        )
+        if target is not None:
+            self.best_target = target
+        return target is not None
+
+    def emit(
+        self,
+        improvement_step: float = 1e-5,
+        number_target_triggers: int = 20,
+        target_precision: float = 1e-8,
+        target_schedule: Optional[TargetTriggerSchedule] = None,
+    ) -> bool:  # type: ignore[override]
+        """
+        Determine if the current record should be emitted based on target triggers.
+        See `trigger` for details.
+        Args:
+            improvement_step (float): Step size for improvement targets.
+            number_target_triggers (int): Number of target triggers between each power of 10.
+            target_precision (float): Precision threshold for considering proximity to the optimum.
+            target_schedule (Optional[TargetTriggerSchedule]): Precomputed target bins for
+                the log target triggers.
+        Returns:
+            bool: True if the record should be emitted, False otherwise.
+        """
+        self.reason, target = COCOdatRecord.trigger(
+            self.f_evals,
+            self.mf,
+            self.best_diff_opt,
+            self.last_imp,
+            improvement_step,
+            number_target_triggers,
+            target_precision,
+            target_schedule,
+        )
+        if target is not None:
+            self.best_target = target
+        return target is not None
 
 
 class COCOdatHeader(COCOLogHeader):
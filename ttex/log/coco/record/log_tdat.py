@@ -5,6 +5,8 @@ import math
 
 
 class COCOtdatRecord(COCOLogRecord):
+    __slots__ = ()
+
     @staticmethod
     def trigger_nth(number_evaluation_triggers: int, f_evals: int) -> bool:
         """
@@ -65,8 +67,6 @@ class COCOtdatRecord(COCOLogRecord):
         """
         if self.f_evals <= 0:
             return False
-        if base_evaluation_triggers is None:
-            base_evaluation_triggers = [1, 2, 5]
         if last_tdat_emit is not None:
             # This is the last evaluation before the end of the run
             if self.f_evals > last_tdat_emit:
@@ -74,14 +74,36 @@ class COCOtdatRecord(COCOLogRecord):
                 return True
             else:  # evaluation already emitted
                 return False
-        if self.f_evals == 1:
+        return COCOtdatRecord.triggered(
+            base_evaluation_triggers, number_evaluation_triggers, self.dim, self.f_evals
+        )
+
+    @staticmethod
+    def triggered(
+        base_evaluation_triggers: Optional[List[int]],
+        number_evaluation_triggers: int,
+        dimension: int,
+        f_evals: int,
+    ) -> bool:
+        """
+        Check if the evaluation count `f_evals` meets any of the evaluation triggers.
+        Args:
+            base_evaluation_triggers (Optional[List[int]]): List of base evaluation triggers.
+                Defaults to [1, 2, 5].
+            number_evaluation_triggers (int): Number of evaluation triggers.
+            dimension (int): Problem dimension.
+            f_evals (int): Current function evaluation count.
+        Returns:
+            bool: True if the trigger condition is met, False otherwise.
+        """
+        if base_evaluation_triggers is None:
+            base_evaluation_triggers = [1, 2, 5]
+        if f_evals == 1:
             # Always emit the first evaluation (unless it is also the last)
             return True
-        trigger_nth = COCOtdatRecord.trigger_nth(
-            number_evaluation_triggers, self.f_evals
-        )
+        trigger_nth = COCOtdatRecord.trigger_nth(number_evaluation_triggers, f_evals)
         trigger_base = COCOtdatRecord.base_eval(
-            base_evaluation_triggers, self.dim, self.f_evals
+            base_evaluation_triggers, dimension, f_evals
         )
         return trigger_nth or trigger_base
 
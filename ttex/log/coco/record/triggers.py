@@ -0,0 +1,201 @@
+from ttex.log.coco.record.log_tdat import COCOtdatRecord
+import numpy as np
+import math
+from typing import List, Optional
+
+
+class EvaluationTriggerSchedule:
+    """
+    Precomputed, sorted evaluation counts at which a .tdat record is emitted.
+    Combines the first evaluation, the `number_evaluation_triggers` per decade
+    and the base evaluation triggers of COCOtdatRecord for a given dimension.
+    The schedule is extended on demand when evaluation counts exceed it.
+    """
+
+    NO_TRIGGER = int(np.iinfo(np.int64).max)
+
+    def __init__(
+        self,
+        base_evaluation_triggers: Optional[List[int]] = None,
+        number_evaluation_triggers: int = 20,
+        dimension: int = 0,
+        decades: int = 7,
+    ):
+        """
+        Args:
+            base_evaluation_triggers (Optional[List[int]]): List of base evaluation triggers.
+                Defaults to [1, 2, 5].
+            number_evaluation_triggers (int): Number of evaluation triggers per decade.
+            dimension (int): Problem dimension.
+            decades (int): Number of decades of evaluations to precompute.
+        """
+        if base_evaluation_triggers is None:
+            base_evaluation_triggers = [1, 2, 5]
+        assert all(
+            base > 0 for base in base_evaluation_triggers
+        ), "base evaluation triggers must be positive"
+        self.base_evaluation_triggers = base_evaluation_triggers
+        self.number_evaluation_triggers = number_evaluation_triggers
+        self.dimension = dimension
+        self.decades = 0
+        self.triggers = np.array([], dtype=np.int64)
+        self._extend(decades)
+
+    @property
+    def horizon(self) -> int:
+        """All triggers up to (and including) this evaluation count are known."""
+        return 10**self.decades
+
+    def _extend(self, decades: int) -> None:
+        """
+        Compute all triggers up to 10**decades.
+        Candidates are generated with the same expressions as COCOtdatRecord uses,
+        so the schedule fires at exactly the same evaluation counts.
+        """
+        horizon = 10**decades
+        triggers = {1}
+        n = self.number_evaluation_triggers
+        if n > 0:
+            for exponent in range(n * decades + 1):
+                f_evals = math.floor(10 ** (exponent / n))
+                if COCOtdatRecord.trigger_nth(n, f_evals):
+                    triggers.add(f_evals)
+        if self.dimension > 0:
+            for base in self.base_evaluation_triggers:
+                f_evals = base * self.dimension
+                while f_evals <= horizon:
+                    triggers.add(f_evals)
+                    f_evals *= 10
+        self.triggers = np.array(sorted(triggers), dtype=np.int64)
+        self.decades = decades
+
+    def _ensure(self, f_evals: int) -> None:
+        decades = self.decades
+        while 10**decades < f_evals:
+            decades += 3
+        if decades > self.decades:
+            self._extend(decades)
+
+    def next_trigger(self, f_evals: int) -> int:
+        """
+        Get the smallest evaluation count >= f_evals that emits a record.
+        Args:
+            f_evals (int): Current function evaluation count.
+        Returns:
+            int: The next triggering evaluation count, NO_TRIGGER if there is none.
+        """
+        self._ensure(f_evals)
+        idx = int(np.searchsorted(self.triggers, f_evals, side="left"))
+        if idx == len(self.triggers):
+            if self.number_evaluation_triggers <= 0 and (
+                self.dimension <= 0 or not self.base_evaluation_triggers
+            ):
+                # Only the first evaluation triggers, there is no next trigger
+                return EvaluationTriggerSchedule.NO_TRIGGER
+            # Beyond the horizon, extend once more
+            self._extend(self.decades + 3)
+            return self.next_trigger(f_evals)
+        return int(self.triggers[idx])
+
+    def is_trigger(self, f_evals: int) -> bool:
+        """
+        Check if the evaluation count `f_evals` emits a record.
+        Args:
+            f_evals (int): Current function evaluation count.
+        Returns:
+            bool: True if the trigger condition is met, False otherwise.
+        """
+        return f_evals > 0 and self.next_trigger(f_evals) == f_evals
+
+    def triggered(self, f_evals: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of `is_trigger`.
+        Args:
+            f_evals (np.ndarray): Sorted function evaluation counts.
+        Returns:
+            np.ndarray: Boolean mask, True where a record is emitted.
+        """
+        if len(f_evals) == 0:
+            return np.zeros(0, dtype=bool)
+        self._ensure(int(f_evals[-1]))
+        idx = np.searchsorted(self.triggers, f_evals, side="left")
+        idx = np.minimum(idx, len(self.triggers) - 1)
+        return self.triggers[idx] == f_evals
+
+
+class TargetTriggerSchedule:
+    """
+    Target bins of the log target triggers of COCOdatRecord, resolved for
+    whole batches at once. There are `number_target_triggers` bins between
+    each power of 10, bin k ending at the target 10**(k/number_target_triggers).
+    Values are binned with the same expression as COCOLogRecord.get_exp_bin,
+    so values on or next to a bin edge land in the same bin.
+    """
+
+    def __init__(
+        self, number_target_triggers: int = 20, target_precision: float = 1e-8
+    ):
+        """
+        Args:
+            number_target_triggers (int): Number of target triggers between each power of 10.
+            target_precision (float): Smallest target of interest.
+        """
+        if number_target_triggers <= 0:
+            raise ValueError("Number of bins must be positive")
+        self.number_target_triggers = number_target_triggers
+        self.target_precision = target_precision
+
+    def target(self, exponent: int) -> float:
+        """
+        Get the target (bin edge) for a given bin exponent.
+        Same value as COCOLogRecord.get_exp_bin for values in that bin.
+        """
+        return 10 ** (exponent / self.number_target_triggers)
+
+    def bin_index(self, value: float) -> int:
+        """
+        Get the bin exponent of a positive value,
+        i.e. ceil(number_target_triggers * log10(value)).
+        Args:
+            value (float): Positive value to bin.
+        Returns:
+            int: The bin exponent.
+        """
+        return math.ceil(self.number_target_triggers * math.log10(value))
+
+    def bin_indices(self, values: np.ndarray) -> np.ndarray:
+        """
+        Vectorized version of `bin_index`.
+        Non-positive values are in bin -inf, infinite values in bin inf.
+        Args:
+            values (np.ndarray): Values to bin.
+        Returns:
+            np.ndarray: The bin exponents, as floats.
+        """
+        values = np.asarray(values, dtype=float)
+        n = self.number_target_triggers
+        with np.errstate(divide="ignore", invalid="ignore"):
+            scaled = n * np.log10(np.where(values > 0, values, 0.0))
+        bins = np.ceil(scaled)
+        # np.log10 may differ from math.log10 in the last bit, which only
+        # matters next to an edge. Bin those values like get_exp_bin does
+        near_edge = np.flatnonzero(
+            np.isfinite(scaled) & (np.abs(scaled - np.round(scaled)) < 1e-6)
+        )
+        for idx in near_edge.tolist():
+            bins[idx] = self.bin_index(float(values[idx]))
+        return bins
+
+    def triggered(self, best_diff_opt: np.ndarray, last_imp: np.ndarray) -> np.ndarray:
+        """
+        Vectorized log target trigger: a new target is reached if the
+        improvement moved best_diff_opt into a lower bin.
+        Args:
+            best_diff_opt (np.ndarray): Best differences to optimal value.
+            last_imp (np.ndarray): Improvements of the last evaluations.
+        Returns:
+            np.ndarray: Boolean mask, True where a new target is reached.
+        """
+        new_bins = self.bin_indices(best_diff_opt)
+        prev_bins = self.bin_indices(best_diff_opt + last_imp)
+        return np.asarray(new_bins < prev_bins)
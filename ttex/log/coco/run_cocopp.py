@@ -1,10 +1,16 @@
 import cocopp
-from typing import List, Optional
+from typing import Dict, List, Optional
 import logging
 import os
-from contextlib import redirect_stdout
+import os.path as osp
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, redirect_stdout
+from ttex.log.coco.merge_shards import info_blocks
+from ttex.log.coco.reader import INFO_ENTRY_PATTERN
 from ttex.log.coco.postp.info import SuiteInfo
 from ttex.log.coco.postp.testbed import TestbedFactory
+from ttex.log.coco.postp.dataset_cache import DataSetCache
 
 
 def run_cocopp(
@@ -12,8 +18,15 @@ def run_cocopp(
     suite_info: SuiteInfo,
     output_dir: Optional[str] = None,
     silent: bool = False,
+    cache_dir: Optional[str] = None,
+    max_cache_bytes: int = 2**30,
+    cache_key: str = "mtime",
 ):
-    """Run COCO post-processing on given result paths."""
+    """Run COCO post-processing on given result paths.
+
+    With `cache_dir`, the DataSets parsed from each .info file are cached,
+    so that unchanged results are not parsed again, see `DataSetCache`.
+    """
 
     args = result_paths
     if output_dir is not None:
@@ -31,11 +44,176 @@ def run_cocopp(
     ## Create and register testbedsettings for cocopp based on suite info
     TestbedFactory.create_testbed_class(suite_info)
 
-    if silent:
-        with open(os.devnull, "w") as fnull:
-            with redirect_stdout(fnull):
-                res = cocopp.main(args_str)
-    else:
+    with ExitStack() as stack:
+        if cache_dir is not None:
+            cache = DataSetCache(
+                cache_dir,
+                max_bytes=max_cache_bytes,
+                key=cache_key,
+                suite_info=suite_info,
+            )
+            stack.enter_context(cache.patch())
+        if silent:
+            fnull = stack.enter_context(open(os.devnull, "w"))
+            stack.enter_context(redirect_stdout(fnull))
         res = cocopp.main(args_str)
 
     return res
+
+
+def partition_suite(
+    suite_info: SuiteInfo,
+    by: str = "dimension",
+    function_groups: Optional[List[List[int]]] = None,
+) -> Dict[str, SuiteInfo]:
+    """
+    Split a suite into partitions that can be post-processed independently.
+
+    Args:
+        suite_info (SuiteInfo): The suite.
+        by (str): "dimension" for one partition per dimension, "function" for one
+            per function group, "both" for one per function group and dimension.
+        function_groups (Optional[List[List[int]]]): Function ids of each group.
+            Defaults to None, i.e. one group per function.
+    Returns:
+        Dict[str, SuiteInfo]: Partition name to the suite restricted to it.
+    """
+    assert by in ["dimension", "function", "both"], f"Unknown partitioning {by}"
+    if function_groups is None:
+        function_groups = [[info.func_id] for info in suite_info.function_infos]
+    func_parts: Dict[str, Optional[List[int]]] = {"": None}
+    dim_parts: Dict[str, Optional[List[int]]] = {"": None}
+    if by in ["function", "both"]:
+        func_parts = {
+            "f" + "_".join(str(func_id) for func_id in group): group
+            for group in function_groups
+        }
+    if by in ["dimension", "both"]:
+        dim_parts = {f"{dim:02d}D": [dim] for dim in suite_info.dimensions}
+    partitions = {}
+    for func_name, func_ids in func_parts.items():
+        for dim_name, dims in dim_parts.items():
+            subset = suite_info.subset(func_ids=func_ids, dims=dims)
+            if subset.function_infos:
+                name = "_".join(part for part in [func_name, dim_name] if part)
+                partitions[name] = subset
+    return partitions
+
+
+def filter_results(result_path: str, target_dir: str, suite_info: SuiteInfo) -> bool:
+    """
+    Write the .info files of a result folder, restricted to the functions and
+    dimensions of a suite. The data files are referenced by their absolute path,
+    so they are not copied.
+
+    Args:
+        result_path (str): Result folder of an algorithm.
+        target_dir (str): Folder to write the restricted .info files to.
+        suite_info (SuiteInfo): The suite to restrict to.
+    Returns:
+        bool: Whether any run is left.
+    """
+    func_ids = {str(info.func_id) for info in suite_info.function_infos}
+    dims = {str(dim) for dim in suite_info.dimensions}
+    found = False
+    for dirpath, _, filenames in os.walk(result_path):
+        for filename in sorted(filenames):
+            if not filename.endswith(".info"):
+                continue
+            info_path = osp.join(dirpath, filename)
+            with open(info_path, "r") as f:
+                content = f.read()
+            lines = []
+            for block in info_blocks(content):
+                header = dict(INFO_ENTRY_PATTERN.findall(block[0]))
+                if len(block) < 3 or header.get("funcId") not in func_ids:
+                    continue
+                if header.get("DIM") not in dims:
+                    continue
+                data_file, _, entries = block[-1].partition(", ")
+                data_file = osp.abspath(osp.join(dirpath, data_file))
+                lines.extend(block[:-1] + [f"{data_file}, {entries}"])
+            if lines:
+                target_path = osp.join(target_dir, osp.relpath(info_path, result_path))
+                os.makedirs(osp.dirname(target_path), exist_ok=True)
+                with open(target_path, "w") as f:
+                    f.write("".join(f"{line}\n" for line in lines))
+                found = True
+    return found
+
+
+def _run_partition(
+    result_paths: List[str], suite_info: SuiteInfo, output_dir: str
+) -> str:
+    # Registers the testbed of the partition in the worker process
+    run_cocopp(result_paths, suite_info, output_dir=output_dir, silent=True)
+    return output_dir
+
+
+def run_cocopp_parallel(
+    result_paths: List[str],
+    suite_info: SuiteInfo,
+    output_dir: str = "ppdata",
+    by: str = "dimension",
+    function_groups: Optional[List[List[int]]] = None,
+    max_workers: Optional[int] = None,
+) -> Dict[str, str]:
+    """
+    Run COCO post-processing on partitions of the suite in a process pool.
+
+    The suite is split with `partition_suite`. For each partition, the .info
+    files of the result paths are restricted to its functions and dimensions
+    and post-processed by `run_cocopp` in a worker process, which registers
+    the testbed of the partition. The reports are written to
+    `output_dir/<partition>`, `output_dir/index.html` links to all of them.
+    The restricted .info files are written to a temporary folder, which is
+    removed once all partitions are post-processed.
+    Figures combining several partitions, e.g. the scaling with the dimension
+    when partitioning by dimension, only cover the data of their partition.
+
+    Args:
+        result_paths (List[str]): Result folders, one per algorithm.
+        suite_info (SuiteInfo): The suite.
+        output_dir (str): Folder to write the reports to.
+        by (str): Partitioning, see `partition_suite`.
+        function_groups (Optional[List[List[int]]]): See `partition_suite`.
+        max_workers (Optional[int]): Maximum number of worker processes.
+    Returns:
+        Dict[str, str]: Partition name to the folder of its report.
+    """
+    outputs = {}
+    # The restricted .info files are only needed until the workers are done
+    with tempfile.TemporaryDirectory() as input_dir:
+        jobs = {}
+        for name, partition in partition_suite(suite_info, by, function_groups).items():
+            partition_paths = []
+            for idx, result_path in enumerate(result_paths):
+                # Keep the folder name, cocopp uses it as algorithm name
+                target_dir = osp.join(
+                    input_dir, name, str(idx), osp.basename(osp.normpath(result_path))
+                )
+                if filter_results(result_path, target_dir, partition):
+                    partition_paths.append(target_dir)
+            if partition_paths:
+                jobs[name] = (partition_paths, partition, osp.join(output_dir, name))
+
+        # One task per worker, cocopp keeps global state between runs
+        with ProcessPoolExecutor(
+            max_workers=max_workers, max_tasks_per_child=1
+        ) as pool:
+            futures = {
+                name: pool.submit(_run_partition, *job) for name, job in jobs.items()
+            }
+            for name, future in futures.items():
+                outputs[name] = future.result()
+
+    links = "".join(
+        f'&nbsp;&nbsp;<a href="{name}/index.html">{name}</a><br>\n' for name in outputs
+    )
+    with open(osp.join(output_dir, "index.html"), "w") as f:
+        f.write(
+            "<HTML>\n<HEAD>\n   <TITLE> COCO Post-Processing Results </TITLE>\n"
+            "</HEAD>\n<BODY>\n<H1> COCO Post-Processing Results\n</H1>\n\n"
+            f"<H2>{suite_info.name} by {by}</H2>\n{links}\n</BODY>\n</HTML>\n"
+        )
+    return outputs
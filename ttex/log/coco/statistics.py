@@ -0,0 +1,292 @@
+from typing import TYPE_CHECKING, Dict, Hashable, List, Optional, Tuple
+import numpy as np
+from ttex.log.coco.coco_events import COCOStart
+from ttex.log.coco.coco_state import COCOState
+from ttex.log.coco.reader import COCOResultReader, COCORun, read_trajectories
+
+if TYPE_CHECKING:
+    # cocopp (and matplotlib) are only needed for post-processing
+    from ttex.log.coco.postp.info import SuiteInfo
+
+
+def target_values(
+    max_target: int = 2, min_target: int = -8, number_of_points: int = 5
+) -> np.ndarray:
+    """
+    Get the targets for best_diff_opt, spaced evenly on a log scale.
+
+    Args:
+        max_target (int): Exponent of the largest target.
+        min_target (int): Exponent of the smallest target.
+        number_of_points (int): Number of targets per decade.
+    Returns:
+        np.ndarray: Targets in decreasing order.
+    """
+    exponents = np.arange(
+        max_target * number_of_points, min_target * number_of_points - 1, -1
+    )
+    return 10.0 ** (exponents / number_of_points)
+
+
+def first_hits(
+    f_evals: np.ndarray, best_diff_opt: np.ndarray, targets: np.ndarray
+) -> np.ndarray:
+    """
+    Get the number of evaluations after which each target was first reached.
+
+    Args:
+        f_evals (np.ndarray): Evaluation counts of a trajectory, increasing.
+        best_diff_opt (np.ndarray): Best difference to the optimum at each count.
+        targets (np.ndarray): Targets in decreasing order.
+    Returns:
+        np.ndarray: Evaluations per target, inf if the target was not reached.
+    """
+    best = np.minimum.accumulate(np.asarray(best_diff_opt, dtype=np.float64))
+    # First index with best <= target, best is non-increasing
+    idx = np.searchsorted(-best, -targets, side="left")
+    hits = np.full(len(targets), np.inf)
+    reached = idx < len(best)
+    hits[reached] = np.asarray(f_evals)[idx[reached]]
+    return hits
+
+
+def expected_running_time(hits: np.ndarray, max_evals: np.ndarray) -> np.ndarray:
+    """
+    Compute the expected running time (ERT) for each target.
+    The evaluations of all runs until they reach the target, or of the whole run
+    if they do not, are divided by the number of runs that reach it.
+
+    Args:
+        hits (np.ndarray): Runs x targets first hits, see `first_hits`.
+        max_evals (np.ndarray): Number of evaluations of each run.
+    Returns:
+        np.ndarray: ERT per target, inf if no run reached it.
+    """
+    reached = np.isfinite(hits)
+    evals = np.where(reached, hits, np.asarray(max_evals)[:, None]).sum(axis=0)
+    successes = reached.sum(axis=0)
+    ert = np.full(hits.shape[1], np.inf)
+    np.divide(evals, successes, out=ert, where=successes > 0)
+    return ert
+
+
+def runtime_ecdf(hits: np.ndarray, budgets: np.ndarray) -> np.ndarray:
+    """
+    Compute the empirical cumulative distribution of the runtimes,
+    i.e. the fraction of (run, target) pairs reached within each budget.
+
+    Args:
+        hits (np.ndarray): Runs x targets first hits, see `first_hits`.
+        budgets (np.ndarray): Numbers of evaluations.
+    Returns:
+        np.ndarray: Fraction per budget.
+    """
+    if hits.size == 0:
+        return np.zeros(len(budgets))
+    runtimes = np.sort(hits, axis=None)
+    return np.searchsorted(runtimes, budgets, side="right") / hits.size
+
+
+class RuntimeStatistics:
+    """
+    Aggregates ERT and runtime ECDFs per function and dimension, from result
+    files written by the COCO logger or from live COCOStates, without cocopp.
+    Only the first hit of each target is kept per run.
+    """
+
+    def __init__(self, targets: Optional[np.ndarray] = None):
+        """
+        Args:
+            targets (Optional[np.ndarray]): Targets in decreasing order.
+                Defaults to None, i.e. `target_values()`.
+        """
+        self.targets = target_values() if targets is None else np.asarray(targets)
+        # (function, dimension) -> first hits and evaluations of each run
+        self._runs: Dict[Tuple[int, int], List[Tuple[np.ndarray, int]]] = {}
+        # Run key -> start of its current run, first hits and evaluations so far
+        self._live: Dict[Hashable, Tuple[COCOStart, np.ndarray, int]] = {}
+        # Run key -> start of its last added run, until the key starts a new run
+        self._ended: Dict[Hashable, COCOStart] = {}
+
+    @classmethod
+    def from_suite_info(cls, suite_info: "SuiteInfo") -> "RuntimeStatistics":
+        """
+        Create an aggregator with the targets of a suite.
+
+        Args:
+            suite_info (SuiteInfo): Suite with max_target, min_target and
+                number_of_points.
+        Returns:
+            RuntimeStatistics: The aggregator.
+        """
+        return cls(
+            target_values(
+                suite_info.max_target,
+                suite_info.min_target,
+                suite_info.number_of_points,
+            )
+        )
+
+    def add_run(
+        self,
+        func: int,
+        dim: int,
+        f_evals: np.ndarray,
+        best_diff_opt: np.ndarray,
+        max_evals: Optional[int] = None,
+    ):
+        """
+        Add a finished run.
+
+        Args:
+            func (int): Function id.
+            dim (int): Dimension.
+            f_evals (np.ndarray): Evaluation counts of the trajectory.
+            best_diff_opt (np.ndarray): Best difference to the optimum at each count.
+            max_evals (Optional[int]): Evaluations of the run. Defaults to None,
+                i.e. the last evaluation count of the trajectory.
+        """
+        if max_evals is None:
+            max_evals = int(f_evals[-1]) if len(f_evals) else 0
+        hits = first_hits(f_evals, best_diff_opt, self.targets)
+        self._runs.setdefault((func, dim), []).append((hits, max_evals))
+
+    def add_results(self, root_dir: str):
+        """
+        Add all runs of a result tree, read from the .dat files.
+
+        Args:
+            root_dir (str): Directory to search for .info files.
+        """
+        reader = COCOResultReader(root_dir)
+        runs_by_file: Dict[str, List[COCORun]] = {}
+        for run in reader.runs():
+            runs_by_file.setdefault(run.data_file("dat"), []).append(run)
+        for data_file, runs in runs_by_file.items():
+            # Read each file once, without keeping the trajectories
+            trajectories = read_trajectories(data_file)
+            for run in runs:
+                trajectory = trajectories[run.run_idx]
+                self.add_run(
+                    run.func,
+                    run.dim,
+                    trajectory["f_evals"],
+                    trajectory["best_diff_opt"],
+                    run.f_evals,
+                )
+
+    def observe(self, state: COCOState):
+        """
+        Update the first hits of the current run of a live state.
+        Call after each update of the state. The run is added once it ended.
+        Runs are tracked by their run key, so states observed at the same time
+        must belong to different run keys.
+
+        Args:
+            state (COCOState): The state.
+        """
+        start = state.coco_start
+        if start is None:
+            # No run started yet
+            return
+        key = start.run_key
+        if start is self._ended.get(key):
+            # The run was already added
+            return
+        self._ended.pop(key, None)
+        live = self._live.get(key)
+        if live is not None and live[0] is not start:
+            # The state moved on to the next run
+            self._end_live(key)
+            live = None
+        if live is None:
+            live = (start, np.full(len(self.targets), np.inf), 0)
+        if state.best_diff_opt is not None:
+            if state.last_batch is not None:
+                new_hits = first_hits(
+                    state.last_batch.f_evals,
+                    state.last_batch.best_diff_opt,
+                    self.targets,
+                )
+            else:
+                new_hits = first_hits(
+                    np.array([state.f_evals]),
+                    np.array([state.best_diff_opt]),
+                    self.targets,
+                )
+            live = (start, np.minimum(live[1], new_hits), state.f_evals)
+        self._live[key] = live
+        if state.finished:
+            self._end_live(key)
+
+    def _end_live(self, key: Hashable):
+        start, hits, f_evals = self._live.pop(key)
+        self._ended[key] = start
+        self._runs.setdefault((start.problem, max(start.dim, 1)), []).append(
+            (hits, f_evals)
+        )
+
+    def hits(
+        self, func: Optional[int] = None, dim: Optional[int] = None
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the first hits of all matching runs, including live runs.
+
+        Args:
+            func (Optional[int]): Function id, None for all functions.
+            dim (Optional[int]): Dimension, None for all dimensions.
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Runs x targets first hits and the
+                evaluations of each run.
+        """
+        runs = [
+            run
+            for (run_func, run_dim), func_runs in self._runs.items()
+            if (func is None or func == run_func) and (dim is None or dim == run_dim)
+            for run in func_runs
+        ]
+        runs.extend(
+            (hits, f_evals)
+            for start, hits, f_evals in self._live.values()
+            if (func is None or func == start.problem)
+            and (dim is None or dim == max(start.dim, 1))
+        )
+        if not runs:
+            return np.empty((0, len(self.targets))), np.empty(0, dtype=np.int64)
+        return np.stack([hits for hits, _ in runs]), np.array([e for _, e in runs])
+
+    def ert(self, func: int, dim: int) -> np.ndarray:
+        """
+        Get the expected running time per target of a function and dimension.
+
+        Args:
+            func (int): Function id.
+            dim (int): Dimension.
+        Returns:
+            np.ndarray: ERT per target, inf if no run reached it.
+        """
+        return expected_running_time(*self.hits(func, dim))
+
+    def ecdf(
+        self,
+        func: Optional[int] = None,
+        dim: Optional[int] = None,
+        budgets: Optional[np.ndarray] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the runtime ECDF of the matching runs over all targets.
+
+        Args:
+            func (Optional[int]): Function id, None for all functions.
+            dim (Optional[int]): Dimension, None for all dimensions.
+            budgets (Optional[np.ndarray]): Numbers of evaluations. Defaults to
+                None, i.e. 10 per decade up to the longest run.
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Budgets and fraction of (run, target)
+                pairs reached within each budget.
+        """
+        hits, max_evals = self.hits(func, dim)
+        if budgets is None:
+            longest = max(int(max_evals.max()) if len(max_evals) else 1, 1)
+            budgets = np.logspace(0, np.log10(longest), int(10 * np.log10(longest)) + 1)
+        return budgets, runtime_ecdf(hits, budgets)
@@ -0,0 +1,188 @@
+import logging
+import math
+import os.path as osp
+import time
+from dataclasses import dataclass
+from typing import Dict, Hashable, List, Optional
+from ttex.log.coco.record import (
+    COCOdatHeader,
+    COCOdatRecord,
+    COCOInfoHeader,
+    COCOInfoRecord,
+    COCOLogRecord,
+)
+from ttex.log.formatter import StrRecord, StrRecordBatch
+from ttex.log.utils.wandb_logging_setup import get_wandb_logger
+
+# Reasons of .dat records that mark a new target
+TARGET_REASONS = ("target", "imp")
+
+
+@dataclass
+class COCORunProgress:
+    """
+    Progress of a single COCO run, as seen from its logged records.
+    """
+
+    name: str  # e.g. f1_d3_i1
+    f_evals: int = 0
+    best_diff_opt: Optional[float] = None
+    targets_hit: int = 0
+    finished: bool = False
+
+
+class COCOWandbHandler(logging.Handler):
+    """
+    Forwards the live progress of COCO runs to the run of a WandbHandler.
+    Consumes the records split by the COCOKeySplitter instead of the text files,
+    aggregates them and logs the scalars at most `max_log_rate` times per second.
+    """
+
+    def __init__(
+        self,
+        wandb_logger_name: str = "wandb_logger",
+        max_log_rate: float = 1.0,
+        per_run: bool = False,
+        prefix: str = "coco",
+        level=logging.NOTSET,
+    ):
+        """
+        Args:
+            wandb_logger_name (str): Name of the logger set up with setup_wandb_logger.
+            max_log_rate (float): Maximum number of logs per second.
+            per_run (bool): Also log the progress of each run that changed,
+                under `prefix/<run name>/`. Adds metrics per run, so only
+                recommended for small experiments.
+            prefix (str): Prefix of the logged metrics.
+            level ([type], optional): Logging level. Defaults to logging.NOTSET.
+        """
+        assert max_log_rate > 0, "max_log_rate must be positive"
+        super().__init__(level)
+        self.wandb_logger_name = wandb_logger_name
+        self.min_interval = 1.0 / max_log_rate
+        self.per_run = per_run
+        self.prefix = prefix
+        # Runs by run key, finished runs are kept until they were logged
+        self.runs: Dict[Optional[Hashable], COCORunProgress] = {}
+        self._changed: Dict[int, COCORunProgress] = {}
+        self.runs_started = 0
+        self.runs_finished = 0
+        self.targets_hit = 0
+        self._finished_evals = 0
+        self._last_log = time.monotonic()
+
+    @staticmethod
+    def _flatten(recs) -> List[StrRecord]:
+        if isinstance(recs, StrRecordBatch):
+            return recs.records
+        return [recs]
+
+    def emit(self, record):
+        """
+        Update the progress with the COCO records of a log record,
+        and log it to wandb if the last log is long enough ago.
+        Args:
+            record (LogRecord): Log record
+        """
+        run_key = getattr(record, "run_key", None)
+        for key in ["log_dat", "log_tdat", "info"]:
+            recs = getattr(record, key, None)
+            if recs is None:
+                continue
+            for rec in COCOWandbHandler._flatten(recs):
+                self._update(run_key, rec)
+        if time.monotonic() - self._last_log >= self.min_interval:
+            self._log()
+
+    def _update(self, run_key: Optional[Hashable], rec: StrRecord):
+        run = self.runs.get(run_key)
+        if isinstance(rec, COCOdatHeader):
+            # Each run starts with exactly one .dat header
+            if run is not None and not run.finished:
+                self._finish(run, run.f_evals)
+            name = osp.splitext(osp.basename(rec.filepath))[0]
+            run = COCORunProgress(name=name)
+            self.runs[run_key] = run
+            self.runs_started += 1
+        elif run is None or run.finished:
+            # Records without a start, or headers of other files
+            return
+        elif isinstance(rec, COCOLogRecord):
+            run.f_evals = max(run.f_evals, rec.f_evals)
+            run.best_diff_opt = rec.best_diff_opt
+            if isinstance(rec, COCOdatRecord) and rec.reason in TARGET_REASONS:
+                run.targets_hit += 1
+                self.targets_hit += 1
+        elif isinstance(rec, COCOInfoHeader) and rec.record is not None:
+            # Written with the data line of the run when it ends
+            self._finish(run, rec.record.f_evals)
+        elif isinstance(rec, COCOInfoRecord):
+            self._finish(run, rec.f_evals)
+        else:
+            return
+        self._changed[id(run)] = run
+
+    def _finish(self, run: COCORunProgress, f_evals: int):
+        run.f_evals = f_evals
+        run.finished = True
+        self.runs_finished += 1
+        self._finished_evals += f_evals
+        self._changed[id(run)] = run
+
+    def metrics(self) -> Dict[str, float]:
+        """
+        Get the aggregated metrics of the changes since the last log.
+
+        Returns:
+            Dict[str, float]: Metrics by name.
+        """
+        p = self.prefix
+        metrics: Dict[str, float] = {
+            f"{p}/runs": self.runs_started,
+            f"{p}/runs_finished": self.runs_finished,
+            f"{p}/evaluations": self._finished_evals
+            + sum(run.f_evals for run in self.runs.values() if not run.finished),
+            f"{p}/targets_hit": self.targets_hit,
+        }
+        best = [
+            run.best_diff_opt
+            for run in self._changed.values()
+            if run.best_diff_opt is not None and math.isfinite(run.best_diff_opt)
+        ]
+        if best:
+            metrics[f"{p}/best_diff_opt"] = float(min(best))
+        if self.per_run:
+            for run in self._changed.values():
+                metrics[f"{p}/{run.name}/f_evals"] = run.f_evals
+                metrics[f"{p}/{run.name}/targets_hit"] = run.targets_hit
+                if run.best_diff_opt is not None and math.isfinite(run.best_diff_opt):
+                    metrics[f"{p}/{run.name}/best_diff_opt"] = float(run.best_diff_opt)
+        return metrics
+
+    def _log(self):
+        self._last_log = time.monotonic()
+        if not self._changed:
+            return
+        wandb_logger = get_wandb_logger(self.wandb_logger_name)
+        if wandb_logger is None:
+            # No wandb run (yet), keep the changes for the next log
+            return
+        wandb_logger.info(self.metrics())
+        self._changed = {}
+        # Finished runs do not change anymore
+        for run_key in [k for k, run in self.runs.items() if run.finished]:
+            del self.runs[run_key]
+
+    def flush(self):
+        """
+        Log the changes since the last log, regardless of the log rate.
+        """
+        self.acquire()
+        try:
+            self._log()
+        finally:
+            self.release()
+
+    def close(self):
+        self.flush()
+        super().close()
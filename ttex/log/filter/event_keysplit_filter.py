@@ -1,17 +1,26 @@
 from logging import Filter
 from ttex.log.formatter import StrRecord
 from abc import ABC, abstractmethod
-from typing import Optional, Dict
+from typing import Optional, Dict, Hashable
+import threading
 
 
 class LogEvent(ABC):
-    pass
+    # Events with different run keys are tracked in separate logging states
+    run_key: Optional[Hashable] = None
 
 
 class LoggingState(ABC):
+    __slots__ = ()
+
     def update(self, event: LogEvent) -> None:
         pass
 
+    @property
+    def finished(self) -> bool:
+        """Whether the run is over and the state can be discarded."""
+        return False
+
 
 class KeySplitter(ABC):
     @abstractmethod
@@ -45,7 +54,27 @@ class EventKeysplitFilter(Filter):
 
         # Dynamically import and instantiate KeySplitter
         self.key_splitter = self._resolve_class(key_splitter_cls)(**key_splitter_args)
+        # State of events without run key
         self.state = self.key_splitter.init_logging_state()
+        # States of the currently active runs, by run key
+        self.states: Dict[Hashable, LoggingState] = {}
+        # Events can be logged from multiple threads
+        self._lock = threading.Lock()
+
+    def get_state(self, run_key: Optional[Hashable] = None) -> LoggingState:
+        """
+        Get the logging state of a run, creating it if necessary.
+
+        Args:
+            run_key (Optional[Hashable]): Key of the run, None for the default state.
+        Returns:
+            LoggingState: The logging state of the run.
+        """
+        if run_key is None:
+            return self.state
+        if run_key not in self.states:
+            self.states[run_key] = self.key_splitter.init_logging_state()
+        return self.states[run_key]
 
     def _resolve_class(self, dotted_path: str):
         """Dynamically import a class from a dotted module path."""
@@ -59,11 +88,21 @@ class EventKeysplitFilter(Filter):
         if not isinstance(record.msg, LogEvent):
             return False
 
-        self.state.update(record.msg)
-        records = self.key_splitter.process(self.state, record.msg)
+        run_key = record.msg.run_key
+        with self._lock:
+            state = self.get_state(run_key)
+            state.update(record.msg)
+            records = self.key_splitter.process(state, record.msg)
+            finished = state.finished
+            if run_key is not None and finished:
+                del self.states[run_key]
         if not records:
             return False
 
+        # Handlers route the records of different runs by run key,
+        # and forget the run once it finished
+        record.run_key = run_key
+        record.run_finished = finished
         for key, recs in records.items():
             setattr(record, key, recs)
         return True
@@ -6,6 +6,7 @@ class KeyFilter(Filter):
     Filter to allow only log records with a specific key and unique UUID.
     If a record with the same UUID as the last one is encountered, it will be filtered
     out to avoid duplicate logging.
+    Records that finish a run are passed on even without the key.
     """
 
     def __init__(self, key: str, name: str = "KeyFilter"):
@@ -19,7 +20,8 @@ class KeyFilter(Filter):
     def filter(self, record):
         """ """
         if not hasattr(record, self.key):
-            return False
+            # Passed on without the key, so handlers can forget a finished run
+            return getattr(record, "run_finished", False)
 
         key_record = getattr(record, self.key, None)
         assert key_record is not None
@@ -1,3 +1,7 @@
 from ttex.log.formatter.json_formatter import JsonFormatter
 from ttex.log.formatter.key_formatter import KeyFormatter
-from ttex.log.formatter.str_record import StrRecord, StrHeader
+from ttex.log.formatter.str_record import (
+    StrRecord,
+    StrHeader,
+    StrRecordBatch,
+)
@@ -1,4 +1,5 @@
 from abc import ABC, abstractmethod
+from typing import List, Optional, Sequence
 
 
 class StrRecord(ABC):
@@ -7,6 +8,8 @@ class StrRecord(ABC):
     This class defines the structure and methods that all record types must implement.
     """
 
+    __slots__ = ()
+
     @abstractmethod
     def __str__(self) -> str:
         """
@@ -18,6 +21,19 @@ class StrRecord(ABC):
         """
         pass
 
+    @classmethod
+    def format_records(cls, records: Sequence["StrRecord"]) -> str:
+        """
+        Format several records of this class, one per line.
+        Subclasses can override this to format many records at once.
+
+        Args:
+            records (Sequence[StrRecord]): Records to format.
+        Returns:
+            str: Formatted records separated by newlines.
+        """
+        return "\n".join(str(record) for record in records)
+
     def emit(self) -> bool:
         return True
 
@@ -45,3 +61,38 @@ class StrHeader(StrRecord):
     @abstractmethod
     def filepath(self) -> str:
         pass
+
+
+class StrRecordBatch(StrRecord):
+    """
+    Several records that are logged together as consecutive lines.
+    Formatting a batch gives the same file content as logging each record separately.
+    """
+
+    __slots__ = ("records",)
+
+    def __init__(self, records: Optional[List[StrRecord]] = None):
+        self.records = records if records is not None else []
+
+    def append(self, record: StrRecord) -> None:
+        self.records.append(record)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def __str__(self) -> str:
+        """
+        Format all records in the batch, one per line.
+
+        Returns:
+            str: Formatted records separated by newlines.
+        """
+        if not self.records:
+            return ""
+        record_cls = type(self.records[0])
+        if all(type(record) is record_cls for record in self.records):
+            return record_cls.format_records(self.records)
+        return StrRecord.format_records(self.records)
+
+    def emit(self) -> bool:
+        return len(self.records) > 0
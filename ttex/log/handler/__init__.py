@@ -1,2 +1,5 @@
+from ttex.log.handler.wandb_spool import SpoolRun, read_spool, sync_spool
+from ttex.log.handler.artifact_staging import ArtifactStaging
 from ttex.log.handler.wandb_handler import WandbHandler
 from ttex.log.handler.manual_rotating_file_handler import ManualRotatingFileHandler
+from ttex.log.handler.async_queue_handler import AsyncQueueHandler
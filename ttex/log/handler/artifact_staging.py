@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import os
+import os.path as osp
+import shutil
+import threading
+import time
+import uuid
+from typing import Dict
+import wandb
+from ttex.log import LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+
+class ArtifactStaging:
+    """
+    Content-addressed staging of the files of directory artifacts.
+    Each distinct file content is copied once into `staging_dir/objects`,
+    and added to the artifact from there as immutable, so wandb does not copy
+    it again. Hashes are cached by path, size and modification time, so
+    unchanged files are not read again when they are logged again.
+    Once the store exceeds `max_bytes`, `cleanup` evicts the least recently
+    used objects that were not used within `min_age` seconds, as runs sharing
+    the store might still upload them.
+    """
+
+    INDEX_FILE = "hashes.json"
+
+    def __init__(
+        self, staging_dir: str, max_bytes: int = 2**33, min_age: float = 3600.0
+    ):
+        """
+        Args:
+            staging_dir (str): Directory of the staged objects and the hash index.
+            max_bytes (int): Size of the staged objects above which `cleanup`
+                evicts objects. Defaults to 8 GiB.
+            min_age (float): Time in seconds since their last use during which
+                objects are not evicted. Defaults to one hour.
+        """
+        assert max_bytes >= 0, "max_bytes must not be negative"
+        self.staging_dir = staging_dir
+        self.max_bytes = max_bytes
+        self.min_age = min_age
+        self.objects_dir = osp.join(staging_dir, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # path -> [size, mtime_ns, sha256]
+        self._hashes: Dict[str, list] = {}
+        index_path = osp.join(staging_dir, ArtifactStaging.INDEX_FILE)
+        if osp.exists(index_path):
+            try:
+                with open(index_path, "r") as f:
+                    self._hashes = json.load(f)
+            except (OSError, ValueError):
+                logger.warning(f"Ignoring unreadable staging index {index_path}")
+
+    def file_hash(self, path: str) -> str:
+        """
+        Get the sha256 of a file, from the cache if it did not change.
+
+        Args:
+            path (str): Path of the file.
+        Returns:
+            str: Hex digest of the content.
+        """
+        path = osp.abspath(path)
+        stat = os.stat(path)
+        with self._lock:
+            cached = self._hashes.get(path)
+        if cached is not None and cached[:2] == [stat.st_size, stat.st_mtime_ns]:
+            return cached[2]
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        with self._lock:
+            self._hashes[path] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def stage_file(self, path: str) -> str:
+        """
+        Copy a file into the object store, unless its content is already there.
+
+        Args:
+            path (str): Path of the file.
+        Returns:
+            str: Path of the staged object.
+        """
+        content_hash = self.file_hash(path)
+        object_path = osp.join(self.objects_dir, content_hash[:2], content_hash[2:])
+        try:
+            # Mark the object as recently used, see `cleanup`
+            os.utime(object_path)
+        except OSError:
+            os.makedirs(osp.dirname(object_path), exist_ok=True)
+            # Copy under a unique name first, concurrent stagings of the
+            # same content replace each other with identical files
+            tmp_path = f"{object_path}.{uuid.uuid4().hex}.tmp"
+            shutil.copyfile(path, tmp_path)
+            os.replace(tmp_path, object_path)
+        return object_path
+
+    def add_dir(self, artifact: wandb.Artifact, local_path: str, name: str):
+        """
+        Add the files of a directory to an artifact from the object store.
+
+        Args:
+            artifact (wandb.Artifact): The artifact.
+            local_path (str): The directory.
+            name (str): Name of the directory within the artifact.
+        """
+        for root, dirs, files in os.walk(local_path):
+            dirs.sort()
+            for filename in sorted(files):
+                path = osp.join(root, filename)
+                rel_path = osp.relpath(path, local_path)
+                artifact.add_file(
+                    local_path=self.stage_file(path),
+                    name=osp.join(name, rel_path),
+                    policy="immutable",
+                )
+        self.save_index()
+
+    def save_index(self):
+        """
+        Persist the hash cache for later runs.
+        """
+        index_path = osp.join(self.staging_dir, ArtifactStaging.INDEX_FILE)
+        tmp_path = f"{index_path}.{uuid.uuid4().hex}.tmp"
+        with self._lock:
+            with open(tmp_path, "w") as f:
+                json.dump(self._hashes, f)
+        os.replace(tmp_path, index_path)
+
+    def cleanup(self) -> int:
+        """
+        Evict the least recently used objects until the store fits into
+        max_bytes, and forget the hashes of files that no longer exist.
+        Only call it once the artifacts of this staging are uploaded.
+
+        Returns:
+            int: Number of evicted objects.
+        """
+        entries = []
+        for root, _, files in os.walk(self.objects_dir):
+            for filename in files:
+                path = osp.join(root, filename)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        now = time.time()
+        for mtime, size, path in sorted(entries):
+            if total <= self.max_bytes or now - mtime < self.min_age:
+                # All further objects were used more recently
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            evicted += 1
+        with self._lock:
+            self._hashes = {
+                path: entry for path, entry in self._hashes.items() if osp.exists(path)
+            }
+        self.save_index()
+        return evicted
@@ -0,0 +1,80 @@
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import List, Optional
+
+
+class AsyncQueueHandler(QueueHandler):
+    """
+    Hands records to a bounded queue that is drained by a background thread,
+    which passes them on to the wrapped handlers.
+    Records are enqueued unformatted, so formatting and file I/O happen
+    in the background thread instead of the logging thread. Objects logged
+    as messages must therefore not be changed after logging. The COCO
+    records copy the evaluated point when they are created.
+    """
+
+    def __init__(
+        self,
+        handlers: List[logging.Handler],
+        max_queue_size: int = 10000,
+        timeout: Optional[float] = None,
+        level=logging.NOTSET,
+    ):
+        """
+        Initialize the handler and start the background thread.
+
+        Args:
+            handlers (List[logging.Handler]): Handlers that the records are passed to.
+            max_queue_size (int): Maximum number of queued records.
+                Logging blocks while the queue is full (backpressure).
+            timeout (Optional[float]): Maximum time in seconds to wait for space in
+                the queue. The record is dropped via handleError after the timeout.
+                Defaults to None, i.e. wait indefinitely.
+            level ([type], optional): Logging level. Defaults to logging.NOTSET.
+        """
+        assert max_queue_size > 0, "Queue must be bounded"
+        self.bounded_queue: queue.Queue = queue.Queue(maxsize=max_queue_size)
+        super().__init__(self.bounded_queue)
+        self.setLevel(level)
+        self.handlers = handlers
+        self.timeout = timeout
+        self.listener = QueueListener(self.queue, *handlers, respect_handler_level=True)
+        self.listener.start()
+
+    @property
+    def running(self) -> bool:
+        return self.listener._thread is not None
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        """
+        Pass the record on as is, the wrapped handlers format it.
+        """
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        """
+        Enqueue a record, blocking while the queue is full.
+        """
+        self.bounded_queue.put(record, block=True, timeout=self.timeout)
+
+    def flush(self):
+        """
+        Wait until all queued records are handled and flush the wrapped handlers.
+        """
+        if self.running:
+            self.bounded_queue.join()
+        for handler in self.handlers:
+            handler.flush()
+
+    def close(self):
+        """
+        Drain the queue, stop the background thread and close the wrapped handlers.
+        """
+        if self.running:
+            # Drain first, stopping needs space in the queue for the sentinel
+            self.bounded_queue.join()
+            self.listener.stop()
+        for handler in self.handlers:
+            handler.close()
+        super().close()
@@ -1,10 +1,16 @@
 import os
+from collections import OrderedDict
 from logging.handlers import BaseRotatingHandler
+from typing import IO, Dict, Hashable, List, Optional, Set
 
 
 class ManualRotatingFileHandler(BaseRotatingHandler):
     """
     Custom RotatingFileHandler that allows manual rotation of log files.
+    Optionally buffers formatted lines in memory and writes them in one call,
+    see `buffer_lines` and `buffer_bytes`.
+    In direct mode, records are written straight to the file of their header
+    instead of a staging file that is renamed on rotation, see `direct`.
     """
 
     def __init__(
@@ -13,15 +19,159 @@ class ManualRotatingFileHandler(BaseRotatingHandler):
         key: str = "msg",
         mode: str = "a",
         encoding=None,
+        buffer_lines: int = 0,
+        buffer_bytes: int = 0,
+        direct: bool = False,
+        max_open_files: int = 16,
+        root_dir: Optional[str] = None,
     ):
         """
         Initialize the handler with the given filename and mode.
+
+        Args:
+            filepath: Path of the file that is written to before rotation.
+            key (str): Attribute of the log record holding the record to write.
+            mode (str): File mode.
+            encoding: File encoding.
+            buffer_lines (int): Write buffered lines once this many have been collected.
+            buffer_bytes (int): Write buffered lines once they reach this size
+                (in characters, equal to bytes for ASCII output).
+                If both thresholds are 0 (default), every record is written directly.
+            direct (bool): Write to the header filepaths directly, without staging file.
+                Open files are kept in a pool, so records can switch between files.
+            max_open_files (int): Maximum number of open files in direct mode.
+                The least recently used file is closed when the limit is exceeded.
+            root_dir (Optional[str]): Directory the header filepaths are relative to.
+                Defaults to None, i.e. the current working directory.
         """
+        assert max_open_files > 0, "max_open_files must be positive"
         os.makedirs(os.path.dirname(filepath), exist_ok=True)
         super().__init__(filepath, delay=True, mode=mode, encoding=encoding)
-        self.current_filepath = None
-        self.next_filepath = None
+        self.current_filepath: Optional[str] = None
+        self.next_filepath: Optional[str] = None
         self.key = key
+        self.buffer_lines = buffer_lines
+        self.buffer_bytes = buffer_bytes
+        self._buffer: List[str] = []
+        self._buffer_size = 0
+        self.direct = direct
+        self.max_open_files = max_open_files
+        self.root_dir = root_dir
+        # Open streams in direct mode, least recently used first
+        self._streams: OrderedDict[str, IO] = OrderedDict()
+        # Files opened before, appended to when they are opened again
+        self._opened: Set[str] = set()
+        # Current file of each run in direct mode
+        self._run_filepaths: Dict[Hashable, str] = {}
+        # Run of the current file in staging mode
+        self._run_key: Optional[Hashable] = None
+
+    @property
+    def buffered(self) -> bool:
+        return self.buffer_lines > 0 or self.buffer_bytes > 0
+
+    def emit(self, record):
+        """
+        Emit a record.
+        In buffered mode, the formatted record is only written to the file
+        once a buffer threshold is reached, on rollover or on close.
+        Records that finish a run may come without the key, see KeyFilter.
+        """
+        if hasattr(record, self.key):
+            if self.buffered:
+                self._emit_buffered(record)
+            else:
+                super().emit(record)
+        if getattr(record, "run_finished", False):
+            # The run has no more records, forget its file
+            self._run_filepaths.pop(getattr(record, "run_key", None), None)
+
+    def _emit_buffered(self, record):
+        try:
+            if self.shouldRollover(record):
+                self.doRollover()
+            msg = self.format(record) + self.terminator
+            self._buffer.append(msg)
+            self._buffer_size += len(msg)
+            if (self.buffer_lines > 0 and len(self._buffer) >= self.buffer_lines) or (
+                self.buffer_bytes > 0 and self._buffer_size >= self.buffer_bytes
+            ):
+                self.flush()
+        except Exception:
+            self.handleError(record)
+
+    def _write_buffer(self):
+        """
+        Write all buffered lines to the file with a single write call.
+        """
+        if not self._buffer:
+            return
+        if self.stream is None:
+            self.stream = self._open()
+        self.stream.write("".join(self._buffer))
+        self._buffer = []
+        self._buffer_size = 0
+
+    def flush(self):
+        """
+        Write any buffered lines and flush the stream.
+        """
+        self.acquire()
+        try:
+            self._write_buffer()
+            for stream in self._streams.values():
+                stream.flush()
+        finally:
+            self.release()
+        super().flush()
+
+    def _get_stream(self, filepath: str) -> IO:
+        """
+        Get the open stream for a filepath in direct mode, opening it if necessary.
+        A file is truncated when it is first opened and appended to afterwards.
+
+        Args:
+            filepath (str): Path of the file.
+        Returns:
+            IO: The open stream.
+        """
+        if filepath in self._streams:
+            self._streams.move_to_end(filepath)
+            return self._streams[filepath]
+        if len(self._streams) >= self.max_open_files:
+            _, stream = self._streams.popitem(last=False)
+            stream.close()
+        dirname = os.path.dirname(filepath)
+        if dirname:
+            os.makedirs(dirname, exist_ok=True)
+        mode = "a" if filepath in self._opened else "w"
+        stream = open(filepath, mode, encoding=self.encoding, errors=self.errors)
+        self._streams[filepath] = stream
+        self._opened.add(filepath)
+        return stream
+
+    def _select_file(self, filepath: str):
+        """
+        Switch the file that records are written to in direct mode.
+        """
+        if filepath == self.current_filepath:
+            return
+        # Buffered lines belong to the previous file
+        self._write_buffer()
+        self.current_filepath = filepath
+
+    def output_path(self, filepath: str) -> str:
+        """
+        Get the path a header filepath is written to.
+
+        Args:
+            filepath (str): Filepath of a header record.
+        Returns:
+            str: The filepath within root_dir.
+        """
+        if self.root_dir is None:
+            return filepath
+        return os.path.join(self.root_dir, filepath)
 
     def shouldRollover(self, record):
         """
@@ -30,8 +180,25 @@ class ManualRotatingFileHandler(BaseRotatingHandler):
         """
         assert hasattr(record, self.key), f"Record must have the key '{self.key}'"
         record_obj = getattr(record, self.key)
+        run_key = getattr(record, "run_key", None)
+        if self.direct:
+            # Records of interleaved runs are routed to the file of their run
+            if hasattr(record_obj, "filepath"):
+                self._run_filepaths[run_key] = self.output_path(record_obj.filepath)
+            assert (
+                run_key in self._run_filepaths
+            ), "First message of each run should always be a Header."
+            self._select_file(self._run_filepaths[run_key])
+            # Records are written to their final file, there is nothing to rotate
+            self.stream = self._get_stream(self._run_filepaths[run_key])  # type: ignore[assignment]
+            return False
+        if hasattr(record_obj, "filepath"):
+            self._run_key = run_key
+        assert (
+            run_key == self._run_key
+        ), "Records of interleaved runs can only be written in direct mode."
         if hasattr(record_obj, "filepath"):
-            new_filepath = getattr(record_obj, "filepath")
+            new_filepath = self.output_path(record_obj.filepath)
             if new_filepath != self.current_filepath:
                 # Rollover condition met
                 if self.current_filepath is None:
@@ -53,6 +220,8 @@ class ManualRotatingFileHandler(BaseRotatingHandler):
         Perform the rollover by closing the current stream and renaming the file.
         """
         assert self.current_filepath is not None, "Current filepath should not be None."
+        # Buffered lines belong to the current file
+        self._write_buffer()
         os.makedirs(os.path.dirname(self.current_filepath), exist_ok=True)
         if self.stream:
             self.stream.close()
@@ -67,7 +236,19 @@ class ManualRotatingFileHandler(BaseRotatingHandler):
         assert (
             self.next_filepath is None
         ), "Next filepath should be None before closing."
-        if self.current_filepath is not None:
+        if self.direct:
+            self.acquire()
+            try:
+                self._write_buffer()
+                for stream in self._streams.values():
+                    stream.close()
+                self._streams.clear()
+                self._run_filepaths.clear()
+                self.stream = None  # type: ignore[assignment]
+                self.current_filepath = None
+            finally:
+                self.release()
+        elif self.current_filepath is not None:
             # Ensure we perform a rollover if there is a current filepath
             # before closing the handler
             self.doRollover()
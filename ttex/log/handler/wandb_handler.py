@@ -1,10 +1,15 @@
 import logging
 import ast
+import json
 from wandb.sdk.wandb_run import Run, AlertLevel
 import wandb
-from typing import Optional, Dict, List
+from typing import Optional, Dict, List, Mapping
 from ttex.log import LOGGER_NAME
+from ttex.log.handler.wandb_spool import SpoolRun
+from ttex.log.handler.artifact_staging import ArtifactStaging
+from concurrent.futures import Future, ThreadPoolExecutor, wait as wait_futures
 import os.path as osp
+import time
 from dataclasses import dataclass
 
 logger = logging.getLogger(LOGGER_NAME)
@@ -23,20 +28,76 @@ class WandbHandler(logging.Handler):
         project: Optional[str] = None,
         group: Optional[str] = None,
         level=logging.NOTSET,
+        batch_size: int = 0,
+        batch_interval: float = 1.0,
+        spool_dir: Optional[str] = None,
+        artifact_workers: int = 2,
+        close_timeout: Optional[float] = 300.0,
+        staging_dir: Optional[str] = None,
+        staging_max_bytes: int = 2**33,
+        snapshot_dir: Optional[str] = None,
+        snapshot_cache_dir: Optional[str] = None,
     ):
         """
         Args:
             wandb_run (Run): Wandb run object
             custom_metrics (Optional[Dict], optional): Custom metrics to define. Defaults to None.
             level ([type], optional): Logging level. Defaults to logging.NOTSET.
+            batch_size (int, optional): Number of records to buffer before logging them
+                to wandb, merged into one dict per step. Defaults to 0, i.e. every record
+                is logged immediately.
+            batch_interval (float, optional): Maximum time in seconds a record is buffered,
+                checked when the next record is emitted. Defaults to 1.0.
+            spool_dir (Optional[str], optional): Directory to spool runs to instead of
+                sending them to wandb, see `sync_spool`. Defaults to None.
+            artifact_workers (int, optional): Number of threads that create and log
+                artifacts and the snapshot in the background. Defaults to 2.
+            close_timeout (Optional[float], optional): Maximum time in seconds close waits
+                for them before finishing the run, None to wait indefinitely. Artifacts
+                that did not start by then are cancelled, running uploads are waited
+                for up to close_timeout again. Defaults to 300.
+            staging_dir (Optional[str], optional): Directory to stage the files of
+                directory artifacts in, see `ArtifactStaging`. Defaults to None, i.e.
+                wandb stages them.
+            staging_max_bytes (int, optional): Size of the staged objects above which
+                the least recently used ones are evicted when the handler is closed.
+                Defaults to 8 GiB.
+            snapshot_dir (Optional[str], optional): Directory of the base snapshot the
+                snapshots of runs are diffed against, see `SnapshotStore`. Only the
+                changed sections are uploaded. Defaults to None, i.e. full snapshots.
+            snapshot_cache_dir (Optional[str], optional): Directory to cache the static
+                sections of the snapshot in, e.g. DEFAULT_CACHE_DIR, see
+                `capture_snapshot`. Defaults to None, i.e. no cache.
         """
         super().__init__(level)
+        assert batch_interval >= 0, "batch_interval must not be negative"
+        self.batch_size = batch_size
+        self.batch_interval = batch_interval
+        # Buffered rows: [step, merged dict, committed]
+        self._rows: List[List] = []
+        self._buffered = 0
+        self._buffer_start = 0.0
         self.snapshot = snapshot
         self.snapshot_sensitive_keys = snapshot_sensitive_keys
         self._run: Optional[Run] = None
         self.custom_metrics = custom_metrics if custom_metrics else {}
         self.project = project
         self.group = group
+        self.spool_dir = spool_dir
+        assert artifact_workers > 0, "artifact_workers must be positive"
+        self.artifact_workers = artifact_workers
+        self.close_timeout = close_timeout
+        self.staging = (
+            ArtifactStaging(staging_dir, max_bytes=staging_max_bytes)
+            if staging_dir
+            else None
+        )
+        self.snapshot_dir = snapshot_dir
+        self.snapshot_cache_dir = snapshot_cache_dir
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Background tasks that are not done yet, with the name they are logged as
+        self._futures: Dict[Future, str] = {}
+        self._snapshot_future: Optional[Future] = None
 
     @property
     def run(self):
@@ -44,8 +105,12 @@ class WandbHandler(logging.Handler):
 
     @run.setter
     def run(self, value: Run):
+        if self._run is not None:
+            # Buffered records belong to the previous run
+            self.flush()
         self._run = value
         assert self._run is not None, "Wandb run cannot be None"
+        self._snapshot_future = None
         # Define custom metrics if any
         for step_metric, metrics in self.custom_metrics.items():
             self._run.define_metric(step_metric)
@@ -62,23 +127,100 @@ class WandbHandler(logging.Handler):
             logger.handle(record)
             logger.warning("WandbHandler not initialized with wandb run")
             return
-        msg = record.getMessage()
         step = record.step if hasattr(record, "step") else None
         commit = record.commit if hasattr(record, "commit") else None
 
-        try:
-            msg_dict = ast.literal_eval(msg)
-            assert isinstance(msg_dict, dict), "Message is not a dict"
-            self._run.log(msg_dict, step=step, commit=commit)
-        except SyntaxError as e:
+        msg_dict = self.record_metrics(record)
+        if msg_dict is None:
             logger.handle(record)
-            logger.warning(f"Non-dict passed to WandbHandler {e} msg:{msg}")
+            logger.warning(f"Non-dict passed to WandbHandler msg:{record.msg}")
+            return
+        if self.batch_size <= 1:
+            self._run.log(msg_dict, step=step, commit=commit)
+        else:
+            self._buffer(msg_dict, step, commit)
+
+    @staticmethod
+    def record_metrics(record: logging.LogRecord) -> Optional[Dict]:
+        """
+        Get the metrics of a log record without formatting its message.
+        The dict is taken from the message, e.g. logger.info({"loss": loss}),
+        or from the arguments, e.g. logger.info("metrics", {"loss": loss}),
+        so its values (e.g. numpy scalars and arrays) are passed to wandb as they are.
+        Messages that are string representations of dicts are still parsed.
+        Args:
+            record (LogRecord): Log record
+        Returns:
+            Optional[Dict]: The metrics, None if the record has no dict
+        """
+        if isinstance(record.msg, dict):
+            return record.msg
+        if isinstance(record.msg, Mapping):
+            return dict(record.msg)
+        if isinstance(record.args, Mapping):
+            return dict(record.args)
+        if isinstance(record.msg, str) and record.msg.lstrip().startswith("{"):
+            # Only for messages that were formatted before logging
+            try:
+                msg_dict = ast.literal_eval(record.getMessage())
+            except (SyntaxError, ValueError):
+                return None
+            if isinstance(msg_dict, dict):
+                return msg_dict
+        return None
+
+    def _buffer(self, msg_dict: Dict, step: Optional[int], commit: Optional[bool]):
+        """
+        Merge a record into the buffered rows, the same way wandb merges
+        the dicts logged to the same step, and log the rows if the buffer is full.
+        """
+        if not self._rows:
+            self._buffer_start = time.monotonic()
+        row = self._rows[-1] if self._rows else None
+        if row is not None and not row[2] and (step is None or step == row[0]):
+            # Same step as the previous records that were not committed yet
+            row[1].update(msg_dict)
+        else:
+            if row is not None:
+                # A new step commits the previous one
+                row[2] = True
+            row = [step, dict(msg_dict), False]
+            self._rows.append(row)
+        # Like wandb, the step is committed unless commit is False,
+        # or a step is given without commit and more records might follow
+        row[2] = commit if commit is not None else step is None
+        self._buffered += 1
+        if (
+            self._buffered >= self.batch_size
+            or time.monotonic() - self._buffer_start >= self.batch_interval
+        ):
+            self._log_rows()
+
+    def _log_rows(self):
+        rows, self._rows = self._rows, []
+        self._buffered = 0
+        if self._run is None:
+            return
+        for step, data, committed in rows:
+            # One call per step, the last one stays open if it was not committed
+            self._run.log(data, step=step, commit=committed)
+
+    def flush(self):
+        """
+        Log all buffered records to wandb
+        """
+        self.acquire()
+        try:
+            self._log_rows()
+        finally:
+            self.release()
 
     @staticmethod
     def wandb_init(
         run_config: Dict,
         project: Optional[str] = None,
         group: Optional[str] = None,
+        spool_dir: Optional[str] = None,
     ) -> Run:
         """
         Initialize wandb run
@@ -86,9 +228,16 @@ class WandbHandler(logging.Handler):
             run_config (Dict): Run configuration
             project (Optional[str], optional): Wandb project. Defaults to None.
             group (Optional[str], optional): Wandb group. Defaults to None.
+            spool_dir (Optional[str], optional): If given, the run is spooled to this
+                directory without any network access. Defaults to None.
         Returns:
             wandb.sdk.wandb_run.Run: Wandb run
         """
+        if spool_dir is not None:
+            # Same interface as far as the handler is concerned
+            return SpoolRun(  # type: ignore[return-value]
+                spool_dir, config=run_config, project=project, group=group
+            )
         if not project:
             run = wandb.init(config=run_config, group=group)
         else:
@@ -103,7 +252,19 @@ class WandbHandler(logging.Handler):
         local_path: str,
         artifact_type: str = "evaluation",
         description: Optional[str] = "",
+        staging: Optional[ArtifactStaging] = None,
     ) -> Optional[wandb.Artifact]:
+        if isinstance(run, SpoolRun):
+            # Created from the path when the spool is synced
+            if not osp.exists(local_path):
+                logger.warning(
+                    f"Path {local_path} does not exist. Cannot log artifact."
+                )
+            else:
+                run.log_artifact_path(
+                    artifact_name, local_path, artifact_type, description
+                )
+            return None
         artifact_name = f"{artifact_name}_{run.id}"
         artifact = wandb.Artifact(
             name=artifact_name, type=artifact_type, description=description
@@ -112,7 +273,11 @@ class WandbHandler(logging.Handler):
         if osp.isfile(local_path):
             artifact.add_file(local_path=local_path, name=artifact_name)
         elif osp.isdir(local_path):
-            artifact.add_dir(local_path=local_path, name=artifact_name)
+            if staging is not None:
+                # Deduplicated, and unchanged files are not hashed again
+                staging.add_dir(artifact, local_path=local_path, name=artifact_name)
+            else:
+                artifact.add_dir(local_path=local_path, name=artifact_name)
         else:
             logger.warning(f"Path {local_path} does not exist. Cannot log artifact.")
             return None
@@ -125,15 +290,45 @@ class WandbHandler(logging.Handler):
         run: Run,
         extra_info: Optional[Dict] = None,
         extra_sensitive_keys: Optional[List[str]] = None,
+        snapshot_dir: Optional[str] = None,
+        cache_dir: Optional[str] = None,
     ) -> Optional[wandb.Artifact]:
-        from ttex.log import capture_snapshot
+        """
+        Capture the system snapshot and log it as artifact of the run.
+        With a snapshot_dir, only the sections that differ from the base snapshot
+        are logged, see `SnapshotStore`. If the snapshot becomes the new base,
+        it is logged in full as system_snapshot_base_{run.id} first.
+        With a cache_dir, the static sections are cached, see `capture_snapshot`.
+        """
+        from ttex.log import SnapshotStore, capture_snapshot
 
         snapshot_path = f"snapshot_{run.id}.json"
-        capture_snapshot(
-            output_path=snapshot_path,
-            extra_info=extra_info,
-            extra_sensitive_keys=extra_sensitive_keys,
-        )
+        if snapshot_dir is None:
+            capture_snapshot(
+                output_path=snapshot_path,
+                extra_info=extra_info,
+                extra_sensitive_keys=extra_sensitive_keys,
+                cache_dir=cache_dir,
+            )
+        else:
+            store = SnapshotStore(snapshot_dir)
+            snapshot = capture_snapshot(
+                extra_info=extra_info,
+                extra_sensitive_keys=extra_sensitive_keys,
+                cache_dir=cache_dir,
+            )
+            base_ref = f"system_snapshot_base_{run.id}"
+            diff, new_base = store.diff(snapshot, new_base_ref=base_ref)
+            if new_base:
+                WandbHandler.create_wandb_artifact(
+                    run=run,
+                    artifact_name="system_snapshot_base",
+                    local_path=store.base_path(base_ref),
+                    artifact_type="dataset",
+                    description="Base the system snapshots of later runs refer to",
+                )
+            with open(snapshot_path, "w") as f:
+                json.dump(diff, f, indent=2)
         artifact = WandbHandler.create_wandb_artifact(
             run=run,
             artifact_name="system_snapshot",
@@ -143,18 +338,138 @@ class WandbHandler(logging.Handler):
         )
         return artifact
 
+    def _submit(self, name: str, fn, *args, **kwargs) -> Future:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.artifact_workers, thread_name_prefix="wandb_artifact"
+            )
+        future = self._executor.submit(fn, *args, **kwargs)
+        self._futures[future] = name
+        return future
+
+    def log_artifact(
+        self,
+        artifact_name: str,
+        local_path: str,
+        artifact_type: str = "evaluation",
+        description: Optional[str] = "",
+    ) -> Optional[Future]:
+        """
+        Start creating and logging an artifact of the current run in the background.
+        Args:
+            artifact_name (str): Name of the artifact, the run id is appended.
+            local_path (str): File or directory to log.
+            artifact_type (str, optional): Type of the artifact. Defaults to "evaluation".
+            description (Optional[str], optional): Description. Defaults to "".
+        Returns:
+            Optional[Future]: Resolves to the artifact, None without a run.
+        """
+        if self._run is None:
+            logger.warning("WandbHandler not initialized with wandb run")
+            return None
+        return self._submit(
+            artifact_name,
+            WandbHandler.create_wandb_artifact,
+            run=self._run,
+            artifact_name=artifact_name,
+            local_path=local_path,
+            artifact_type=artifact_type,
+            description=description,
+            staging=self.staging,
+        )
+
+    def log_snapshot_async(self, extra_info: Optional[Dict] = None) -> Optional[Future]:
+        """
+        Start capturing and logging the system snapshot of the current run
+        in the background. close does not capture it again.
+        Args:
+            extra_info (Optional[Dict], optional): Extra info for the snapshot.
+        Returns:
+            Optional[Future]: Resolves to the artifact, None without a run.
+        """
+        if self._run is None:
+            logger.warning("WandbHandler not initialized with wandb run")
+            return None
+        if self._snapshot_future is None:
+            self._snapshot_future = self._submit(
+                "system_snapshot",
+                WandbHandler.log_snapshot,
+                run=self._run,
+                extra_info=extra_info,
+                extra_sensitive_keys=self.snapshot_sensitive_keys,
+                snapshot_dir=self.snapshot_dir,
+                cache_dir=self.snapshot_cache_dir,
+            )
+        return self._snapshot_future
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait for the artifacts started in the background.
+        Args:
+            timeout (Optional[float], optional): Maximum time in seconds to wait,
+                None to wait indefinitely.
+        Returns:
+            bool: True if all of them are done.
+        """
+        done, not_done = wait_futures(list(self._futures), timeout=timeout)
+        for future in done:
+            if not future.cancelled() and future.exception() is not None:
+                logger.warning(
+                    f"Logging artifact {self._futures[future]} failed: "
+                    f"{future.exception()}"
+                )
+        self._futures = {
+            future: name for future, name in self._futures.items() if future in not_done
+        }
+        return not not_done
+
+    def _cancel_pending(self):
+        """
+        Cancel the artifacts that did not start yet. Running uploads cannot be
+        interrupted, they are waited for another close_timeout so that they do
+        not race the end of the run.
+        """
+        assert self._run is not None
+        cancelled = [name for future, name in self._futures.items() if future.cancel()]
+        if cancelled:
+            logger.warning(
+                f"Artifacts of run {self._run.id} not started within "
+                f"{self.close_timeout}s, cancelled: {', '.join(cancelled)}"
+            )
+        self.wait(0)
+        if self._futures:
+            logger.warning(
+                f"Waiting for the running uploads of run {self._run.id} before "
+                f"finishing it: {', '.join(self._futures.values())}"
+            )
+        if not self.wait(self.close_timeout):
+            logger.warning(
+                f"Uploads of run {self._run.id} still running after another "
+                f"{self.close_timeout}s, finishing the run without them: "
+                f"{', '.join(self._futures.values())}"
+            )
+
     def close(self):
+        # Buffered records are logged before the run is finished
+        self.flush()
         if self._run is not None:
             if self.snapshot:
-                self.log_snapshot(
-                    run=self._run,
-                    extra_sensitive_keys=self.snapshot_sensitive_keys,
-                )
+                # Captured while the alert is sent
+                self.log_snapshot_async()
             self._run.alert(
                 title=f"Run {self._run.id} finished",
                 text=f"Run {self._run.id} has finished. Check the results at {self._run.url}",
                 level=AlertLevel.INFO,
             )
+            if not self.wait(self.close_timeout):
+                self._cancel_pending()
             self._run.finish()
             self._run = None  # Reset to avoid triggering again
+            if self.staging is not None and not self._futures:
+                # The staged objects of the run are uploaded
+                self.staging.cleanup()
+        if self._executor is not None:
+            # Hung uploads must not block the close
+            self._executor.shutdown(wait=False)
+            self._executor = None
         super().close()
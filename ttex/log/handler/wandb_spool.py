@@ -0,0 +1,346 @@
+import json
+import logging
+import os
+import os.path as osp
+import shutil
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import numpy as np
+from ttex.log import LOGGER_NAME
+
+logger = logging.getLogger(LOGGER_NAME)
+
+SPOOL_PREFIX = "spool_"
+SPOOL_SUFFIX = ".jsonl"
+# Written to the directory of a run once it was synced
+SYNCED_MARKER = ".synced"
+# Appended to while a run is synced, one line per replayed entry
+SYNC_PROGRESS = ".sync_progress"
+
+
+def _encode(value: Any, media_dir: Optional[str] = None) -> Any:
+    """
+    Encode values json does not support, numpy arrays and wandb media are
+    restored on replay. Images are copied to `media_dir`. Array-likes such as
+    tensors are converted with numpy, scalars with their item().
+
+    Raises:
+        TypeError: For values that cannot be spooled, instead of replaying
+            them as strings.
+    """
+    media = _encode_media(value, media_dir)
+    if media is not None:
+        return media
+    if hasattr(value, "__array__") and not isinstance(value, np.ndarray):
+        value = np.asarray(value)
+        if value.ndim == 0:
+            return value.item()
+    if isinstance(value, np.ndarray):
+        return {"__ndarray__": value.tolist(), "dtype": str(value.dtype)}
+    if isinstance(value, np.generic):
+        return value.item()
+    if callable(getattr(value, "item", None)):
+        return value.item()
+    raise TypeError(f"{type(value).__name__} cannot be spooled: {value!r}")
+
+
+def _encode_media(value: Any, media_dir: Optional[str] = None) -> Optional[Dict]:
+    """
+    Encode wandb histograms, tables and images.
+
+    Args:
+        value: The value to encode.
+        media_dir (Optional[str]): Directory to copy images to.
+    Returns:
+        Optional[Dict]: The encoded media, None if the value is not wandb media.
+    Raises:
+        TypeError: For wandb media that cannot be spooled.
+    """
+    import wandb
+    from wandb.sdk.data_types.base_types.wb_value import WBValue
+
+    if not isinstance(value, WBValue):
+        return None
+    if isinstance(value, wandb.Histogram):
+        return {
+            "__wandb__": "Histogram",
+            "histogram": value.histogram,
+            "bins": value.bins,
+        }
+    if isinstance(value, wandb.Table):
+        return {"__wandb__": "Table", "columns": value.columns, "data": value.data}
+    if isinstance(value, wandb.Image) and value._path and media_dir is not None:
+        os.makedirs(media_dir, exist_ok=True)
+        extension = osp.splitext(value._path)[1]
+        path = osp.join(media_dir, f"{uuid.uuid4().hex}{extension}")
+        shutil.copyfile(value._path, path)
+        return {
+            "__wandb__": "Image",
+            "path": osp.abspath(path),
+            "caption": value._caption,
+        }
+    raise TypeError(
+        f"{type(value).__name__} cannot be spooled, "
+        "only histograms, tables and images are supported"
+    )
+
+
+def _decode(obj: Dict) -> Any:
+    if "__ndarray__" in obj:
+        return np.array(obj["__ndarray__"], dtype=obj["dtype"])
+    if "__wandb__" in obj:
+        import wandb
+
+        if obj["__wandb__"] == "Histogram":
+            return wandb.Histogram(np_histogram=(obj["histogram"], obj["bins"]))
+        if obj["__wandb__"] == "Table":
+            return wandb.Table(columns=obj["columns"], data=obj["data"])
+        if obj["__wandb__"] == "Image":
+            return wandb.Image(obj["path"], caption=obj["caption"])
+    return obj
+
+
+class SpoolRun:
+    """
+    Stand-in for a wandb run that appends everything the WandbHandler logs
+    to local JSONL files, one directory per run. Nothing is sent over the
+    network, the spool is replayed into wandb later with `sync_spool`.
+    """
+
+    def __init__(
+        self,
+        spool_dir: str,
+        config: Optional[Dict] = None,
+        project: Optional[str] = None,
+        group: Optional[str] = None,
+        max_bytes: int = 64 * 2**20,
+    ):
+        """
+        Args:
+            spool_dir (str): Directory to create the run directory in.
+            config (Optional[Dict]): Run configuration.
+            project (Optional[str]): Wandb project.
+            group (Optional[str]): Wandb group.
+            max_bytes (int): Size after which the spool continues in a new file.
+        """
+        assert max_bytes > 0, "max_bytes must be positive"
+        # Same format as wandb run ids, the run is synced with this id
+        self.id = uuid.uuid4().hex[:8]
+        self.dir = osp.join(spool_dir, self.id)
+        self.url = f"file://{osp.abspath(self.dir)}"
+        self.max_bytes = max_bytes
+        os.makedirs(self.dir, exist_ok=True)
+        self._file = None
+        self._file_idx = -1
+        self._lock = threading.Lock()
+        self._is_finished = False
+        self._write(
+            {"type": "init", "config": config, "project": project, "group": group}
+        )
+
+    def _write(self, entry: Dict):
+        assert not self._is_finished, "Run is already finished"
+        entry["time"] = time.time()
+        line = json.dumps(entry, default=self._encode) + "\n"
+        with self._lock:
+            if self._file is None or self._file.tell() >= self.max_bytes:
+                self._rotate()
+            assert self._file is not None
+            self._file.write(line)
+            # Complete lines survive a crash of the process
+            self._file.flush()
+
+    def _encode(self, value: Any) -> Any:
+        return _encode(value, media_dir=osp.join(self.dir, "media"))
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        self._file_idx += 1
+        filename = f"{SPOOL_PREFIX}{self._file_idx:06d}{SPOOL_SUFFIX}"
+        self._file = open(osp.join(self.dir, filename), "a")
+
+    def define_metric(self, name: str, step_metric: Optional[str] = None):
+        self._write({"type": "define_metric", "name": name, "step_metric": step_metric})
+
+    def log(
+        self, data: Dict, step: Optional[int] = None, commit: Optional[bool] = None
+    ):
+        self._write({"type": "log", "data": data, "step": step, "commit": commit})
+
+    def log_artifact_path(
+        self,
+        artifact_name: str,
+        local_path: str,
+        artifact_type: str = "evaluation",
+        description: Optional[str] = "",
+    ):
+        """
+        Spool an artifact. Only the path is spooled, it has to exist when syncing.
+        """
+        self._write(
+            {
+                "type": "artifact",
+                "artifact_name": artifact_name,
+                "local_path": osp.abspath(local_path),
+                "artifact_type": artifact_type,
+                "description": description,
+            }
+        )
+
+    def alert(self, title: str, text: str, level=None):
+        level = getattr(level, "value", level)
+        self._write({"type": "alert", "title": title, "text": text, "level": level})
+
+    def finish(self):
+        self._write({"type": "finish"})
+        self._is_finished = True
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+
+def read_spool(run_dir: str) -> Iterator[Dict]:
+    """
+    Read the entries of a spooled run in order.
+    A partially written last line, e.g. after a crash, is skipped.
+
+    Args:
+        run_dir (str): Directory of the run.
+    Returns:
+        Iterator[Dict]: The entries.
+    """
+    filenames = sorted(
+        f
+        for f in os.listdir(run_dir)
+        if f.startswith(SPOOL_PREFIX) and f.endswith(SPOOL_SUFFIX)
+    )
+    for filename in filenames:
+        with open(osp.join(run_dir, filename), "r") as f:
+            for line in f:
+                try:
+                    yield json.loads(line, object_hook=_decode)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping incomplete line in {filename}")
+
+
+def replayed_entries(run_dir: str) -> int:
+    """
+    Get the number of entries of a spooled run that an earlier, interrupted
+    sync already replayed, not counting the init entry.
+
+    Args:
+        run_dir (str): Directory of the run.
+    Returns:
+        int: Number of replayed entries.
+    """
+    try:
+        with open(osp.join(run_dir, SYNC_PROGRESS), "r") as f:
+            # A partially written last line does not count
+            return sum(1 for line in f if line.endswith("\n"))
+    except OSError:
+        return 0
+
+
+def wandb_init_run(
+    run_id: str,
+    config: Optional[Dict] = None,
+    project: Optional[str] = None,
+    group: Optional[str] = None,
+):
+    """
+    Initialize the wandb run a spooled run is synced to.
+    """
+    import wandb
+
+    kwargs: Dict[str, Any] = {"id": run_id, "resume": "allow", "config": config}
+    if project:
+        kwargs["project"] = project
+    if group:
+        kwargs["group"] = group
+    return wandb.init(**kwargs)
+
+
+def sync_spool(
+    spool_dir: str,
+    init_run: Callable[..., Any] = wandb_init_run,
+    include_unfinished: bool = False,
+) -> List[str]:
+    """
+    Replay the spooled runs into wandb. Synced runs are marked and skipped
+    by later syncs. The replayed entries of each run are recorded as they
+    are replayed, so an interrupted sync resumes after the last replayed entry.
+
+    Args:
+        spool_dir (str): Spool directory of the WandbHandler.
+        init_run (Callable[..., Any]): Creates the run to replay into, called
+            with the run_id, config, project and group of the spooled run.
+        include_unfinished (bool): Also sync runs that did not finish yet,
+            e.g. because the process crashed.
+    Returns:
+        List[str]: Ids of the synced runs.
+    """
+    from ttex.log.handler.wandb_handler import WandbHandler
+    from wandb.sdk.wandb_run import AlertLevel
+
+    synced = []
+    for run_id in sorted(os.listdir(spool_dir)):
+        run_dir = osp.join(spool_dir, run_id)
+        if not osp.isdir(run_dir) or osp.exists(osp.join(run_dir, SYNCED_MARKER)):
+            continue
+        entries = list(read_spool(run_dir))
+        finished = any(entry["type"] == "finish" for entry in entries)
+        if not entries or entries[0]["type"] != "init":
+            logger.warning(f"Skipping spooled run {run_id} without init")
+            continue
+        if not finished and not include_unfinished:
+            continue
+        init = entries[0]
+        run = init_run(
+            run_id=run_id,
+            config=init["config"],
+            project=init["project"],
+            group=init["group"],
+        )
+        progress_path = osp.join(run_dir, SYNC_PROGRESS)
+        replayed = replayed_entries(run_dir)
+        if replayed:
+            logger.info(f"Resuming sync of {run_id} after {replayed} entries")
+        with open(progress_path, "a") as progress:
+            for idx, entry in enumerate(entries[1:]):
+                entry_type = entry["type"]
+                # Metric definitions are repeated for the resumed run
+                if idx < replayed and entry_type != "define_metric":
+                    continue
+                if entry_type == "define_metric":
+                    run.define_metric(entry["name"], step_metric=entry["step_metric"])
+                elif entry_type == "log":
+                    run.log(entry["data"], step=entry["step"], commit=entry["commit"])
+                elif entry_type == "artifact":
+                    WandbHandler.create_wandb_artifact(
+                        run=run,
+                        artifact_name=entry["artifact_name"],
+                        local_path=entry["local_path"],
+                        artifact_type=entry["artifact_type"],
+                        description=entry["description"],
+                    )
+                elif entry_type == "alert":
+                    level = entry["level"]
+                    run.alert(
+                        title=entry["title"],
+                        text=entry["text"],
+                        level=AlertLevel(level) if level else AlertLevel.INFO,
+                    )
+                if idx >= replayed:
+                    progress.write(f"{idx}\n")
+                    progress.flush()
+        # Unfinished runs are finished by the sync
+        run.finish()
+        with open(osp.join(run_dir, SYNCED_MARKER), "w") as f:
+            f.write(f"{time.time()}\n")
+        os.remove(progress_path)
+        synced.append(run_id)
+    return synced
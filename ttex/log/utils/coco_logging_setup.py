@@ -1,9 +1,11 @@
 import logging
 import os.path as osp
 
-from ttex.log.handler import ManualRotatingFileHandler
+from ttex.log.handler import AsyncQueueHandler, ManualRotatingFileHandler
 from ttex.log.formatter import KeyFormatter
 from ttex.log.filter import KeyFilter, EventKeysplitFilter
+from ttex.log.coco.binary_sink import COCOBinaryHandler
+from ttex.log.coco.wandb_bridge import COCOWandbHandler
 
 from typing import Optional, List
 
@@ -15,6 +17,16 @@ def setup_coco_logger(
     improvement_steps: float = 1e-5,
     number_target_triggers: int = 20,
     target_precision: float = 1e-8,
+    buffer_lines: int = 0,
+    buffer_bytes: int = 0,
+    direct: bool = False,
+    max_open_files: int = 16,
+    asynchronous: bool = False,
+    max_queue_size: int = 10000,
+    shard_dir: Optional[str] = None,
+    binary: bool = False,
+    wandb_logger_name: Optional[str] = None,
+    wandb_max_log_rate: float = 1.0,
 ) -> logging.Logger:
     # TODO: make this into a default setup to make it easier
     logger = logging.getLogger(name)
@@ -40,20 +52,60 @@ def setup_coco_logger(
         logger.addFilter(coco_filter)
 
         # Create a ManualRotatingFileHandler instance for log and info
+        handlers: List[logging.Handler] = []
         for type_str in ["info", "log_dat", "log_tdat"]:
             # Make some dummy files that should be deleted after
-            filepath = osp.join("test_dir", f"coco_{type_str}.txt")
+            # Shards (e.g. one per worker process) write to separate directories
+            filepath = osp.join(shard_dir or "", "test_dir", f"coco_{type_str}.txt")
+            handler: logging.Handler
+            if binary and type_str != "info":
+                # Trajectories as binary columns, see export_coco_text
+                handler = COCOBinaryHandler(
+                    key=type_str,
+                    root_dir=shard_dir,
+                    buffer_rows=buffer_lines or 1024,
+                )
+                handler.addFilter(KeyFilter(key=type_str))
+                handlers.append(handler)
+                continue
             handler = ManualRotatingFileHandler(
-                filepath=filepath, key=type_str, mode="a"
+                filepath=filepath,
+                key=type_str,
+                mode="a",
+                buffer_lines=buffer_lines,
+                buffer_bytes=buffer_bytes,
+                direct=direct,
+                max_open_files=max_open_files,
+                root_dir=shard_dir,
             )
             formatter = KeyFormatter(key=type_str)
             handler.setFormatter(formatter)
             filter = KeyFilter(key=type_str)
             handler.addFilter(filter)
-            logger.addHandler(handler)
+            handlers.append(handler)
+        if wandb_logger_name is not None:
+            # Live progress to the run of the wandb logger
+            handlers.append(
+                COCOWandbHandler(
+                    wandb_logger_name=wandb_logger_name,
+                    max_log_rate=wandb_max_log_rate,
+                )
+            )
+        if asynchronous:
+            # Format and write the records in a background thread
+            logger.addHandler(AsyncQueueHandler(handlers, max_queue_size))
+        else:
+            for file_handler in handlers:
+                logger.addHandler(file_handler)
     return logger
 
 
+def flush_coco_logger(name: str = "coco_logger") -> None:
+    logger = logging.getLogger(name)
+    for handler in logger.handlers:
+        handler.flush()
+
+
 def teardown_coco_logger(name: str = "coco_logger") -> None:
     logger = logging.getLogger(name)
     for handler in logger.handlers[:]:
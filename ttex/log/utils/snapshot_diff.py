@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+# Marks a snapshot that only contains the sections that differ from its base
+DIFF_FORMAT = "ttex-snapshot-diff-1"
+# Sections that change with every run, they do not count towards max_diff_ratio
+VOLATILE_SECTIONS = ["timestamp", "memory", "env_vars", "custom_info"]
+
+
+def section_hash(section) -> str:
+    """
+    Hash a snapshot section independently of the order of its keys.
+
+    Args:
+        section: The section, anything json serializable.
+    Returns:
+        str: Hex digest of the section.
+    """
+    content = json.dumps(section, sort_keys=True, default=str)
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def section_hashes(snapshot: Dict) -> Dict[str, str]:
+    """
+    Hash each top-level section of a snapshot.
+
+    Args:
+        snapshot (Dict): The snapshot.
+    Returns:
+        Dict[str, str]: Hash by section name.
+    """
+    return {name: section_hash(section) for name, section in snapshot.items()}
+
+
+def _canonical(value: Any) -> Any:
+    """The value as it is stored, e.g. with lists instead of tuples"""
+    return json.loads(json.dumps(value, default=str))
+
+
+def _diff_dict(new: Dict, old: Dict) -> Dict:
+    """
+    Changes that turn one dict into another, recursing into the dicts in both.
+
+    Args:
+        new (Dict): The changed dict.
+        old (Dict): The dict it is compared to.
+    Returns:
+        Dict: Values to "set", keys "removed" and "nested" changes of dicts.
+    """
+    diff: Dict[str, Any] = {}
+    for key, value in new.items():
+        if key in old and value == old[key]:
+            continue
+        if key in old and isinstance(value, dict) and isinstance(old[key], dict):
+            diff.setdefault("nested", {})[key] = _diff_dict(value, old[key])
+        else:
+            diff.setdefault("set", {})[key] = value
+    removed = [key for key in old if key not in new]
+    if removed:
+        diff["removed"] = removed
+    return diff
+
+
+def _apply_dict(diff: Dict, old: Dict) -> Dict:
+    removed = set(diff.get("removed", []))
+    new = {key: value for key, value in old.items() if key not in removed}
+    for key, nested in diff.get("nested", {}).items():
+        new[key] = _apply_dict(nested, old[key])
+    new.update(diff.get("set", {}))
+    return new
+
+
+def diff_snapshot(snapshot: Dict, base: Dict, base_ref: str) -> Dict:
+    """
+    Reduce a snapshot to what differs from a base snapshot.
+    Unchanged sections are only referenced by their hash. Of the changed
+    sections that are dicts in both, only the changed keys are kept.
+
+    Args:
+        snapshot (Dict): The full snapshot.
+        base (Dict): The base snapshot.
+        base_ref (str): Reference of the base, e.g. the name of its artifact.
+    Returns:
+        Dict: The differential snapshot, with the changed sections in "sections"
+            and the changes of dict sections in "keys".
+    """
+    base_hashes = section_hashes(base)
+    hashes = section_hashes(snapshot)
+    sections = {}
+    keys = {}
+    for name, digest in hashes.items():
+        if base_hashes.get(name) == digest:
+            continue
+        if isinstance(snapshot[name], dict) and isinstance(base.get(name), dict):
+            keys[name] = _diff_dict(_canonical(snapshot[name]), _canonical(base[name]))
+        else:
+            sections[name] = snapshot[name]
+    return {
+        "format": DIFF_FORMAT,
+        "base": base_ref,
+        "hashes": hashes,
+        "sections": sections,
+        "keys": keys,
+    }
+
+
+def is_diff(snapshot: Dict) -> bool:
+    return snapshot.get("format") == DIFF_FORMAT
+
+
+def reconstruct_snapshot(snapshot: Dict, base: Dict) -> Dict:
+    """
+    Rebuild the full snapshot from a differential snapshot and its base.
+
+    Args:
+        snapshot (Dict): The differential snapshot. Full snapshots are returned as is.
+        base (Dict): The base snapshot it references.
+    Returns:
+        Dict: The full snapshot, with the sections in their original order.
+    """
+    if not is_diff(snapshot):
+        return snapshot
+    full = {}
+    keys = snapshot.get("keys", {})
+    for name, digest in snapshot["hashes"].items():
+        if name in snapshot["sections"]:
+            full[name] = snapshot["sections"][name]
+            continue
+        assert name in base, f"Section {name} missing in base {snapshot['base']}"
+        if name in keys:
+            full[name] = _apply_dict(keys[name], base[name])
+        else:
+            full[name] = base[name]
+        assert section_hash(full[name]) == digest, (
+            f"Section {name} of base {snapshot['base']} does not match, "
+            "reconstructing from the wrong base?"
+        )
+    return full
+
+
+def _size(sections: Dict) -> int:
+    return len(
+        json.dumps(
+            {
+                name: section
+                for name, section in sections.items()
+                if name not in VOLATILE_SECTIONS
+            },
+            default=str,
+        )
+    )
+
+
+class SnapshotStore:
+    """
+    Local store of the base snapshot that later snapshots are diffed against,
+    e.g. shared by the runs of a sweep in the same image. A new base is set
+    if a snapshot differs too much from the current one, not counting the
+    VOLATILE_SECTIONS.
+    """
+
+    def __init__(self, store_dir: str, max_diff_ratio: float = 0.5):
+        """
+        Args:
+            store_dir (str): Directory of the base snapshots.
+            max_diff_ratio (float): Size of the changes, relative to the full
+                snapshot, above which the snapshot becomes the new base.
+        """
+        self.store_dir = store_dir
+        self.max_diff_ratio = max_diff_ratio
+        os.makedirs(store_dir, exist_ok=True)
+
+    def base_path(self, base_ref: str) -> str:
+        return os.path.join(self.store_dir, f"{base_ref}.json")
+
+    def _write(self, path: str, content: Dict):
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(content, f, indent=2)
+        os.replace(tmp_path, path)
+
+    def current_base(self) -> Optional[Tuple[str, Dict]]:
+        """
+        Get the current base snapshot.
+
+        Returns:
+            Optional[Tuple[str, Dict]]: Reference and content of the base,
+                None if there is none yet.
+        """
+        try:
+            with open(os.path.join(self.store_dir, "base.json"), "r") as f:
+                base_ref = json.load(f)["base"]
+            return base_ref, self.load_base(base_ref)
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def load_base(self, base_ref: str) -> Dict:
+        with open(self.base_path(base_ref), "r") as f:
+            return json.load(f)
+
+    def set_base(self, snapshot: Dict, base_ref: str):
+        """
+        Store a snapshot and use it as base for the following snapshots.
+        """
+        self._write(self.base_path(base_ref), snapshot)
+        self._write(os.path.join(self.store_dir, "base.json"), {"base": base_ref})
+
+    def diff(self, snapshot: Dict, new_base_ref: str) -> Tuple[Dict, bool]:
+        """
+        Diff a snapshot against the current base, making it the new base if
+        there is none or too much changed.
+
+        Args:
+            snapshot (Dict): The full snapshot.
+            new_base_ref (str): Reference of the snapshot if it becomes the new base.
+        Returns:
+            Tuple[Dict, bool]: The differential snapshot, and whether the snapshot
+                became the new base.
+        """
+        current = self.current_base()
+        if current is not None:
+            diff = diff_snapshot(snapshot, current[1], current[0])
+            changed = _size({**diff["sections"], **diff["keys"]})
+            if changed <= self.max_diff_ratio * _size(snapshot):
+                return diff, False
+        self.set_base(snapshot, new_base_ref)
+        return diff_snapshot(snapshot, snapshot, new_base_ref), True
+
+    def reconstruct(self, snapshot: Dict) -> Dict:
+        """
+        Rebuild a full snapshot from a differential snapshot with a base in the store.
+        """
+        if not is_diff(snapshot):
+            return snapshot
+        return reconstruct_snapshot(snapshot, self.load_base(snapshot["base"]))
@@ -1,19 +1,43 @@
 import os
 import sys
 import json
+import hashlib
 import platform
 import subprocess
 import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import Optional, Dict, List
+from typing import Any, Callable, Optional, Dict, List
 import shlex
-
-
-def run_cmd(cmd: str, parse: str = "raw", split_char=":", filter_fn=None) -> dict:
+from importlib import metadata
+import re
+
+# Maximum time in seconds for a single command
+CMD_TIMEOUT = 30.0
+# Sections that only change when the image or environment changes.
+# The os section holds the kernel and hostname of the node, it is always collected.
+STATIC_SECTIONS = ["python", "compilers", "conda", "apt_packages"]
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("XDG_CACHE_HOME", os.path.join(os.path.expanduser("~"), ".cache")),
+    "ttex",
+    "snapshot",
+)
+
+
+def run_cmd(
+    cmd: str,
+    parse: str = "raw",
+    split_char=":",
+    filter_fn=None,
+    timeout: Optional[float] = CMD_TIMEOUT,
+) -> dict:
     try:
         # shlex is for input sanitation
-        output = subprocess.check_output(shlex.split(cmd), text=True).strip()
+        output = subprocess.check_output(
+            shlex.split(cmd), text=True, timeout=timeout
+        ).strip()
 
         if parse == "lines":
             lines = output.splitlines()
@@ -33,33 +57,170 @@ def run_cmd(cmd: str, parse: str = "raw", split_char=":", filter_fn=None) -> dic
 
     except subprocess.CalledProcessError as e:
         return {"success": False, "error": str(e), "returncode": e.returncode}
+    except subprocess.TimeoutExpired as e:
+        return {"success": False, "error": str(e), "timeout": timeout}
+
+
+def read_kv(path: str, split_char=":") -> dict:
+    """
+    Read key-value lines of a file, in the same format as run_cmd with parse="kv".
+    """
+    try:
+        with open(path, "r") as f:
+            content = f.read()
+    except OSError as e:
+        return {"success": False, "error": str(e)}
+    result = {}
+    for line in content.strip().splitlines():
+        if split_char in line:
+            k, v = line.split(split_char, 1)
+            result[k.strip()] = v.strip()
+    return {"success": True, "data": result}
+
+
+# Not listed by pip freeze
+PIP_FREEZE_EXCLUDED = (
+    {"pip"}
+    if sys.version_info >= (3, 12)
+    else {"pip", "setuptools", "wheel", "distribute"}
+)
+
+
+def get_installed_packages() -> dict:
+    """
+    Installed distributions and their versions, like pip freeze parsed with "==".
+    """
+    packages: Dict[str, str] = {}
+    for dist in metadata.distributions():
+        name = dist.metadata["Name"]
+        if name and name.lower() not in PIP_FREEZE_EXCLUDED:
+            # The first distribution on sys.path is the one that is imported
+            packages.setdefault(name, dist.version)
+    return {
+        "success": True,
+        "data": dict(sorted(packages.items(), key=lambda item: item[0].lower())),
+    }
 
 
 def get_python_info():
     return {
         "python_version": sys.version,
         "executable": sys.executable,
-        "packages": run_cmd("pip freeze", parse="kv", split_char="=="),
+        "packages": get_installed_packages(),
     }
 
 
+def get_kernel_info() -> dict:
+    """
+    Same as uname -a, from os.uname
+    """
+    uname = os.uname()
+    output = " ".join(
+        [uname.sysname, uname.nodename, uname.release, uname.version, uname.machine]
+    )
+    if uname.sysname == "Linux":
+        output += " GNU/Linux"
+    return {"success": True, "output": output}
+
+
 def get_os_info():
     return {
         "os": platform.system(),
         "os_release": platform.release(),
         "os_version": platform.version(),
         "platform": platform.platform(),
-        "kernel": run_cmd("uname -a"),
-        "distro": run_cmd("cat /etc/os-release", parse="kv", split_char="="),
+        "kernel": get_kernel_info(),
+        "distro": read_kv("/etc/os-release", split_char="="),
     }
 
 
+# Fields of /proc/cpuinfo by their name in lscpu
+CPUINFO_FIELDS = {
+    "Vendor ID": "vendor_id",
+    "Model name": "model name",
+    "CPU family": "cpu family",
+    "Model": "model",
+    "Stepping": "stepping",
+    "CPU MHz": "cpu MHz",
+    "BogoMIPS": "bogomips",
+    "Address sizes": "address sizes",
+    "Flags": "flags",
+}
+
+
 def get_cpu_info():
-    return {"cpu": run_cmd("lscpu", parse="kv"), "num_cores": os.cpu_count()}
+    cpuinfo = read_kv("/proc/cpuinfo")
+    if not cpuinfo["success"]:
+        # No procfs, e.g. on macOS
+        return {"cpu": run_cmd("lscpu", parse="kv"), "num_cores": os.cpu_count()}
+    with open("/proc/cpuinfo", "r") as f:
+        num_cpus = sum(1 for line in f if line.startswith("processor"))
+    # Later processors overwrite the first one, they are the same in practice
+    fields = cpuinfo["data"]
+    data = {
+        "Architecture": platform.machine(),
+        "Byte Order": f"{sys.byteorder.capitalize()} Endian",
+        "CPU(s)": str(num_cpus),
+    }
+    for name, field in CPUINFO_FIELDS.items():
+        if field in fields:
+            data[name] = fields[field]
+    return {"cpu": {"success": True, "data": data}, "num_cores": os.cpu_count()}
+
+
+def _human_readable(kib: int) -> str:
+    """Format a size in KiB like free -h"""
+    value = float(kib) * 1024
+    for unit in ["B", "Ki", "Mi", "Gi", "Ti"]:
+        if value < 1024 or unit == "Ti":
+            break
+        value /= 1024
+    if unit == "B":
+        return f"{int(value)}B"
+    return f"{value:.1f}{unit}" if value < 10 else f"{int(value)}{unit}"
 
 
 def get_memory_info():
-    return {"memory": run_cmd("free -h", parse="lines")}
+    meminfo = read_kv("/proc/meminfo")
+    if not meminfo["success"]:
+        return {"memory": run_cmd("free -h", parse="lines")}
+    kib = {
+        key: int(value.split()[0])
+        for key, value in meminfo["data"].items()
+        if value.split() and value.split()[0].isdigit()
+    }
+    total = kib.get("MemTotal", 0)
+    free = kib.get("MemFree", 0)
+    available = kib.get("MemAvailable", free)
+    buff_cache = kib.get("Buffers", 0) + kib.get("Cached", 0)
+    buff_cache += kib.get("SReclaimable", 0)
+    swap_total = kib.get("SwapTotal", 0)
+    swap_free = kib.get("SwapFree", 0)
+    rows = [
+        ["", "total", "used", "free", "shared", "buff/cache", "available"],
+        ["Mem:"]
+        + [
+            _human_readable(value)
+            for value in [
+                total,
+                total - available,
+                free,
+                kib.get("Shmem", 0),
+                buff_cache,
+                available,
+            ]
+        ],
+        ["Swap:"]
+        + [
+            _human_readable(value)
+            for value in [swap_total, swap_total - swap_free, swap_free]
+        ],
+    ]
+    # Same layout as free -h
+    lines = [
+        f"{row[0]:<8}" + "".join(f"{cell:>12}" for cell in row[1:]) for row in rows
+    ]
+    return {"memory": {"success": True, "lines": lines}}
 
 
 def get_gpu_info():
@@ -109,13 +270,123 @@ def check_git():
             ["git", "rev-parse", "--is-inside-work-tree"],
             text=True,
             stderr=subprocess.DEVNULL,  # Suppress error output
+            timeout=CMD_TIMEOUT,
         )
         return True
-    except subprocess.CalledProcessError:
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired):
         return False
 
 
+def find_git_dir(path: str) -> Optional[str]:
+    """
+    Find the git directory of the repository a path is in.
+
+    Args:
+        path (str): Path in the work tree.
+    Returns:
+        Optional[str]: The git directory, None if the path is not in a repository.
+    """
+    path = os.path.abspath(path)
+    while True:
+        candidate = os.path.join(path, ".git")
+        if os.path.isdir(candidate):
+            return candidate
+        if os.path.isfile(candidate):
+            # Work trees and submodules point to their git directory
+            with open(candidate, "r") as f:
+                content = f.read().strip()
+            if content.startswith("gitdir:"):
+                return os.path.join(path, content[len("gitdir:") :].strip())
+            return None
+        parent = os.path.dirname(path)
+        if parent == path:
+            return None
+        path = parent
+
+
+def _common_dir(git_dir: str) -> str:
+    commondir = os.path.join(git_dir, "commondir")
+    if os.path.isfile(commondir):
+        with open(commondir, "r") as f:
+            return os.path.join(git_dir, f.read().strip())
+    return git_dir
+
+
+def read_git_ref(git_dir: str, ref: str) -> Optional[str]:
+    """
+    Resolve a ref to a commit from the loose or the packed refs.
+
+    Args:
+        git_dir (str): The git directory.
+        ref (str): The ref, e.g. refs/heads/main.
+    Returns:
+        Optional[str]: The commit hash, None if it cannot be resolved.
+    """
+    for base in [git_dir, _common_dir(git_dir)]:
+        ref_path = os.path.join(base, ref)
+        if os.path.isfile(ref_path):
+            with open(ref_path, "r") as f:
+                return f.read().strip()
+    packed_refs = os.path.join(_common_dir(git_dir), "packed-refs")
+    if os.path.isfile(packed_refs):
+        with open(packed_refs, "r") as f:
+            for line in f:
+                parts = line.strip().split(" ")
+                if len(parts) == 2 and parts[1] == ref:
+                    return parts[0]
+    return None
+
+
+def read_git_remotes(git_dir: str) -> str:
+    """
+    Read the remotes from the git config, in the same format and order as git remote -v.
+    """
+    config_path = os.path.join(_common_dir(git_dir), "config")
+    if not os.path.isfile(config_path):
+        return ""
+    remotes: Dict[str, Dict[str, str]] = {}
+    remote = None
+    with open(config_path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("["):
+                match = re.match(r'\[remote "(.+)"\]', line)
+                remote = match.group(1) if match else None
+            elif remote is not None and "=" in line:
+                key, value = line.split("=", 1)
+                remotes.setdefault(remote, {})[key.strip()] = value.strip()
+    lines = []
+    for name, values in sorted(remotes.items()):
+        if "url" in values:
+            lines.append(f"{name}\t{values['url']} (fetch)")
+            lines.append(f"{name}\t{values.get('pushurl', values['url'])} (push)")
+    return "\n".join(lines)
+
+
 def get_git_info():
+    git_dir = None if os.environ.get("GIT_DIR") else find_git_dir(os.getcwd())
+    if git_dir is not None and os.path.isfile(os.path.join(git_dir, "HEAD")):
+        with open(os.path.join(git_dir, "HEAD"), "r") as f:
+            head = f.read().strip()
+        if head.startswith("ref:"):
+            ref = head[len("ref:") :].strip()
+            branch = ref[len("refs/heads/") :] if ref.startswith("refs/heads/") else ref
+            commit = read_git_ref(git_dir, ref)
+        else:
+            # Detached HEAD
+            branch, commit = "HEAD", head
+        if commit is not None:
+            return {
+                "in_repo": {"success": True, "output": "true"},
+                "branch": {"success": True, "output": branch},
+                "commit": {"success": True, "output": commit},
+                "remote": {"success": True, "output": read_git_remotes(git_dir)},
+            }
+    # e.g. GIT_DIR, or a branch without commits
+    return get_git_info_cmd()
+
+
+def get_git_info_cmd():
     if check_git():
         return {
             "in_repo": run_cmd("git rev-parse --is-inside-work-tree"),
@@ -147,11 +418,117 @@ def get_installed_apt_packages():
     return "<dpkg not available>"
 
 
+def _succeeded(section: Any) -> bool:
+    """Whether none of the commands of a section failed"""
+    if isinstance(section, dict):
+        if section.get("success") is False:
+            return False
+        return all(_succeeded(value) for value in section.values())
+    return True
+
+
+def _mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def _distributions(path: str) -> List[str]:
+    """Names and versions of the packages installed in a sys.path directory"""
+    try:
+        return sorted(
+            name
+            for name in os.listdir(path)
+            if name.endswith((".dist-info", ".egg-info"))
+        )
+    except OSError:
+        return []
+
+
+def _read(path: str) -> Optional[str]:
+    try:
+        with open(path, "r") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def snapshot_cache_key() -> str:
+    """
+    Key of the cached static sections, computed from the content of the
+    environment: the interpreter, the Python environment, the installed Python
+    packages, the OS release and the apt packages. Set TTEX_IMAGE_ID to
+    additionally separate images that do not differ in these.
+
+    Returns:
+        str: Hex digest of the key.
+    """
+    key = {
+        "executable": sys.executable,
+        "version": sys.version,
+        "prefix": sys.prefix,
+        "env": {
+            name: os.environ.get(name)
+            for name in ["PATH", "VIRTUAL_ENV", "CONDA_PREFIX", "CONDA_DEFAULT_ENV"]
+        },
+        "image": os.environ.get("TTEX_IMAGE_ID"),
+        # The dist-info directories are named after the package and its version
+        "packages": [
+            (path, _distributions(path)) for path in sys.path if os.path.isdir(path)
+        ],
+        "os_release": _read("/etc/os-release"),
+        "dpkg": _mtime("/var/lib/dpkg/status"),
+    }
+    return hashlib.sha256(json.dumps(key, sort_keys=True).encode()).hexdigest()
+
+
+def _load_static(cache_dir: str, key: str) -> Dict:
+    try:
+        with open(os.path.join(cache_dir, f"{key}.json"), "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _store_static(cache_dir: str, key: str, sections: Dict):
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        path = os.path.join(cache_dir, f"{key}.json")
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(sections, f)
+        os.replace(tmp_path, path)
+    except OSError:
+        # The cache is only an optimisation
+        pass
+
+
 def capture_snapshot(
     output_path: Optional[str] = None,
     extra_info: Optional[Dict] = None,
     extra_sensitive_keys: Optional[List[str]] = None,
+    cache_dir: Optional[str] = None,
+    max_workers: int = 8,
 ):
+    """
+    Capture information about the system, the environment and the code.
+    The collectors run concurrently, each command with a timeout of CMD_TIMEOUT.
+    With a cache_dir, e.g. DEFAULT_CACHE_DIR, the static sections (Python
+    packages, compilers, conda and apt packages) are cached, see
+    `snapshot_cache_key`.
+
+    Args:
+        output_path (Optional[str]): Path to write the snapshot to as JSON.
+        extra_info (Optional[Dict]): Stored as custom_info.
+        extra_sensitive_keys (Optional[List[str]]): Further environment variables
+            to redact.
+        cache_dir (Optional[str]): Directory of the cache. Defaults to None,
+            i.e. no cache.
+        max_workers (int): Number of collectors to run at the same time.
+    Returns:
+        Dict: The snapshot.
+    """
     sensitive_keys = [
         "DOCKER_USER_NAME",
         "DOCKER_PWD",
@@ -165,19 +542,49 @@ def capture_snapshot(
         sensitive_keys.extend(extra_sensitive_keys)
         sensitive_keys = list(set(sensitive_keys))
 
+    collectors: Dict[str, Callable[[], Any]] = {
+        "python": get_python_info,
+        "os": get_os_info,
+        "cpu": get_cpu_info,
+        "memory": get_memory_info,
+        "gpu": get_gpu_info,
+        "compilers": get_compiler_info,
+        "git": get_git_info,
+        "conda": get_conda_info,
+        "apt_packages": get_installed_apt_packages,
+    }
+    cache_key = snapshot_cache_key() if cache_dir else ""
+    cached = _load_static(cache_dir, cache_key) if cache_dir else {}
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            name: executor.submit(collector)
+            for name, collector in collectors.items()
+            if name not in cached
+        }
+        sections = {name: future.result() for name, future in futures.items()}
+    if cache_dir:
+        missing = {
+            name: sections[name]
+            for name in STATIC_SECTIONS
+            if name in sections and _succeeded(sections[name])
+        }
+        if missing:
+            _store_static(cache_dir, cache_key, {**cached, **missing})
+    sections.update(cached)
+
     snapshot = {
         "timestamp": datetime.now(timezone.utc).isoformat(),
-        "python": get_python_info(),
-        "os": get_os_info(),
-        "cpu": get_cpu_info(),
-        "memory": get_memory_info(),
-        "gpu": get_gpu_info(),
-        "compilers": get_compiler_info(),
+        "python": sections["python"],
+        "os": sections["os"],
+        "cpu": sections["cpu"],
+        "memory": sections["memory"],
+        "gpu": sections["gpu"],
+        "compilers": sections["compilers"],
         "env_vars": get_env_vars(sensitive_keys),
-        "git": get_git_info(),
-        "conda": get_conda_info(),
+        "git": sections["git"],
+        "conda": sections["conda"],
         "virtualenv": get_virtualenv_info(),
-        "apt_packages": get_installed_apt_packages(),
+        "apt_packages": sections["apt_packages"],
         "custom_info": extra_info or {},
     }
     if output_path:
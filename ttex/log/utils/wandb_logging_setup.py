@@ -1,5 +1,6 @@
 import logging
 from ttex.log.handler import WandbHandler
+from concurrent.futures import Future
 from typing import Optional, Dict, List
 import wandb
 from ttex.log import LOGGER_NAME
@@ -15,6 +16,14 @@ def setup_wandb_logger(
     group: Optional[str] = None,
     name: str = "wandb_logger",
     level: int = logging.INFO,
+    batch_size: int = 0,
+    batch_interval: float = 1.0,
+    spool_dir: Optional[str] = None,
+    close_timeout: Optional[float] = 300.0,
+    staging_dir: Optional[str] = None,
+    staging_max_bytes: int = 2**33,
+    snapshot_dir: Optional[str] = None,
+    snapshot_cache_dir: Optional[str] = None,
 ) -> logging.Logger:
     wandb_logger = logging.getLogger(name)
     if not getattr(wandb_logger, "_wandb_setup", None):
@@ -30,6 +39,14 @@ def setup_wandb_logger(
             project=project,
             group=group,
             level=level,
+            batch_size=batch_size,
+            batch_interval=batch_interval,
+            spool_dir=spool_dir,
+            close_timeout=close_timeout,
+            staging_dir=staging_dir,
+            staging_max_bytes=staging_max_bytes,
+            snapshot_dir=snapshot_dir,
+            snapshot_cache_dir=snapshot_cache_dir,
         )
         wandb_handler.setLevel(level)
         wandb_logger.addHandler(wandb_handler)
@@ -85,7 +102,10 @@ def log_wandb_init(
         logger.warning("WandbHandler not found")
         return None
     run = WandbHandler.wandb_init(
-        run_config=run_config, project=handler.project, group=handler.group
+        run_config=run_config,
+        project=handler.project,
+        group=handler.group,
+        spool_dir=handler.spool_dir,
     )
     handler.run = run
     return handler.run
@@ -109,3 +129,25 @@ def log_wandb_artifact(
         artifact_type=artifact_type,
         description=description,
     )
+
+
+def log_wandb_artifact_async(
+    logger_name: str,
+    artifact_name: str,
+    local_path: str,
+    artifact_type: str = "evaluation",
+    description: str = "",
+) -> Optional[Future]:
+    """
+    Start logging an artifact in the background, teardown_wandb_logger waits for it
+    """
+    handler = _get_wandb_handler(name=logger_name)
+    if handler is None or not getattr(handler, "run", None):
+        logger.warning("WandbHandler not found or not initialized with wandb run")
+        return None
+    return handler.log_artifact(
+        artifact_name=artifact_name,
+        local_path=local_path,
+        artifact_type=artifact_type,
+        description=description,
+    )